@@ -0,0 +1,127 @@
+"""Load benchmark for /api/chat against the mock Anthropic endpoint.
+
+Starts the mock API in-process and server.py under uvicorn in a subprocess,
+then sweeps client concurrency and reports p50/p99 latency and throughput.
+
+    python benchmarks/bench_chat_load.py --latency-ms 500 --concurrency 1 4 16 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+from mock_anthropic import start_mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def wait_until_up(session: aiohttp.ClientSession, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status < 500:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+async def run_level(session: aiohttp.ClientSession, base_url: str, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/api/chat", json={"message": f"hello {i}"}) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+    }
+
+
+async def main(args) -> list:
+    mock = await start_mock(port=args.mock_port, latency_ms=args.latency_ms)
+    env = dict(os.environ)
+    env.update({
+        "ANTHROPIC_API_KEY": "mock-key",
+        "ANTHROPIC_BASE_URL": f"http://127.0.0.1:{args.mock_port}",
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    try:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_until_up(session, f"{base_url}/api/servers")
+            for concurrency in args.concurrency:
+                requests = max(args.requests, concurrency * 4)
+                result = await run_level(session, base_url, concurrency, requests)
+                results.append(result)
+                if not args.json:
+                    print(
+                        f"c={result['concurrency']:>4}  n={result['requests']:>5}  "
+                        f"p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  "
+                        f"rps={result['throughput_rps']}  errors={result['errors']}"
+                    )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        await mock.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--requests", type=int, default=50, help="minimum requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    results = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps({"latency_ms": args.latency_ms, "results": results}, indent=2))
@@ -0,0 +1,132 @@
+"""Filesystem tool benchmark on large synthetic trees.
+
+Creates a flat directory of N entries (100k by default) and a nested tree,
+then measures the original ls (listdir + per-entry isdir + string +=) against
+the scandir listing, uncached and cached, plus find, grep and ranged reads
+of a large file.
+
+    python benchmarks/bench_file_server.py [--entries 100000] [--file-mb 64] [--dir /tmp/bench]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "example_mcp_servers"))
+
+from file_mcp_server import (  # noqa: E402
+    ListingCache, find_paths, grep_files, list_page, read_range, scan_directory,
+)
+
+
+def legacy_ls(full_path: str) -> str:
+    """The listing as the server built it before: sorted listdir, one isdir stat per entry, string +="""
+    result = "Contents of .:\n"
+    for item in sorted(os.listdir(full_path)):
+        if os.path.isdir(os.path.join(full_path, item)):
+            result += f"📁 {item}/\n"
+        else:
+            result += f"📄 {item}\n"
+    return result
+
+
+def timed_ms(fn, repeat: int = 1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return round(best, 2)
+
+
+def build_flat(root: Path, entries: int) -> Path:
+    flat = root / "flat"
+    flat.mkdir()
+    for i in range(entries):
+        if i % 10 == 0:
+            (flat / f"dir_{i:07d}").mkdir()
+        else:
+            (flat / f"file_{i:07d}.txt").touch()
+    return flat
+
+
+def build_tree(root: Path, fanout: int, depth: int, files_per_dir: int) -> Path:
+    tree = root / "tree"
+    level = [tree]
+    tree.mkdir()
+    for _ in range(depth):
+        next_level = []
+        for directory in level:
+            for f in range(files_per_dir):
+                suffix = ".py" if f % 4 == 0 else ".txt"
+                (directory / f"file_{f}{suffix}").write_text(f"line one\nTODO item {f}\nline three\n")
+            for d in range(fanout):
+                child = directory / f"d{d}"
+                child.mkdir()
+                next_level.append(child)
+        level = next_level
+    return tree
+
+
+def build_big_file(root: Path, size_mb: int) -> Path:
+    path = root / "big.log"
+    line = b"2024-01-01T00:00:00 INFO request handled in 12ms path=/api/chat status=200\n"
+    target = size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        block = line * 1000
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+        f.write(b"2024-01-01T00:00:01 ERROR needle in the haystack\n")
+    return path
+
+
+def main(args) -> dict:
+    root = Path(tempfile.mkdtemp(dir=args.dir))
+    try:
+        flat = str(build_flat(root, args.entries))
+        tree = str(build_tree(root, fanout=4, depth=5, files_per_dir=8))
+        big = str(build_big_file(root, args.file_mb))
+        cache = ListingCache()
+        cache.get(flat)
+
+        def all_pages():
+            cursor = ""
+            while cursor is not None:
+                _, cursor = list_page(flat, cursor, 5000, cache=cache)
+
+        return {
+            "entries": args.entries,
+            "legacy_ls_ms": timed_ms(lambda: legacy_ls(flat), args.repeat),
+            "scandir_full_scan_ms": timed_ms(lambda: scan_directory(flat), args.repeat),
+            "first_page_uncached_ms": timed_ms(lambda: list_page(flat, limit=200, cache=None), args.repeat),
+            "first_page_cached_ms": timed_ms(lambda: list_page(flat, limit=200, cache=cache), args.repeat),
+            "last_page_cached_ms": timed_ms(
+                lambda: list_page(flat, cursor=f"file_{args.entries - 300:07d}.txt", limit=200, cache=cache),
+                args.repeat),
+            "all_pages_cached_ms": timed_ms(all_pages, args.repeat),
+            "page_with_details_ms": timed_ms(lambda: list_page(flat, limit=200, details=True, cache=cache), args.repeat),
+            "find_py_in_tree_ms": timed_ms(lambda: find_paths(tree, "*.py", limit=100000), args.repeat),
+            "find_first_100_ms": timed_ms(lambda: find_paths(tree, "*.py", limit=100), args.repeat),
+            "grep_tree_ms": timed_ms(lambda: grep_files(tree, r"TODO item [37]", limit=100000), args.repeat),
+            "file_mb": args.file_mb,
+            "grep_big_file_ms": timed_ms(lambda: grep_files(big, "ERROR"), args.repeat),
+            "read_first_64kb_ms": timed_ms(lambda: read_range(big, 0), args.repeat),
+            "read_last_64kb_ms": timed_ms(lambda: read_range(big, os.path.getsize(big) - 65536), args.repeat),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--file-mb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", default=None, help="where to create the synthetic trees (default: system temp)")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,100 @@
+"""Serialization and compression benchmark for HTTP API payloads.
+
+Builds representative bodies of /api/chat (a reply quoting a large ls listing
+or repeat output), /api/servers (many servers with status details) and a
+batch NDJSON stream, then reports the encoding time of the standard json
+module (as Starlette's JSONResponse renders) against http_responses.dumps,
+and body bytes uncompressed, gzip and brotli (when installed).
+
+    python benchmarks/bench_http_encoding.py [--servers 50] [--entries 5000] [--repeat 200]
+"""
+import argparse
+import json
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import http_responses  # noqa: E402
+from http_responses import _Compressor, dumps  # noqa: E402
+
+
+def stdlib_render(obj) -> bytes:
+    """What Starlette's JSONResponse.render does"""
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def payloads(args) -> dict:
+    listing = "\n".join(
+        f"📄 file_{i:05d}.txt" if i % 7 else f"📁 dir_{i:05d}/" for i in range(args.entries)
+    )
+    repeated = "\n".join(["The quick brown fox jumps over the lazy dog."] * 2000)
+    servers = {
+        f"server_{i}": {
+            "url": f"http://mcp-{i}.internal:8000/mcp",
+            "state": "connected" if i % 5 else "reconnecting",
+            "connected_at": 1700000000.0 + i,
+            "handshake_ms": 12.5 + i % 9,
+            "failures": i % 3,
+            "last_error": None if i % 5 else "ConnectError: connection refused",
+            "tools": 10 + i % 17,
+        }
+        for i in range(args.servers)
+    }
+    batch = [
+        {"index": i, "id": f"call-{i}", "server": "files", "tool": "ls", "ok": True,
+         "result": {"content": [{"type": "text", "text": listing[: 200 + i * 10]}], "is_error": False},
+         "duration_ms": 3.2}
+        for i in range(200)
+    ]
+    return {
+        "chat_ls": {"response": f"Here is the listing:\n{listing}", "session_id": "a" * 32},
+        "chat_repeat": {"response": repeated, "session_id": "a" * 32},
+        "servers": {"servers": list(servers), "details": servers},
+        "batch_ndjson": batch,
+    }
+
+
+def timed_us(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1e6, 1)
+
+
+def main(args) -> dict:
+    report = {"orjson": http_responses.orjson is not None, "brotli": http_responses.brotli is not None}
+    for name, payload in payloads(args).items():
+        if name == "batch_ndjson":
+            legacy = lambda: b"".join(stdlib_render(record) + b"\n" for record in payload)  # noqa: E731
+            fast = lambda: b"".join(dumps(record) + b"\n" for record in payload)  # noqa: E731
+        else:
+            legacy = lambda: stdlib_render(payload)  # noqa: E731
+            fast = lambda: dumps(payload)  # noqa: E731
+        body = fast()
+        row = {
+            "json_encode_us": timed_us(legacy, args.repeat),
+            "fast_encode_us": timed_us(fast, args.repeat),
+            "bytes": len(body),
+            "gzip_bytes": len(_Compressor("gzip", 6, 4).finish(body)),
+            "gzip_us": timed_us(lambda: _Compressor("gzip", 6, 4).finish(body), args.repeat),
+        }
+        if http_responses.brotli is not None:
+            row["br_bytes"] = len(_Compressor("br", 6, 4).finish(body))
+            row["br_us"] = timed_us(lambda: _Compressor("br", 6, 4).finish(body), args.repeat)
+        report[name] = row
+    # Sanity check that the gzip stream decodes to the original body
+    assert zlib.decompress(_Compressor("gzip", 6, 4).finish(b"x" * 100), 31) == b"x" * 100
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=200)
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,171 @@
+"""Prompt size benchmark for the tool section of a chat turn.
+
+Compares the original prompt (every tool pretty-printed into the system prompt
+on each turn) with the current one (compact tool definitions built once per
+catalog version and cached by the provider) for 1, 10 and 100 connected
+servers, each exposing the demo tools.
+
+    python benchmarks/bench_prompt_size.py [--servers 1 10 100] [--count-tokens]
+
+Token counts are estimated at 4 chars per token unless --count-tokens is given,
+which asks the API's count_tokens endpoint (needs ANTHROPIC_API_KEY).
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chat_agent import SYSTEM_PROMPT, tool_definition  # noqa: E402
+
+MODEL = "claude-3-7-sonnet-20250219"
+
+# Schemas as FastMCP generates them for the demo servers, pydantic titles included
+DEMO_TOOLS = [
+    SimpleNamespace(
+        name="echo",
+        description="Echoes back the input message",
+        inputSchema={"properties": {"message": {"title": "Message", "type": "string"}},
+                     "required": ["message"], "type": "object"},
+    ),
+    SimpleNamespace(
+        name="repeat",
+        description="Repeats the input message a specified number of times (default: 10)",
+        inputSchema={"properties": {"message": {"title": "Message", "type": "string"},
+                                    "times": {"default": 10, "title": "Times", "type": "integer"}},
+                     "required": ["message"], "type": "object"},
+    ),
+    SimpleNamespace(
+        name="count_letters",
+        description="Count the number of letters in a word",
+        inputSchema={"properties": {"word": {"title": "Word", "type": "string"}},
+                     "required": ["word"], "type": "object"},
+    ),
+    SimpleNamespace(
+        name="fibonacci",
+        description="Calculate the fibonacci number for a given input",
+        inputSchema={"properties": {"n": {"title": "N", "type": "integer"}},
+                     "required": ["n"], "type": "object"},
+    ),
+    SimpleNamespace(
+        name="ls",
+        description="List contents of a directory",
+        inputSchema={"properties": {"path": {"default": ".", "title": "Path", "type": "string"}},
+                     "type": "object"},
+    ),
+    SimpleNamespace(
+        name="cd",
+        description="Change current directory",
+        inputSchema={"properties": {"path": {"title": "Path", "type": "string"}},
+                     "required": ["path"], "type": "object"},
+    ),
+]
+
+# The system prompt the chat endpoint used to rebuild on every request
+LEGACY_SYSTEM_PROMPT = """You are a helpful AI assistant with access to the following tools:
+{tools}
+
+When you need to use a tool, respond with a JSON object in this format:
+{{
+    "tool": "server_name.tool_name",
+    "parameters": {{
+        "param_name": "param_value"
+    }}
+}}
+
+For example, to use the echo tool, respond with:
+{{
+    "tool": "default_mcp.echo",
+    "parameters": {{
+        "message": "your message here"
+    }}
+}}
+
+Otherwise, respond normally with your message."""
+
+
+def catalogs(servers: int) -> list:
+    return [(f"server_{i}", DEMO_TOOLS) for i in range(servers)]
+
+
+def legacy_prompt(servers: int) -> dict:
+    all_tools = [
+        {"name": f"{name}.{tool.name}", "description": tool.description,
+         "input_schema": tool.inputSchema, "server": name}
+        for name, tools in catalogs(servers) for tool in tools
+    ]
+    return {"system": LEGACY_SYSTEM_PROMPT.format(tools=json.dumps(all_tools, indent=2))}
+
+
+def current_prompt(servers: int) -> dict:
+    tools = [tool_definition(name, tool) for name, tools in catalogs(servers) for tool in tools]
+    return {"system": SYSTEM_PROMPT, "tools": tools}
+
+
+def prompt_bytes(prompt: dict) -> int:
+    return len(json.dumps(prompt, separators=(",", ":")).encode("utf-8"))
+
+
+def estimate_tokens(prompt: dict) -> int:
+    return prompt_bytes(prompt) // 4
+
+
+def count_tokens(client, prompt: dict) -> int:
+    result = client.messages.count_tokens(
+        model=MODEL, messages=[{"role": "user", "content": "hi"}], **prompt
+    )
+    return result.input_tokens
+
+
+def time_build(build, servers: int, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        build(servers)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(args) -> dict:
+    client = None
+    if args.count_tokens:
+        from anthropic import Anthropic
+        client = Anthropic()
+
+    rows = []
+    for servers in args.servers:
+        legacy, current = legacy_prompt(servers), current_prompt(servers)
+        count = (lambda prompt: count_tokens(client, prompt)) if client else estimate_tokens
+        rows.append({
+            "servers": servers,
+            "tools": servers * len(DEMO_TOOLS),
+            "legacy_bytes": prompt_bytes(legacy),
+            "current_bytes": prompt_bytes(current),
+            "legacy_tokens": count(legacy),
+            "current_tokens": count(current),
+            # The legacy prompt was rebuilt on every turn; the current one only when a catalog changes
+            "legacy_build_ms": round(time_build(legacy_prompt, servers), 3),
+            "current_build_ms": round(time_build(current_prompt, servers), 3),
+        })
+    return {"token_counts": "api" if client else "estimated (4 chars/token)", "results": rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--count-tokens", action="store_true", help="use the API's count_tokens endpoint")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    report = main(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"token counts: {report['token_counts']}")
+        for row in report["results"]:
+            print(
+                f"servers={row['servers']:>4} tools={row['tools']:>4}  "
+                f"bytes {row['legacy_bytes']:>7} -> {row['current_bytes']:>7}  "
+                f"tokens {row['legacy_tokens']:>6} -> {row['current_tokens']:>6}  "
+                f"build {row['legacy_build_ms']}ms -> {row['current_build_ms']}ms"
+            )
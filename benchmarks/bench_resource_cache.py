@@ -0,0 +1,147 @@
+"""Resource read latency with and without MCPManager's resource cache.
+
+Starts this file as a stdio MCP server twice: once with resources/subscribe
+support and once without. Each server has --resources text documents plus a
+counter resource that its bump tool increments. Reports:
+
+- uncached and cached per-read latency
+- the time to prefetch every listed resource after connect
+- how soon a bump becomes visible: right after the update notification on
+  the subscribing server, and after the cache TTL on the other one
+
+    python benchmarks/bench_resource_cache.py [--reads 500] [--resources 50] [--size 4096] [--ttl 1]
+"""
+import argparse
+import asyncio
+import json
+import shlex
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from bench_chat_load import percentile  # noqa: E402
+from mcp_client import MCPManager  # noqa: E402
+from resource_cache import ResourceCache  # noqa: E402
+
+
+def serve(resources: int, size: int, subscribe: bool) -> None:
+    from fastmcp import FastMCP
+    from fastmcp.resources import TextResource
+
+    mcp = FastMCP("Resource Bench Server")
+    for i in range(resources):
+        mcp.add_resource(TextResource(uri=f"doc://bench/{i}", name=f"doc-{i}", text=f"{i:06d}" * (size // 6)))
+    counter = {"value": 0}
+    subscribers = set()
+
+    @mcp.resource("live://counter")
+    def read_counter() -> str:
+        return str(counter["value"])
+
+    @mcp.tool()
+    async def bump() -> int:
+        """Increment the counter and notify subscribed sessions"""
+        counter["value"] += 1
+        for session in list(subscribers):
+            try:
+                await session.send_resource_updated("live://counter")
+            except Exception:
+                subscribers.discard(session)
+        return counter["value"]
+
+    if subscribe:
+        @mcp._mcp_server.subscribe_resource()
+        async def on_subscribe(uri) -> None:
+            if str(uri) == "live://counter":
+                subscribers.add(mcp._mcp_server.request_context.session)
+
+        # The SDK advertises subscribe=False even with a handler registered
+        get_capabilities = mcp._mcp_server.get_capabilities
+
+        def with_subscribe(*args, **kwargs):
+            capabilities = get_capabilities(*args, **kwargs)
+            if capabilities.resources is not None:
+                capabilities.resources.subscribe = True
+            return capabilities
+
+        mcp._mcp_server.get_capabilities = with_subscribe
+
+    mcp.run(transport="stdio", show_banner=False)
+
+
+async def read_latencies(manager: MCPManager, server: str, reads: int, resources: int) -> dict:
+    latencies = []
+    for i in range(reads):
+        started = time.perf_counter()
+        await manager.get_resource(server, f"doc://bench/{i % resources}")
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+    }
+
+
+async def staleness_ms(manager: MCPManager, server: str, limit: float) -> float:
+    """Milliseconds from a bump until a cached read of the counter shows it"""
+    before = (await manager.get_resource(server, "live://counter")).text()
+    await manager.call_tool(server, "bump", {})
+    started = time.perf_counter()
+    while time.perf_counter() - started < limit:
+        if (await manager.get_resource(server, "live://counter")).text() != before:
+            return round((time.perf_counter() - started) * 1000, 1)
+        await asyncio.sleep(0.001)
+    return float("inf")
+
+
+async def main(args) -> dict:
+    script = shlex.quote(str(Path(__file__).resolve()))
+    command = f"stdio:{shlex.quote(sys.executable)} {script} --serve --resources {args.resources} --size {args.size}"
+    report = {"reads": args.reads, "resources": args.resources, "size": args.size, "ttl": args.ttl}
+
+    uncached = MCPManager(result_cache=None)
+    try:
+        await uncached.connect("plain", command)
+        report["uncached"] = await read_latencies(uncached, "plain", args.reads, args.resources)
+    finally:
+        await uncached.close()
+
+    manager = MCPManager(result_cache=None, resource_cache=ResourceCache(ttl=args.ttl))
+    try:
+        for name, extra in (("ttl", ""), ("push", " --subscribe")):
+            if not await manager.connect(name, command + extra):
+                raise RuntimeError(f"Could not start the {name} server: {manager.server_status().get(name)}")
+        started = time.perf_counter()
+        prefetched = await manager.prefetch("push")
+        report["prefetch"] = {
+            "resources": sum(prefetched.values()),
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        report["cached"] = await read_latencies(manager, "push", args.reads, args.resources)
+        report["update_visible_after_ms"] = {
+            "push": await staleness_ms(manager, "push", args.ttl * 4),
+            "ttl": await staleness_ms(manager, "ttl", args.ttl * 4),
+        }
+        report["cache"] = manager.resource_cache_stats()
+        return report
+    finally:
+        await manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--resources", type=int, default=50)
+    parser.add_argument("--size", type=int, default=4096, help="characters in each document")
+    parser.add_argument("--ttl", type=float, default=1.0, help="resource cache TTL in seconds")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--subscribe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.resources, args.size, args.subscribe)
+    else:
+        print(json.dumps(asyncio.run(main(args)), indent=2))
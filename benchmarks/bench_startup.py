@@ -0,0 +1,117 @@
+"""Cold start of server.py: import time and time until it serves and is ready.
+
+Measures the median time to `import server` in a fresh interpreter. It then
+starts server.py under uvicorn, with and without FAST_START, and reports for
+each mode how long after process start:
+
+- the first liveness request succeeds (/healthz)
+- readiness reports ready (/readyz)
+- the reachable MCP server shows as connected in /api/servers
+
+MCP_SERVERS lists mcp_server.py in process, plus a "stalled" server. The
+stalled server accepts TCP connections and never answers, as a hung replica
+would, so the startup probe waits out its timeout.
+
+    python benchmarks/bench_startup.py [--runs 3] [--imports 5] [--port 8096]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_ms(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import server; print((time.perf_counter() - t) * 1000)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+async def first_success(session: aiohttp.ClientSession, url: str, started: float, check=None,
+                        timeout: float = 60.0) -> Optional[float]:
+    """Milliseconds from started until url answers 200 (and check(body) holds), polling every 5 ms"""
+    while time.perf_counter() - started < timeout:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200 and (check is None or check(await response.json())):
+                    return round((time.perf_counter() - started) * 1000, 1)
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.005)
+    return None
+
+
+async def stalled_server() -> asyncio.AbstractServer:
+    """Accept connections and never respond"""
+    async def hold(reader, writer):
+        await reader.read()
+
+    return await asyncio.start_server(hold, "127.0.0.1", 0)
+
+
+async def start_once(port: int, env: dict) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=1)) as session:
+            live, ready, connected = await asyncio.gather(
+                first_success(session, f"{base_url}/healthz", started),
+                first_success(session, f"{base_url}/readyz", started),
+                first_success(
+                    session, f"{base_url}/api/servers", started,
+                    lambda body: body["details"].get("local", {}).get("state") == "connected",
+                ),
+            )
+        return {"live_ms": live, "ready_ms": ready, "connected_ms": connected}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def main(args) -> dict:
+    stalled = await stalled_server()
+    stalled_port = stalled.sockets[0].getsockname()[1]
+    env = dict(
+        os.environ,
+        ANTHROPIC_API_KEY=os.getenv("ANTHROPIC_API_KEY", "bench"),
+        MCP_SERVERS=f"local=python:mcp_server,stalled=http://127.0.0.1:{stalled_port}/mcp",
+    )
+    imports = [import_ms(env) for _ in range(args.imports)]
+    report = {"import_ms": round(statistics.median(imports), 1)}
+    try:
+        for mode, fast_start in (("standard", "false"), ("fast_start", "true")):
+            runs = [await start_once(args.port, dict(env, FAST_START=fast_start)) for _ in range(args.runs)]
+            report[mode] = {
+                key: statistics.median(run[key] for run in runs) if all(run[key] for run in runs) else None
+                for key in runs[0]
+            }
+            print(f"{mode:<11} {report[mode]}", file=sys.stderr)
+    finally:
+        stalled.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="server starts per mode")
+    parser.add_argument("--imports", type=int, default=5, help="fresh-interpreter imports to time")
+    parser.add_argument("--port", type=int, default=8096)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
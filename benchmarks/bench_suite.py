@@ -0,0 +1,270 @@
+"""End-to-end benchmark suite: real MCP servers, scripted mock model, server.py.
+
+Starts mcp_server.py, second_mcp_server.py and example_mcp_servers/file_mcp_server.py
+(ports 8000, 8002, 8003), a mock Anthropic API that answers with scripted tool
+calls, and server.py connected to all three servers. Then it drives each
+scenario at each concurrency level:
+
+- chat        /api/chat, plain answer (one model call)
+- chat_tools  /api/chat where the model calls one tool on every server in
+              parallel, then answers (two model calls, three MCP tool calls)
+- connect     /api/connect then /api/disconnect of a fresh server name
+
+and reports throughput, p50/p95/p99 latency and server RSS as JSON, so runs
+can be compared over time:
+
+    python benchmarks/bench_suite.py --concurrency 1 8 32 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import aiohttp
+
+from bench_chat_load import percentile, wait_until_up
+from mock_anthropic import make_message, start_mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MCP_SERVERS = {
+    "default_mcp": ("mcp_server.py", 8000),
+    "math": ("second_mcp_server.py", 8002),
+    "files": ("example_mcp_servers/file_mcp_server.py", 8003),
+}
+
+# Messages containing this marker get tool calls from the scripted model
+TOOLS_MARKER = "[use tools]"
+
+SCRIPTED_TOOL_CALLS = [
+    {"name": "default_mcp__echo", "input": {"message": "benchmark"}},
+    {"name": "math__fibonacci", "input": {"n": 30}},
+    {"name": "files__ls", "input": {"path": "."}},
+]
+
+
+def scripted_responder(body: dict) -> dict:
+    """First step of a tool turn calls SCRIPTED_TOOL_CALLS; every other step answers with text"""
+    model = body.get("model", "mock")
+    last = body["messages"][-1]
+    if isinstance(last["content"], str) and TOOLS_MARKER in last["content"]:
+        return make_message("Let me check.", model, SCRIPTED_TOOL_CALLS)
+    return make_message("This is a mock reply.", model)
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process, from /proc (Linux) or psutil when installed"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except psutil.Error:
+        return None
+
+
+class RssSampler:
+    """Tracks the peak RSS of a process while a scenario runs"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, rss_bytes(self.pid) or 0)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+        self.peak = max(self.peak, rss_bytes(self.pid) or 0)
+
+
+async def chat_request(session: aiohttp.ClientSession, base_url: str, i: int, tools: bool) -> bool:
+    message = f"hello {i} {TOOLS_MARKER}" if tools else f"hello {i}"
+    async with session.post(f"{base_url}/api/chat", json={"message": message}) as response:
+        await response.read()
+        return response.status == 200
+
+
+async def connect_request(session: aiohttp.ClientSession, base_url: str, i: int) -> bool:
+    name = f"bench_{i}"
+    url = f"http://127.0.0.1:{MCP_SERVERS['math'][1]}/mcp"
+    async with session.post(f"{base_url}/api/connect", json={"server_name": name, "server_url": url}) as response:
+        await response.read()
+        if response.status != 200:
+            return False
+    async with session.post(f"{base_url}/api/disconnect", json={"server_name": name}) as response:
+        await response.read()
+        return response.status == 200
+
+
+SCENARIOS = {
+    "chat": lambda session, base_url, i: chat_request(session, base_url, i, tools=False),
+    "chat_tools": lambda session, base_url, i: chat_request(session, base_url, i, tools=True),
+    "connect": connect_request,
+}
+
+
+async def run_level(session: aiohttp.ClientSession, base_url: str, scenario: str, concurrency: int, requests: int, pid: int) -> dict:
+    send = SCENARIOS[scenario]
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await send(session, base_url, i)
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    rss_before = rss_bytes(pid)
+    with RssSampler(pid) as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": ms(percentile(latencies, 50)) if latencies else None,
+        "p95_ms": ms(percentile(latencies, 95)) if latencies else None,
+        "p99_ms": ms(percentile(latencies, 99)) if latencies else None,
+        "mean_ms": ms(statistics.mean(latencies)) if latencies else None,
+        "rss_start_mb": round(rss_before / 2**20, 1) if rss_before else None,
+        "rss_peak_mb": round(sampler.peak / 2**20, 1) if sampler.peak else None,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_process(args: List[str], env: Optional[dict] = None, log: Optional[Path] = None) -> subprocess.Popen:
+    output = open(log, "w") if log else subprocess.DEVNULL
+    return subprocess.Popen([sys.executable, *args], cwd=REPO_ROOT, env=env, stdout=output, stderr=subprocess.STDOUT)
+
+
+async def main(args) -> dict:
+    # One access log line per mock model call would drown the progress lines
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+    processes = []
+    mock = await start_mock(port=args.mock_port, latency_ms=args.latency_ms, responder=scripted_responder)
+    try:
+        for name, (script, _) in MCP_SERVERS.items():
+            processes.append(start_process([script], log=args.log_dir / f"{name}.log" if args.log_dir else None))
+
+        results = []
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            for _, port in MCP_SERVERS.values():
+                await wait_until_up(session, f"http://127.0.0.1:{port}/mcp")
+
+            env = dict(os.environ)
+            env.update({
+                "ANTHROPIC_API_KEY": "mock-key",
+                "ANTHROPIC_BASE_URL": f"http://127.0.0.1:{args.mock_port}",
+                "MCP_SERVERS": ",".join(
+                    f"{name}=http://127.0.0.1:{port}/mcp" for name, (_, port) in MCP_SERVERS.items()
+                ),
+                # echo and fibonacci are marked cacheable and always get the same arguments here;
+                # without this every tool turn after the first would be served from the result cache
+                "TOOL_CACHE_TTLS": "*.echo=0,*.fibonacci=0",
+            })
+            server = start_process(
+                ["-m", "uvicorn", "server:app", "--port", str(args.port), "--log-level", "warning"],
+                env=env,
+                log=args.log_dir / "server.log" if args.log_dir else None,
+            )
+            processes.append(server)
+            base_url = f"http://127.0.0.1:{args.port}"
+            await wait_until_up(session, f"{base_url}/api/servers")
+
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    requests = max(args.requests, concurrency * 4)
+                    result = await run_level(session, base_url, scenario, concurrency, requests, server.pid)
+                    results.append(result)
+                    print(
+                        f"{scenario:<11} c={concurrency:>4}  n={requests:>5}  p50={result['p50_ms']}ms  "
+                        f"p95={result['p95_ms']}ms  p99={result['p99_ms']}ms  rps={result['throughput_rps']}  "
+                        f"rss={result['rss_peak_mb']}MB  errors={result['errors']}",
+                        file=sys.stderr,
+                    )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        await mock.cleanup()
+
+    return {
+        "run": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="mock model latency per call")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["chat", "chat_tools", "connect"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=50, help="minimum requests per level")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    parser.add_argument("--log-dir", type=Path, help="keep the servers' output in this directory")
+    args = parser.parse_args()
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
@@ -0,0 +1,113 @@
+"""Tool call extraction benchmark: the original regex parsing vs the streaming scanner.
+
+Builds long completions of prose (with stray braces) and N tool-call objects,
+then times the original approach (code-block regex, greedy regex, up to three
+json.loads attempts on the full text) against ToolCallExtractor fed in small
+token-sized chunks, and reports how many calls each one finds.
+
+The original parser can only run once the reply is complete; the scanner's cost
+is spread over the stream (scanner_us_per_chunk) and the first call can start
+at first_call_ready_pct of the way through it.
+
+    python benchmarks/bench_tool_call_parse.py [--sizes-kb 4 64 1024] [--calls 5]
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tool_call_scanner import ToolCallExtractor  # noqa: E402
+
+PROSE = (
+    "The results so far look reasonable, although the {placeholder} values need checking. "
+    "Next I will look at the remaining items and compare them with what we found earlier. "
+)
+
+
+def legacy_extract(response_text: str) -> list:
+    """The parsing the chat endpoint used before native tool use: at most one call per reply"""
+    try:
+        code_block_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', response_text)
+        if code_block_match:
+            tool_call = json.loads(code_block_match.group(1))
+        else:
+            json_match = re.search(r'(\{[\s\S]*\})', response_text)
+            if json_match:
+                tool_call = json.loads(json_match.group(1))
+            else:
+                tool_call = json.loads(response_text)
+    except ValueError:
+        return []
+    if isinstance(tool_call, dict) and "tool" in tool_call and "parameters" in tool_call:
+        return [tool_call]
+    return []
+
+
+def streaming_extract(chunks: list) -> list:
+    extractor = ToolCallExtractor()
+    calls = []
+    for chunk in chunks:
+        calls.extend(extractor.feed(chunk))
+    return calls + extractor.finish()
+
+
+def first_call_ready_pct(chunks: list) -> float:
+    extractor = ToolCallExtractor()
+    for index, chunk in enumerate(chunks):
+        if extractor.feed(chunk):
+            return round(100 * (index + 1) / len(chunks), 1)
+    return 100.0
+
+
+def completion(size: int, calls: int, rng: random.Random) -> str:
+    prose = (PROSE * (size // len(PROSE) + 1))[:size]
+    positions = sorted(rng.randrange(len(prose)) for _ in range(calls))
+    pieces, last = [], 0
+    for number, position in enumerate(positions):
+        call = {"tool": "math.fibonacci", "parameters": {"n": number, "note": "braces {} and \"quotes\""}}
+        pieces += [prose[last:position], " ", json.dumps(call), " "]
+        last = position
+    pieces.append(prose[last:])
+    return "".join(pieces)
+
+
+def best_of(repeat: int, fn, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(args) -> list:
+    rng = random.Random(3)
+    rows = []
+    for size_kb in args.sizes_kb:
+        text = completion(int(size_kb * 1024), args.calls, rng)
+        # Model tokens are a few characters long
+        chunks = [text[i:i + 4] for i in range(0, len(text), 4)]
+        rows.append({
+            "size_kb": size_kb,
+            "calls_in_text": args.calls,
+            "legacy_found": len(legacy_extract(text)),
+            "scanner_found": len(streaming_extract(chunks)),
+            "legacy_ms": round(best_of(args.repeat, legacy_extract, text) * 1000, 3),
+            "scanner_ms": round(best_of(args.repeat, streaming_extract, chunks) * 1000, 3),
+            "scanner_us_per_chunk": round(best_of(args.repeat, streaming_extract, chunks) * 1e6 / len(chunks), 3),
+            "first_call_ready_pct": first_call_ready_pct(chunks),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-kb", type=float, nargs="+", default=[4, 64, 1024])
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,105 @@
+"""Tool selection benchmark for the BM25 tool index.
+
+Builds an index of synthetic MCP tools (10k by default, spread over 100
+servers), then measures full build time, incremental reindexing of one server
+and per-turn top-K selection latency.
+
+    python benchmarks/bench_tool_index.py [--tools 10000] [--servers 100] [--top-k 20]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tool_index import ToolIndex  # noqa: E402
+
+VERBS = "get list create update delete search count compute convert send fetch read write render parse".split()
+NOUNS = (
+    "file directory user order invoice email message ticket issue commit branch image report chart "
+    "table row column metric alert log trace span weather stock price currency calendar event note "
+    "task project document page comment review payment customer product inventory shipment"
+).split()
+ADJECTIVES = "recent open closed large small daily monthly remote local shared private public".split()
+
+
+def synthetic_tool(rng: random.Random, index: int) -> SimpleNamespace:
+    verb, noun, other = rng.choice(VERBS), rng.choice(NOUNS), rng.choice(NOUNS)
+    return SimpleNamespace(
+        name=f"{verb}_{noun}_{index}",
+        description=f"{verb.capitalize()} {rng.choice(ADJECTIVES)} {noun} records for a given {other}",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                f"{other}_id": {"type": "string", "description": f"Identifier of the {other}"},
+                "limit": {"type": "integer", "description": "Maximum number of results"},
+            },
+        },
+    )
+
+
+def build_catalogs(tools: int, servers: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    catalogs = {f"server_{s}": {} for s in range(servers)}
+    for i in range(tools):
+        server = f"server_{i % servers}"
+        tool = synthetic_tool(rng, i)
+        catalogs[server][f"{server}__{tool.name}"] = tool
+    return catalogs
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def main(args) -> dict:
+    catalogs = build_catalogs(args.tools, args.servers)
+    index = ToolIndex()
+
+    started = time.perf_counter()
+    for server, tools in catalogs.items():
+        index.update_server(server, tools)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Incremental update: one server reconnects with a fresh catalog
+    started = time.perf_counter()
+    index.update_server("server_0", catalogs["server_0"])
+    update_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(11)
+    queries = [
+        f"{rng.choice(VERBS)} the {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} for my {rng.choice(NOUNS)}"
+        for _ in range(args.queries)
+    ]
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, args.top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "tools": len(index),
+        "servers": args.servers,
+        "top_k": args.top_k,
+        "build_ms": round(build_ms, 2),
+        "server_update_ms": round(update_ms, 3),
+        "search_p50_ms": round(percentile(latencies, 50), 3),
+        "search_p99_ms": round(percentile(latencies, 99), 3),
+        "search_mean_ms": round(statistics.mean(latencies), 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tools", type=int, default=10000)
+    parser.add_argument("--servers", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(main(args), indent=2))
@@ -0,0 +1,56 @@
+"""Memory benchmark for the tool result pipeline.
+
+Feeds text and image content of growing size through the original handling
+(str() of the whole result, as the chat loop did) and through ResultBuilder,
+and reports the peak memory each allocates on top of the content it was given.
+
+    python benchmarks/bench_tool_results.py [--sizes-mb 1 8 32] [--max-chars 100000]
+"""
+import argparse
+import base64
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+from mcp.types import ImageContent, TextContent
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tool_results import BlobStore, ResultBuilder  # noqa: E402
+
+
+def peak_bytes(fn) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - base
+
+
+def main(args) -> list:
+    rows = []
+    for size_mb in args.sizes_mb:
+        size = int(size_mb * 1024 * 1024)
+        cases = {
+            "text": [TextContent(type="text", text="x" * size)],
+            "image": [ImageContent(type="image", data=base64.b64encode(b"\0" * size).decode(), mimeType="image/png")],
+        }
+        for kind, content in cases.items():
+            builder = ResultBuilder(BlobStore(max_bytes=4 * size), args.max_chars)
+            rows.append({
+                "kind": kind,
+                "size_mb": size_mb,
+                "legacy_peak_mb": round(peak_bytes(lambda: str(content)) / 2**20, 2),
+                "pipeline_peak_mb": round(peak_bytes(lambda: builder.build(content).text()) / 2**20, 2),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-chars", type=int, default=100_000)
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,102 @@
+"""Per-call latency of the three MCP transports MCPManager supports.
+
+Connects one MCPManager to mcp_server.py three ways: over streamable HTTP
+(started as a subprocess on --http-port), in process ("python:mcp_server")
+and as a stdio subprocess ("stdio:python mcp_server.py --stdio"). Then it
+calls the echo tool sequentially and with --concurrency callers per
+transport, and reports handshake time, p50/p99 latency and throughput.
+
+    python benchmarks/bench_transports.py [--calls 500] [--concurrency 16] [--payload 64]
+"""
+import argparse
+import asyncio
+import json
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+from bench_chat_load import percentile, wait_until_up
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from mcp_client import MCPManager  # noqa: E402
+
+
+def addresses(http_port: int) -> dict:
+    script = shlex.quote(str(REPO_ROOT / "mcp_server.py"))
+    return {
+        "http": f"http://127.0.0.1:{http_port}/mcp",
+        "python": "python:mcp_server",
+        "stdio": f"stdio:python {script} --stdio",
+    }
+
+
+async def measure(manager: MCPManager, server: str, calls: int, concurrency: int, message: str) -> dict:
+    # Warm up the session before timing
+    for _ in range(10):
+        await manager.call_tool(server, "echo", {"message": message})
+
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await manager.call_tool(server, "echo", {"message": message})
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    remaining = iter(range(calls))
+
+    async def worker():
+        for _ in remaining:
+            await manager.call_tool(server, "echo", {"message": message})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "handshake_ms": manager.server_status()[server]["handshake_ms"],
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        f"throughput_c{concurrency}_rps": round(calls / elapsed, 1),
+    }
+
+
+async def main(args) -> dict:
+    http_server = subprocess.Popen(
+        [sys.executable, "mcp_server.py"], cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # No result cache: echo is deterministic and would otherwise never reach the transport
+    manager = MCPManager(result_cache=None, max_in_flight=args.concurrency, max_queue=args.concurrency)
+    try:
+        async with aiohttp.ClientSession() as session:
+            await wait_until_up(session, addresses(args.http_port)["http"])
+        message = "x" * args.payload
+        report = {"calls": args.calls, "concurrency": args.concurrency, "payload_chars": args.payload}
+        for name, address in addresses(args.http_port).items():
+            if not await manager.connect(name, address):
+                raise RuntimeError(f"Could not connect over {name}: {manager.server_status().get(name)}")
+            report[name] = await measure(manager, name, args.calls, args.concurrency, message)
+            print(f"{name:<7} {report[name]}", file=sys.stderr)
+        return report
+    finally:
+        await manager.close()
+        http_server.terminate()
+        try:
+            http_server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            http_server.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--payload", type=int, default=64, help="characters in each echo message")
+    parser.add_argument("--http-port", type=int, default=8000, help="port mcp_server.py listens on")
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
@@ -0,0 +1,145 @@
+"""Minimal Anthropic Messages API stand-in for local benchmarks.
+
+Serves POST /v1/messages with a canned assistant reply after a configurable
+delay, so chat-path benchmarks measure our own overhead instead of the model.
+Streaming requests ("stream": true) get the reply as SSE text deltas, with the
+latency split into time-to-first-token and a per-token delay.
+
+    python benchmarks/mock_anthropic.py --port 9100 --latency-ms 500
+"""
+import argparse
+import asyncio
+import json
+import logging
+import uuid
+from typing import Callable, List, Optional
+
+from aiohttp import web
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def make_message(text: str, model: str, tool_uses: Optional[List[dict]] = None) -> dict:
+    """Build a Messages API response body; tool_uses is a list of {"name": ..., "input": ...}"""
+    content = [{"type": "text", "text": text}] if text else []
+    for tool_use in tool_uses or []:
+        content.append({
+            "type": "tool_use",
+            "id": f"toolu_{uuid.uuid4().hex[:24]}",
+            "name": tool_use["name"],
+            "input": tool_use["input"],
+        })
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": content,
+        "stop_reason": "tool_use" if tool_uses else "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": len(text.split())},
+    }
+
+
+def sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def stream_message(request: web.Request, message: dict, ttft_ms: float, token_ms: float) -> web.StreamResponse:
+    """Replay a complete message as the Messages API streaming event sequence"""
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    await asyncio.sleep(ttft_ms / 1000)
+
+    start = dict(message, content=[], stop_reason=None)
+    await response.write(sse("message_start", {"type": "message_start", "message": start}))
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "tool_use":
+            await response.write(sse("content_block_start", {
+                "type": "content_block_start", "index": index, "content_block": dict(block, input={}),
+            }))
+            await response.write(sse("content_block_delta", {
+                "type": "content_block_delta",
+                "index": index,
+                "delta": {"type": "input_json_delta", "partial_json": json.dumps(block["input"])},
+            }))
+            await response.write(sse("content_block_stop", {"type": "content_block_stop", "index": index}))
+            continue
+
+        text = block["text"]
+        await response.write(sse("content_block_start", {
+            "type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""},
+        }))
+        for position, token in enumerate(text.split(" ")):
+            await asyncio.sleep(token_ms / 1000)
+            delta = token if position == 0 else " " + token
+            await response.write(sse("content_block_delta", {
+                "type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": delta},
+            }))
+        await response.write(sse("content_block_stop", {"type": "content_block_stop", "index": index}))
+    await response.write(sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+        "usage": {"output_tokens": message["usage"]["output_tokens"]},
+    }))
+    await response.write(sse("message_stop", {"type": "message_stop"}))
+    await response.write_eof()
+    return response
+
+
+def create_app(
+    latency_ms: float = 500.0,
+    reply: str = "This is a mock reply.",
+    ttft_ms: Optional[float] = None,
+    responder: Optional[Callable[[dict], dict]] = None,
+) -> web.Application:
+    """Build the mock API; responder(request_body) may return a custom message instead of the canned reply"""
+    # Streaming replies spend ttft_ms before the first token and spread the rest over the tokens
+    ttft_ms = min(latency_ms, 200.0) if ttft_ms is None else ttft_ms
+    token_ms = max(0.0, latency_ms - ttft_ms) / max(1, len(reply.split(" ")))
+
+    async def messages(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        if responder is not None:
+            message = responder(body)
+        else:
+            message = make_message(reply, body.get("model", "mock"))
+        if body.get("stream"):
+            return await stream_message(request, message, ttft_ms, token_ms)
+        await asyncio.sleep(latency_ms / 1000)
+        return web.json_response(message)
+
+    app = web.Application()
+    app["stats"] = {"requests": 0}
+
+    @web.middleware
+    async def count_requests(request, handler):
+        app["stats"]["requests"] += 1
+        return await handler(request)
+
+    app.middlewares.append(count_requests)
+    app.router.add_post("/v1/messages", messages)
+    return app
+
+
+async def start_mock(host: str = "127.0.0.1", port: int = 9100, **kwargs) -> web.AppRunner:
+    """Start the mock server inside the running event loop; call runner.cleanup() to stop it"""
+    runner = web.AppRunner(create_app(**kwargs))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Mock Anthropic API listening on http://{host}:{port}")
+    return runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--ttft-ms", type=float, default=None, help="time to first token when streaming")
+    args = parser.parse_args()
+    web.run_app(create_app(latency_ms=args.latency_ms, ttft_ms=args.ttft_ms), host=args.host, port=args.port)
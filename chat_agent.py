@@ -0,0 +1,483 @@
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from mcp_client import MCPManager
+from metrics import span
+from sessions import ChatSession
+from tool_call_scanner import ToolCallExtractor
+from tool_index import ToolIndex
+from tool_results import ToolResult
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """You are a helpful AI assistant with access to tools provided by the connected MCP servers.
+Use them whenever they help answer the user. When several tool calls are independent of each other,
+request them together in the same turn so they can run in parallel."""
+
+# Appended when text tool calls are accepted, for models or gateways without native tool use
+TEXT_TOOL_CALLS_PROMPT = """If you cannot use tools natively, write each call as a JSON object on its own:
+{"tool": "server_name.tool_name", "parameters": {...}}"""
+
+# Anthropic tool names must match ^[a-zA-Z0-9_-]{1,64}$
+_INVALID_TOOL_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+def api_tool_name(server_name: str, tool_name: str) -> str:
+    """Name under which a server's tool is exposed to the model"""
+    return _INVALID_TOOL_NAME_CHARS.sub("_", f"{server_name}__{tool_name}")[:64]
+
+
+def unique_tool_names(catalogs: List[Tuple[str, list]]) -> Dict[Tuple[str, str], str]:
+    """API name of every (server, tool), suffixed where sanitizing or truncating makes two collide.
+
+    "a.b" + "t" and "a_b" + "t" both sanitize to "a_b__t"; the tool listed
+    first keeps that name and the other becomes "a_b__t_2".
+    """
+    names: Dict[Tuple[str, str], str] = {}
+    taken = set()
+    for server_name, tools in catalogs:
+        for tool in tools:
+            name = base = api_tool_name(server_name, tool.name)
+            number = 2
+            while name in taken:
+                suffix = f"_{number}"
+                name = base[: 64 - len(suffix)] + suffix
+                number += 1
+            taken.add(name)
+            names[(server_name, tool.name)] = name
+    return names
+
+
+def compact_schema(schema: Any) -> Any:
+    """Drop documentation-only "title" keywords (pydantic adds one to every field) from a JSON Schema"""
+    if isinstance(schema, list):
+        return [compact_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    compacted = {}
+    for key, value in schema.items():
+        if key == "title":
+            continue
+        if key in ("properties", "patternProperties", "$defs", "definitions") and isinstance(value, dict):
+            # Keys here are property names, not keywords, so a property called "title" survives
+            compacted[key] = {name: compact_schema(subschema) for name, subschema in value.items()}
+        else:
+            compacted[key] = compact_schema(value)
+    return compacted
+
+
+def tool_definition(server_name: str, tool: Any, name: Optional[str] = None) -> dict:
+    """Compact API tool definition for one MCP tool; name overrides the default API name"""
+    definition = {
+        "name": name or api_tool_name(server_name, tool.name),
+        "input_schema": compact_schema(tool.inputSchema),
+    }
+    if tool.description:
+        definition["description"] = " ".join(tool.description.split())
+    return definition
+
+
+def text_tool_results(tool_uses: List[Any], outcomes: Dict[str, Tuple[str, Optional[str]]]) -> List[dict]:
+    """Feed the outcomes of tool calls written as text back to the model, as one text block per call.
+
+    A list rather than a plain string, so the session history can tell tool
+    output from a user's question when it splits and trims turns.
+    """
+    blocks = []
+    for tool_use in tool_uses:
+        result_text, error = outcomes[tool_use.id]
+        body = f"Error: {error}" if error is not None else result_text or "(no output)"
+        blocks.append({"type": "text", "text": f"Result of {tool_use.name}:\n{body}"})
+    return blocks
+
+
+def tool_result_block(tool_use_id: str, result_text: str, error: Optional[str]) -> dict:
+    """Build the tool_result block that feeds a tool's outcome back to the model"""
+    if error is not None:
+        return {"type": "tool_result", "tool_use_id": tool_use_id, "content": error, "is_error": True}
+    return {"type": "tool_result", "tool_use_id": tool_use_id, "content": result_text or "(no output)"}
+
+
+class ModelBusyError(Exception):
+    """Raised when no model slot frees up before the turn's deadline"""
+
+
+class ChatAgent:
+    """Runs one chat turn as a native tool-use loop against the model and the MCP servers.
+
+    Each step sends the conversation plus the tool catalog to the model. If the model
+    answers with tool_use blocks, they are executed concurrently, their results are fed
+    back as tool_result blocks and the loop continues, up to max_steps steps or until
+    the per-turn deadline passes.
+
+    The deadline is a budget shared by all stages: waiting for a model slot and the
+    model call get whatever remains of it, and tool calls get tool_budget_share of
+    the remainder when they start, so a slow or overloaded server fails its call in
+    time for the model to answer with the error. Cancelling the task that iterates
+    run() closes the model stream and cancels the tool calls, which tell their
+    servers to stop.
+
+    Tool calls start executing as soon as their tool_use block is complete in the
+    stream, not when the whole reply has arrived. With text_tool_calls, JSON tool
+    call objects written in the reply text are picked up the same way.
+
+    run() yields events as the turn progresses so callers can either stream them
+    to the browser or collect them into a single response:
+
+    - {"type": "token", "step": ..., "text": ...}   model text as it arrives
+    - {"type": "tool_start", "tool": ..., "parameters": ...}
+    - {"type": "tool_result", "tool": ..., "chunk": ...}
+    - {"type": "tool_end", "tool": ..., "duration_ms": ..., "error": ..., "attachments": [...]}
+    - {"type": "done", "response": ..., "session_id": ...}   final answer for non-streaming callers
+    """
+
+    def __init__(
+        self,
+        manager: MCPManager,
+        anthropic: Any,
+        semaphore: asyncio.Semaphore,
+        model: str = "claude-3-7-sonnet-20250219",
+        max_tokens: int = 1024,
+        tool_result_chunk_size: int = 4096,
+        max_steps: int = 8,
+        turn_deadline: float = 120.0,
+        prompt_caching: bool = True,
+        tool_top_k: int = 0,
+        text_tool_calls: bool = False,
+        tool_budget_share: float = 0.5,
+    ):
+        self.manager = manager
+        self.anthropic = anthropic
+        self.semaphore = semaphore
+        self.model = model
+        self.max_tokens = max_tokens
+        self.tool_result_chunk_size = tool_result_chunk_size
+        self.max_steps = max_steps
+        self.turn_deadline = turn_deadline
+        self.tool_budget_share = tool_budget_share
+        self.prompt_caching = prompt_caching
+        # With more than tool_top_k tools, only the most relevant ones (plus pinned ones) are sent; 0 sends all
+        self.tool_top_k = tool_top_k
+        self.tool_index = ToolIndex()
+        self.text_tool_calls = text_tool_calls
+        self.system_prompt = f"{SYSTEM_PROMPT}\n\n{TEXT_TOOL_CALLS_PROMPT}" if text_tool_calls else SYSTEM_PROMPT
+        # Catalog version and API names each server's tools were indexed under
+        self._indexed_versions: Dict[str, tuple] = {}
+        # API name of every (server, tool) in the current tool section
+        self._tool_names: Dict[Tuple[str, str], str] = {}
+        # Tool section of the prompt, rebuilt only when some server's catalog version changes
+        self._tool_section: Optional[Tuple[tuple, List[dict], Dict[str, Tuple[str, str]]]] = None
+
+    async def collect_tools(self) -> Tuple[List[dict], Dict[str, Tuple[str, str]]]:
+        """Gather the (cached) tool catalog of every connected server.
+
+        Returns the tool definitions for the API and a map from API tool name
+        back to (server_name, tool_name). The definitions are built once per
+        catalog version and reused verbatim, so the prompt prefix stays
+        byte-identical between turns and the provider's prompt cache can hit.
+        """
+        catalogs = []
+        with span("catalog_fetch"):
+            for server_name in self.manager.connected_servers():
+                if self.manager.is_connected(server_name):
+                    try:
+                        tools = await self.manager.list_tools(server_name)
+                        catalogs.append((server_name, tools))
+                    except Exception as e:
+                        logger.error(f"Error getting tools from server {server_name}: {e}")
+
+        versions = self.manager.catalog_versions()
+        key = tuple((server_name, versions.get(server_name)) for server_name, _ in catalogs)
+        if self._tool_section is not None and self._tool_section[0] == key:
+            return self._tool_section[1], self._tool_section[2]
+
+        all_tools = []
+        routes = {}
+        with span("prompt_build"):
+            self._tool_names = unique_tool_names(catalogs)
+            for server_name, tools in catalogs:
+                logger.debug(f"Found {len(tools)} tools on server {server_name}")
+                for tool in tools:
+                    definition = tool_definition(server_name, tool, self._tool_names[(server_name, tool.name)])
+                    logger.debug(f"Adding tool: {definition['name']}")
+                    all_tools.append(definition)
+                    routes[definition["name"]] = (server_name, tool.name)
+            self._update_index(catalogs, versions)
+
+        logger.info(f"Total tools available: {len(all_tools)}")
+        self._tool_section = (key, all_tools, routes)
+        return all_tools, routes
+
+    def _update_index(self, catalogs: List[Tuple[str, list]], versions: Dict[str, int]) -> None:
+        """Reindex only the servers whose catalog or API names changed, connected or went away"""
+        names = {
+            server_name: {self._tool_names[(server_name, tool.name)]: tool for tool in tools}
+            for server_name, tools in catalogs
+        }
+        # A suffix can move when another server connects or goes away, so the names are part of the key
+        current = {
+            server_name: (versions.get(server_name), tuple(names[server_name]))
+            for server_name, _ in catalogs
+        }
+        changed = [
+            server_name for server_name, _ in catalogs
+            if self._indexed_versions.get(server_name) != current[server_name]
+        ]
+        # Remove every changed server before adding any back: documents are keyed by API name, and
+        # two servers that swapped a suffixed name would otherwise delete each other's new documents
+        for server_name in (set(self._indexed_versions) - set(current)) | set(changed):
+            self.tool_index.remove_server(server_name)
+        for server_name in changed:
+            self.tool_index.update_server(server_name, names[server_name])
+        self._indexed_versions = current
+
+    def select_tools(self, tools: List[dict], query: str, pinned: Iterable[str] = ()) -> List[dict]:
+        """Pick the tools to send for this turn: the top-K matches for the query plus pinned tools.
+
+        The selection keeps catalog order, and the prompt cache breakpoint goes on
+        the last selected tool, so turns that select the same tools share a cached prefix.
+        """
+        if self.tool_top_k and len(tools) > self.tool_top_k:
+            wanted = {name for name, _ in self.tool_index.search(query, self.tool_top_k)}
+            wanted.update(pinned)
+            tools = [tool for tool in tools if tool["name"] in wanted]
+            logger.debug(f"Selected {len(tools)} relevant tools for this turn")
+        if tools and self.prompt_caching:
+            # Cache breakpoint after the last tool: the whole tool section becomes a cacheable prefix
+            tools = tools[:-1] + [dict(tools[-1], cache_control={"type": "ephemeral"})]
+        return tools
+
+    @asynccontextmanager
+    async def _model_slot(self, timeout: float):
+        """Hold one of the semaphore's model call slots, waiting at most timeout seconds for it"""
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), max(timeout, 0.0))
+        except asyncio.TimeoutError:
+            raise ModelBusyError("No model slot became free before the deadline") from None
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+    def _start_tool(self, tool_use: Any, routes: Dict[str, Tuple[str, str]], deadline: float) -> asyncio.Task:
+        """Start one tool call with its share of the remaining budget, leaving the rest to the model"""
+        timeout = max(deadline - time.monotonic(), 0.0) * self.tool_budget_share
+        return asyncio.create_task(self._execute(tool_use, routes, timeout))
+
+    async def _execute(
+        self, tool_use: Any, routes: Dict[str, Tuple[str, str]], timeout: Optional[float] = None
+    ) -> Tuple[Optional[ToolResult], Optional[str], float]:
+        """Run one tool_use block; returns (result, error, duration_ms)"""
+        started = time.perf_counter()
+        route = routes.get(tool_use.name)
+        if route is None:
+            return None, f"Unknown tool: {tool_use.name}", 0.0
+
+        server_name, tool_name = route
+        logger.debug(f"Executing tool call: {tool_name} on server {server_name}")
+        try:
+            result = await self.manager.call_tool(server_name, tool_name, tool_use.input, timeout=timeout)
+            return result, None, round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            logger.error(f"Tool call '{tool_use.name}' failed: {type(e).__name__} - {e}")
+            return None, f"{type(e).__name__}: {e}", round((time.perf_counter() - started) * 1000, 1)
+
+    def _text_tool_use(self, call: Dict[str, Any], number: int) -> Any:
+        """Give a tool call found in the reply text the shape of a tool_use block"""
+        name = call["tool"]
+        if "." in name:
+            name = self._api_name(*name.split(".", 1))
+        return SimpleNamespace(id=f"text_call_{number}", name=name, input=call["parameters"])
+
+    def _api_name(self, server_name: str, tool_name: str) -> str:
+        """API name of a server's tool in the current tool section"""
+        return self._tool_names.get((server_name, tool_name)) or api_tool_name(server_name, tool_name)
+
+    def _finish(self, session: Optional[ChatSession], messages: List[dict], response_text: str) -> Dict[str, Any]:
+        """Record the finished turn in the session and build the done event"""
+        if session is not None:
+            messages.append({"role": "assistant", "content": response_text or "(no response)"})
+            session.messages = messages
+        return {
+            "type": "done",
+            "response": response_text,
+            "session_id": session.session_id if session is not None else None,
+        }
+
+    async def run(
+        self,
+        message: str,
+        session: Optional[ChatSession] = None,
+        pinned_tools: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run one turn; with a session, earlier turns are sent as context and this turn is appended.
+
+        pinned_tools ("server.tool" or API tool names) are always offered to the model,
+        whatever the relevance ranking says. timeout shortens the turn's deadline budget
+        below turn_deadline.
+        """
+        budget = min(timeout, self.turn_deadline) if timeout else self.turn_deadline
+        deadline = time.monotonic() + budget
+        all_tools, routes = await self.collect_tools()
+        history = session.messages if session is not None else []
+        pinned = {
+            self._api_name(*name.split(".", 1)) if "." in name else name
+            for name in pinned_tools or []
+        }
+        # Tools already used in this conversation stay available for follow-up questions
+        pinned.update(
+            block["name"]
+            for past in history if isinstance(past["content"], list)
+            for block in past["content"] if block.get("type") == "tool_use"
+        )
+        with span("tool_select"):
+            tools = self.select_tools(all_tools, message, pinned)
+        messages: List[dict] = history + [{"role": "user", "content": message}]
+        response_text = ""
+
+        for step in range(self.max_steps):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Chat turn hit its {budget:g}s deadline after {step} steps")
+                yield self._finish(session, messages, response_text or "The request took too long and was stopped.")
+                return
+
+            # Stream the model's reply, forwarding tokens as they arrive
+            request = {
+                "model": self.model,
+                "max_tokens": self.max_tokens,
+                "system": self.system_prompt,
+                "messages": messages,
+            }
+            if tools:
+                request["tools"] = tools
+            # Each tool call starts as soon as its block (or text object) is complete, while the model keeps writing
+            tasks: Dict[asyncio.Task, Any] = {}
+            text_calls: List[Any] = []
+            extractor = ToolCallExtractor() if self.text_tool_calls else None
+            try:
+                with span("model_call", step=step):
+                    async with self._model_slot(remaining):
+                        # Time spent waiting for the slot comes out of the same budget
+                        request["timeout"] = max(deadline - time.monotonic(), 0.001)
+                        async with self.anthropic.messages.stream(**request) as stream:
+                            async for event in stream:
+                                if event.type == "text":
+                                    yield {"type": "token", "step": step, "text": event.text}
+                                    started = extractor.feed(event.text) if extractor is not None else []
+                                elif event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                                    started = [event.content_block]
+                                else:
+                                    continue
+                                for tool_use in started:
+                                    if isinstance(tool_use, dict):
+                                        tool_use = self._text_tool_use(tool_use, len(text_calls))
+                                        text_calls.append(tool_use)
+                                    yield {"type": "tool_start", "tool": tool_use.name, "parameters": tool_use.input}
+                                    tasks[self._start_tool(tool_use, routes, deadline)] = tool_use
+                            response = await stream.get_final_message()
+
+                with span("tool_call_parse"):
+                    response_text = "".join(block.text for block in response.content if block.type == "text").strip()
+                    tool_uses = [block for block in response.content if block.type == "tool_use"]
+                    if extractor is not None and not tool_uses:
+                        for call in extractor.finish():
+                            tool_use = self._text_tool_use(call, len(text_calls))
+                            text_calls.append(tool_use)
+                            yield {"type": "tool_start", "tool": tool_use.name, "parameters": tool_use.input}
+                            tasks[self._start_tool(tool_use, routes, deadline)] = tool_use
+                if tool_uses:
+                    # Native tool use wins; calls spotted in the text were only examples
+                    for task, tool_use in list(tasks.items()):
+                        if tool_use in text_calls:
+                            task.cancel()
+                            del tasks[task]
+                            # Close the tool_start the UI already shows
+                            yield {
+                                "type": "tool_end",
+                                "tool": tool_use.name,
+                                "duration_ms": None,
+                                "error": "Cancelled: the model made native tool calls instead",
+                                "attachments": [],
+                            }
+                    text_calls = []
+                elif text_calls:
+                    tool_uses = text_calls
+                if not tool_uses or (response.stop_reason != "tool_use" and not text_calls):
+                    yield self._finish(session, messages, response_text)
+                    return
+
+                if text_calls:
+                    messages.append({"role": "assistant", "content": response_text})
+                else:
+                    messages.append({"role": "assistant", "content": [
+                        {"type": "text", "text": block.text} if block.type == "text"
+                        else {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+                        for block in response.content
+                        if block.type in ("text", "tool_use")
+                    ]})
+
+                # Independent tool calls from the same step run concurrently
+                outcomes: Dict[str, Tuple[str, Optional[str]]] = {}
+                pending = set(tasks)
+                while pending:
+                    timeout = deadline - time.monotonic()
+                    done, pending = await asyncio.wait(
+                        pending, timeout=max(0.0, timeout), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        tool_use = tasks[task]
+                        result, error, duration_ms = task.result()
+                        result_text = result.text() if result is not None else ""
+                        outcomes[tool_use.id] = (result_text, error)
+                        # Large results go out in chunks so the browser can render them progressively
+                        for offset in range(0, len(result_text), self.tool_result_chunk_size):
+                            yield {
+                                "type": "tool_result",
+                                "tool": tool_use.name,
+                                "chunk": result_text[offset:offset + self.tool_result_chunk_size],
+                            }
+                        yield {
+                            "type": "tool_end",
+                            "tool": tool_use.name,
+                            "duration_ms": duration_ms,
+                            "error": error,
+                            "attachments": result.attachments() if result is not None else [],
+                        }
+            except ModelBusyError:
+                logger.warning(f"Chat turn gave up waiting for a model slot after {step} steps")
+                yield self._finish(session, messages, response_text or "The service is busy; please try again.")
+                return
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+            for tool_use in tool_uses:
+                if tool_use.id not in outcomes:
+                    outcomes[tool_use.id] = ("", "Tool call exceeded the turn deadline")
+                    yield {
+                        "type": "tool_end",
+                        "tool": tool_use.name,
+                        "duration_ms": None,
+                        "error": outcomes[tool_use.id][1],
+                        "attachments": [],
+                    }
+
+            if text_calls:
+                messages.append({"role": "user", "content": text_tool_results(tool_uses, outcomes)})
+            else:
+                messages.append({"role": "user", "content": [
+                    tool_result_block(tool_use.id, *outcomes[tool_use.id]) for tool_use in tool_uses
+                ]})
+
+        logger.warning(f"Chat turn stopped after reaching the {self.max_steps}-step limit")
+        yield self._finish(session, messages, response_text or "Stopped after reaching the tool step limit.")
@@ -1,7 +1,15 @@
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
+import bisect
+import fnmatch
 import logging
+import mmap
 import os
-from pathlib import Path
+import re
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -10,83 +18,349 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Results depend on the session's directory and on the disk, so they are read-only but not cacheable
+READ_ONLY = {"readOnlyHint": True, "openWorldHint": False}
+# cd changes what later calls of the session see, though nothing on disk
+SESSION_STATE = {"readOnlyHint": False, "destructiveHint": False, "idempotentHint": True, "openWorldHint": False}
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+DEFAULT_READ_BYTES = 64 * 1024
+MAX_READ_BYTES = 1024 * 1024
+MAX_GREP_FILE_BYTES = int(os.getenv("FILE_SERVER_MAX_GREP_FILE_BYTES", str(256 * 1024 * 1024)))
+LISTING_CACHE_SIZE = int(os.getenv("FILE_SERVER_LISTING_CACHE_SIZE", "256"))
+
 # Create an MCP server
 mcp = FastMCP(
     "File System Tools Server",
-    description="A server providing file system navigation tools",
-    version="1.0.0"
+    instructions="A server providing file system navigation, search and read tools",
+    version="1.1.0"
 )
 
-# Keep track of current directory
-current_dir = os.getcwd()
+# Directory new sessions start in
+start_dir = os.getcwd()
+
+# Working directory per MCP session; entries go away with their session. A client that
+# spreads calls over several sessions (MCPManager with MCP_POOL_SIZE > 1) must use a pool
+# of one session for this server, or relative paths resolve against an unrelated directory
+_session_dirs: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+class ListingCache:
+    """LRU cache of sorted directory listings, invalidated by the directory's mtime.
+
+    Adding, removing or renaming an entry updates the directory's mtime, so a
+    listing is reused only while that mtime is unchanged. Each listing keeps
+    the names sorted, which lets pages start after a cursor name with bisect.
+    """
+
+    def __init__(self, max_entries: int = LISTING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, List[str], List[bool]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Tuple[List[str], List[bool]]:
+        """Sorted names and matching is-directory flags for the directory at path"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached[0] == mtime_ns:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return cached[1], cached[2]
+        self.misses += 1
+        names, is_dir = scan_directory(path)
+        with self._lock:
+            self._entries[path] = (mtime_ns, names, is_dir)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return names, is_dir
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+listing_cache = ListingCache()
+
+
+def scan_directory(path: str) -> Tuple[List[str], List[bool]]:
+    """Read a directory with one scandir pass; file types come from the entries, not extra stats"""
+    with os.scandir(path) as it:
+        entries = sorted((entry.name, entry.is_dir()) for entry in it)
+    return [name for name, _ in entries], [flag for _, flag in entries]
+
+
+def list_page(path: str, cursor: str = "", limit: int = DEFAULT_PAGE_SIZE,
+              details: bool = False, cache: Optional[ListingCache] = listing_cache) -> Tuple[List[str], Optional[str]]:
+    """One page of a directory listing as formatted lines, plus the cursor of the next page.
+
+    The cursor is the last name of the previous page, so pages stay consistent
+    when entries are added or removed between calls.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    names, is_dir = cache.get(path) if cache is not None else scan_directory(path)
+    start = bisect.bisect_right(names, cursor) if cursor else 0
+    end = min(start + limit, len(names))
+    lines = []
+    for i in range(start, end):
+        name = names[i]
+        line = f"📁 {name}/" if is_dir[i] else f"📄 {name}"
+        if details:
+            try:
+                st = os.stat(os.path.join(path, name), follow_symlinks=False)
+                line += f"\t{st.st_size}\t{int(st.st_mtime)}"
+            except OSError:
+                line += "\t?\t?"
+        lines.append(line)
+    next_cursor = names[end - 1] if end < len(names) else None
+    return lines, next_cursor
+
+
+def walk_files(root: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield (relative path, entry) for everything under root, depth first, without following symlinks"""
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel = prefix + entry.name
+            yield rel, entry
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append((entry.path, rel + "/"))
+        stack.extend(reversed(subdirs))
+
+
+def find_paths(root: str, pattern: str, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[str], bool]:
+    """Relative paths under root whose name matches a glob pattern; stops after limit matches"""
+    matcher = re.compile(fnmatch.translate(pattern)).match
+    matches = []
+    for rel, entry in walk_files(root):
+        if matcher(entry.name):
+            if len(matches) >= limit:
+                return matches, True
+            matches.append(rel + "/" if entry.is_dir(follow_symlinks=False) else rel)
+    return matches, False
+
+
+def grep_files(root: str, pattern: str, glob: str = "*",
+               limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[str], bool]:
+    """Lines matching a regex in files under root (or in root itself when it is a file).
+
+    Files are searched through mmap, so only the pages around matches are read
+    into memory and no file is decoded as a whole. The pattern is matched
+    against the raw UTF-8 bytes in multiline mode, so '.' matches one byte and
+    '^'/'$' anchor at line boundaries. Files with a NUL byte in their first
+    8 KB are treated as binary and skipped.
+    """
+    regex = re.compile(pattern.encode(), re.MULTILINE)
+    name_matcher = re.compile(fnmatch.translate(glob)).match
+    if os.path.isfile(root):
+        files = [(os.path.basename(root), root)]
+    else:
+        files = (
+            (rel, entry.path) for rel, entry in walk_files(root)
+            if entry.is_file(follow_symlinks=False) and name_matcher(entry.name)
+        )
+    results = []
+    for rel, full_path in files:
+        try:
+            with open(full_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0 or size > MAX_GREP_FILE_BYTES:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if data.find(b"\0", 0, 8192) != -1:
+                        continue
+                    line_no, counted_to, last_line_start = 1, 0, -1
+                    for match in regex.finditer(data):
+                        line_start = data.rfind(b"\n", 0, match.start()) + 1
+                        if line_start == last_line_start:
+                            continue
+                        line_no += data[counted_to:line_start].count(b"\n")
+                        counted_to, last_line_start = line_start, line_start
+                        line_end = data.find(b"\n", match.end())
+                        if line_end == -1:
+                            line_end = size
+                        if len(results) >= limit:
+                            return results, True
+                        text = data[line_start:min(line_end, line_start + 500)].decode("utf-8", "replace")
+                        results.append(f"{rel}:{line_no}: {text.rstrip()}")
+        except (OSError, ValueError):
+            continue
+    return results, False
+
+
+def read_range(path: str, offset: int = 0, length: int = DEFAULT_READ_BYTES) -> Tuple[str, int, int]:
+    """Decode length bytes of a file starting at offset; returns (text, end offset, file size).
+
+    The file is mapped rather than read, so a range deep inside a large file
+    costs only the pages it touches. A range that ends inside a multi-byte
+    UTF-8 sequence is shortened to the last complete character.
+    """
+    length = max(0, min(length, MAX_READ_BYTES))
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = max(0, min(offset, size))
+        end = min(offset + length, size)
+        if offset == end:
+            return "", end, size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            chunk = data[offset:end]
+    if end < size:
+        # Back off a partial trailing character (at most 3 continuation bytes)
+        for back in range(1, min(4, len(chunk)) + 1):
+            byte = chunk[-back]
+            if byte & 0xC0 != 0x80:
+                needed = 2 if byte >> 5 == 0b110 else 3 if byte >> 4 == 0b1110 else 4 if byte >> 3 == 0b11110 else 1
+                if needed > back:
+                    chunk = chunk[:-back]
+                    end -= back
+                break
+    return chunk.decode("utf-8", "replace"), end, size
+
+
+def session_dir(ctx: Context) -> str:
+    """Working directory of the calling MCP session"""
+    return _session_dirs.get(ctx.session, start_dir)
+
 
-@mcp.tool()
-def ls(path: str = ".") -> str:
-    """List contents of a directory"""
-    logger.info(f"ls tool called with path: {path}")
+def resolve(ctx: Context, path: str) -> str:
+    return os.path.abspath(os.path.join(session_dir(ctx), path))
+
+
+@mcp.tool(annotations=READ_ONLY)
+def ls(ctx: Context, path: str = ".", cursor: str = "", limit: int = DEFAULT_PAGE_SIZE, details: bool = False) -> str:
+    """List contents of a directory, one page at a time.
+
+    Pass the returned next cursor to get the following page. With details,
+    each entry also shows its size in bytes and modification time.
+    """
+    logger.info(f"ls tool called with path: {path}, cursor: {cursor!r}, limit: {limit}")
     try:
-        # Resolve path relative to current directory
-        full_path = os.path.join(current_dir, path)
-        full_path = os.path.abspath(full_path)
-        
+        full_path = resolve(ctx, path)
+
         # Check if path exists
         if not os.path.exists(full_path):
             return f"Error: Path '{path}' does not exist"
-            
+
         # Check if it's a directory
         if not os.path.isdir(full_path):
             return f"Error: '{path}' is not a directory"
-            
-        # List contents
-        items = os.listdir(full_path)
-        
-        # Format output
-        result = f"Contents of {path}:\n"
-        for item in sorted(items):
-            item_path = os.path.join(full_path, item)
-            if os.path.isdir(item_path):
-                result += f"📁 {item}/\n"
-            else:
-                result += f"📄 {item}\n"
-        return result
+
+        lines, next_cursor = list_page(full_path, cursor, limit, details)
+        if next_cursor:
+            lines.append(f"(more entries: call ls with cursor={next_cursor!r})")
+        return "\n".join([f"Contents of {path}:", *lines]) + "\n"
     except Exception as e:
         logger.error(f"Error in ls: {str(e)}")
         return f"Error: {str(e)}"
 
-@mcp.tool()
-def cd(path: str) -> str:
-    """Change current directory"""
+
+@mcp.tool(annotations=SESSION_STATE)
+def cd(ctx: Context, path: str) -> str:
+    """Change the current directory of this session"""
     logger.info(f"cd tool called with path: {path}")
-    global current_dir
     try:
-        # Resolve path relative to current directory
-        new_dir = os.path.join(current_dir, path)
-        new_dir = os.path.abspath(new_dir)
-        
+        new_dir = resolve(ctx, path)
+
         # Check if path exists
         if not os.path.exists(new_dir):
             return f"Error: Path '{path}' does not exist"
-            
+
         # Check if it's a directory
         if not os.path.isdir(new_dir):
             return f"Error: '{path}' is not a directory"
-            
-        # Update current directory
-        current_dir = new_dir
-        return f"Changed directory to: {current_dir}"
+
+        _session_dirs[ctx.session] = new_dir
+        return f"Changed directory to: {new_dir}"
     except Exception as e:
         logger.error(f"Error in cd: {str(e)}")
         return f"Error: {str(e)}"
 
+
+@mcp.tool(annotations=READ_ONLY)
+def find(ctx: Context, pattern: str, path: str = ".", limit: int = DEFAULT_PAGE_SIZE) -> str:
+    """Find files and directories under a path whose name matches a glob pattern (e.g. '*.py')"""
+    logger.info(f"find tool called with pattern: {pattern}, path: {path}")
+    try:
+        root = resolve(ctx, path)
+        if not os.path.isdir(root):
+            return f"Error: '{path}' is not a directory"
+        matches, truncated = find_paths(root, pattern, max(1, min(limit, MAX_PAGE_SIZE)))
+        if not matches:
+            return f"No matches for '{pattern}' under {path}"
+        note = [f"(stopped after {len(matches)} matches)"] if truncated else []
+        return "\n".join([*matches, *note]) + "\n"
+    except Exception as e:
+        logger.error(f"Error in find: {str(e)}")
+        return f"Error: {str(e)}"
+
+
+@mcp.tool(annotations=READ_ONLY)
+def grep(ctx: Context, pattern: str, path: str = ".", glob: str = "*", limit: int = DEFAULT_PAGE_SIZE) -> str:
+    """Search file contents for a regular expression; returns 'file:line: text' for each matching line"""
+    logger.info(f"grep tool called with pattern: {pattern}, path: {path}, glob: {glob}")
+    try:
+        root = resolve(ctx, path)
+        if not os.path.exists(root):
+            return f"Error: Path '{path}' does not exist"
+        try:
+            results, truncated = grep_files(root, pattern, glob, max(1, min(limit, MAX_PAGE_SIZE)))
+        except re.error as e:
+            return f"Error: invalid pattern: {e}"
+        if not results:
+            return f"No matches for '{pattern}' under {path}"
+        note = [f"(stopped after {len(results)} matching lines)"] if truncated else []
+        return "\n".join([*results, *note]) + "\n"
+    except Exception as e:
+        logger.error(f"Error in grep: {str(e)}")
+        return f"Error: {str(e)}"
+
+
+@mcp.tool(annotations=READ_ONLY)
+def read_file(ctx: Context, path: str, offset: int = 0, length: int = DEFAULT_READ_BYTES) -> str:
+    """Read a byte range of a text file (default: the first 64 KB, at most 1 MB per call)"""
+    logger.info(f"read_file tool called with path: {path}, offset: {offset}, length: {length}")
+    try:
+        full_path = resolve(ctx, path)
+        if not os.path.isfile(full_path):
+            return f"Error: '{path}' is not a file"
+        text, end, size = read_range(full_path, offset, length)
+        header = f"{path} bytes {min(offset, size)}-{end} of {size}"
+        if end < size:
+            header += f" (continue with offset={end})"
+        return f"{header}:\n{text}"
+    except Exception as e:
+        logger.error(f"Error in read_file: {str(e)}")
+        return f"Error: {str(e)}"
+
+
 if __name__ == "__main__":
-    logger.info("Starting File System MCP server...")
-    logger.info("Server will be available at http://localhost:8003/mcp")
-    logger.info("Available tools:")
-    logger.info("- ls: List contents of a directory")
-    logger.info("- cd: Change current directory")
-    mcp.run(
-        transport="streamable-http",
-        host="0.0.0.0",
-        port=8003,
-        path="/mcp"
-    ) 
\ No newline at end of file
+    if "--stdio" in sys.argv:
+        # Spawned as a subprocess for a "stdio:python example_mcp_servers/file_mcp_server.py --stdio" server address;
+        # logging goes to stderr, so stdout carries only the protocol
+        mcp.run(transport="stdio")
+    else:
+        logger.info("Starting File System MCP server...")
+        logger.info("Server will be available at http://localhost:8003/mcp")
+        logger.info("Available tools:")
+        logger.info("- ls: List contents of a directory, paginated")
+        logger.info("- cd: Change the current directory of this session")
+        logger.info("- find: Find files by name pattern")
+        logger.info("- grep: Search file contents")
+        logger.info("- read_file: Read a byte range of a file")
+        mcp.run(
+            transport="streamable-http",
+            host="0.0.0.0",
+            port=8003,
+            path="/mcp"
+        )
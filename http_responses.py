@@ -0,0 +1,241 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import zlib
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, Response
+from starlette.staticfiles import StaticFiles
+
+try:
+    import orjson
+except ImportError:  # faster JSON encoding is optional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Content that is already compressed, or streamed as small latency-sensitive events
+DEFAULT_EXCLUDED_TYPES = (
+    "text/event-stream", "image/", "audio/", "video/",
+    "application/zip", "application/gzip", "application/x-brotli",
+)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON as UTF-8 bytes; orjson when installed, the standard library otherwise.
+
+    orjson rejects integers beyond 64 bits, which tool results may contain;
+    those payloads fall back to json.dumps.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with dumps().
+
+    Return it directly from an endpoint to also skip FastAPI's
+    jsonable_encoder pass over plain dict and list content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header by q-value; br wins ties"""
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        q = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if token:
+            weights[token] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress data and flush, so the client can decode everything sent so far"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses with brotli or gzip, as negotiated by Accept-Encoding.
+
+    Complete bodies under minimum_size are sent as they are. Streamed bodies
+    (NDJSON batches, blob downloads) are compressed chunk by chunk with a
+    flush after each one, so streaming keeps its latency. Responses that set
+    their own Content-Encoding or whose type is in excluded_types are left
+    alone.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 excluded_types: Sequence[str] = DEFAULT_EXCLUDED_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_types = tuple(excluded_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(scope=start_message)
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or content_type.startswith(self.excluded_types)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    body = compressor.finish(body)
+                    headers["content-length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            body = compressor.chunk(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with cache headers on top of Starlette's ETag/Last-Modified handling.
+
+    Requests carrying a version query (?v=<content hash>, as written by
+    VersionedIndex) are cached as immutable for a year; anything else must be
+    revalidated, which costs a 304 when the ETag still matches.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["cache-control"] = "no-cache"
+        return response
+
+
+class VersionedIndex:
+    """index.html with /static/ asset URLs suffixed by a hash of each file's content.
+
+    The page is re-rendered only when index.html or one of its assets changes
+    on disk, and served with a strong ETag so reloads revalidate with a 304.
+    """
+
+    ASSET_URL = re.compile(r'(src|href)="/static/([^"?#]+)"')
+
+    def __init__(self, index_path: str, static_dir: str):
+        self.index_path = index_path
+        self.static_dir = static_dir
+        self._stamp: Optional[Tuple] = None
+        self._body = b""
+        self._etag = ""
+
+    def _asset_stamp(self, html: str) -> Tuple:
+        stamp = []
+        for _, asset in self.ASSET_URL.findall(html):
+            try:
+                st = os.stat(os.path.join(self.static_dir, asset))
+                stamp.append((asset, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((asset, None, None))
+        return tuple(stamp)
+
+    def _render(self, html: str) -> None:
+        def versioned(match):
+            path = os.path.join(self.static_dir, match.group(2))
+            try:
+                with open(path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            except OSError:
+                return match.group(0)
+            return f'{match.group(1)}="/static/{match.group(2)}?v={digest}"'
+
+        self._body = self.ASSET_URL.sub(versioned, html).encode("utf-8")
+        self._etag = f'"{hashlib.sha256(self._body).hexdigest()[:16]}"'
+
+    def response(self, request_headers: Headers) -> Response:
+        index_stat = os.stat(self.index_path)
+        with open(self.index_path, encoding="utf-8") as f:
+            html = f.read()
+        stamp = (index_stat.st_mtime_ns, index_stat.st_size, self._asset_stamp(html))
+        if stamp != self._stamp:
+            self._render(html)
+            self._stamp = stamp
+        headers = {"etag": self._etag, "cache-control": "no-cache"}
+        if self._etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(self._body, media_type="text/html", headers=headers)
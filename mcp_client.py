@@ -1,7 +1,24 @@
 import asyncio
+import importlib
+import importlib.util
+import itertools
 import logging
-from typing import Dict, Optional, Any
-from fastmcp import Client
+import random
+import shlex
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Any
+from metrics import observe_tool_call, span
+from resource_cache import ResourceCache
+from result_cache import ToolResultCache
+from schema_validation import ArgumentValidationError, SchemaValidator
+from tool_results import BlobStore, ResultBuilder, ToolResult
+
+if TYPE_CHECKING:
+    import aiohttp
+    from fastmcp import Client, FastMCP
 
 # Configure logging
 logging.basicConfig(
@@ -10,55 +27,607 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class MCPManager:
+# Besides http(s) URLs, a server address can name a FastMCP server to run in this process over an
+# in-memory transport ("python:mcp_server" or "python:path/to/server.py:attribute") or a command
+# that speaks MCP over stdio ("stdio:python mcp_server.py --stdio"). Neither needs an HTTP probe.
+PYTHON_PREFIX = "python:"
+STDIO_PREFIX = "stdio:"
+
+def preload() -> None:
+    """Import the MCP client stack (fastmcp, mcp, aiohttp).
+
+    It takes most of a second to import, so this module loads it on first
+    use rather than at import time; servers that start accepting requests
+    before connecting call this from a worker thread to warm it meanwhile.
+    """
+    import aiohttp  # noqa: F401
+    import fastmcp  # noqa: F401
+    import fastmcp.client.transports  # noqa: F401
+    import fastmcp.exceptions  # noqa: F401
+
+def transport_kind(address: str) -> str:
+    """"python", "stdio" or "http" for a server address"""
+    if address.startswith(PYTHON_PREFIX):
+        return "python"
+    if address.startswith(STDIO_PREFIX):
+        return "stdio"
+    return "http"
+
+def load_fastmcp_server(target: str) -> "FastMCP":
+    """Import a module (dotted name or .py file) and return its FastMCP server.
+
+    The server is the module's `mcp` attribute unless another one is named
+    after a final colon. Modules are imported once and shared by every
+    session opened to them.
+    """
+    module_ref, sep, attribute = target.rpartition(":")
+    if not sep or not attribute.isidentifier():
+        module_ref, attribute = target, "mcp"
+    if module_ref.endswith(".py"):
+        path = Path(module_ref).resolve()
+        module_name = f"_mcp_in_process_{path.stem}"
+        module = sys.modules.get(module_name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            if spec is None or spec.loader is None:
+                raise ImportError(f"Cannot load MCP server from {path}")
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                del sys.modules[module_name]
+                raise
+    else:
+        module = importlib.import_module(module_ref)
+    from fastmcp import FastMCP
+
+    server = getattr(module, attribute, None)
+    if not isinstance(server, FastMCP):
+        raise ValueError(f"'{attribute}' in {module_ref} is not a FastMCP server")
+    return server
+
+def make_transport(address: str):
+    """What Client() should connect to for a server address: a URL, a FastMCP server or a stdio transport"""
+    kind = transport_kind(address)
+    if kind == "python":
+        return load_fastmcp_server(address[len(PYTHON_PREFIX):].strip())
+    if kind == "stdio":
+        argv = shlex.split(address[len(STDIO_PREFIX):])
+        if not argv:
+            raise ValueError("stdio: address without a command")
+        if argv[0] in ("python", "python3"):
+            # Run the server with this interpreter, so it sees the same installed packages
+            argv[0] = sys.executable
+        from fastmcp.client.transports import StdioTransport
+
+        return StdioTransport(command=argv[0], args=argv[1:])
+    return address
+
+class ToolCatalog:
+    """Cached result of list_tools() for a single server"""
+
     def __init__(self):
-        self._clients: Dict[str, Client] = {}
-        self._connections: Dict[str, asyncio.Task] = {}
+        self.tools: list = []
+        self.by_name: Dict[str, Any] = {}
+        # Argument validators compiled from the tools' input schemas, rebuilt only when the version changes
+        self.validators: Dict[str, SchemaValidator] = {}
+        self.version = 0
+        self.fetched_at: Optional[float] = None
+        self.stale = True
+        self.hits = 0
+        self.misses = 0
+        self.lock = asyncio.Lock()
+
+    def age(self) -> Optional[float]:
+        """Seconds since the catalog was last fetched, or None if never fetched"""
+        if self.fetched_at is None:
+            return None
+        return time.monotonic() - self.fetched_at
+
+    def is_fresh(self, ttl: Optional[float]) -> bool:
+        """A catalog is fresh until invalidated or, when a TTL is set, until it expires"""
+        if self.stale or self.fetched_at is None:
+            return False
+        return ttl is None or self.age() < ttl
+
+    def stats(self) -> dict:
+        age = self.age()
+        return {
+            "tools": len(self.tools),
+            "version": self.version,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "stale": self.stale,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+class CatalogMessageHandler:
+    """Invalidates a server's tool catalog and cached resources when it announces a change.
+
+    A plain message callback rather than a fastmcp MessageHandler subclass, so
+    defining it does not import fastmcp.
+    """
+
+    def __init__(self, manager: "MCPManager", server_name: str):
+        self._manager = manager
+        self._server_name = server_name
+
+    async def __call__(self, message) -> None:
+        # Server notifications wrap the typed notification in .root; requests and exceptions are ignored
+        notification = getattr(message, "root", None)
+        method = getattr(notification, "method", None)
+        if method == "notifications/tools/list_changed":
+            logger.info(f"Tool list changed on '{self._server_name}', refreshing catalog")
+            self._manager.invalidate_tools(self._server_name)
+        elif method == "notifications/resources/updated":
+            self._manager.invalidate_resource(self._server_name, str(notification.params.uri))
+        elif method == "notifications/resources/list_changed":
+            self._manager.resource_list_changed(self._server_name)
+
+class ServerOverloadedError(Exception):
+    """Raised when a server's in-flight limit is reached and its wait queue is full"""
+
+class ClientPool:
+    """N client sessions to one server with least-busy dispatch and bounded admission.
+
+    At most max_in_flight calls run at once; up to max_queue further callers wait
+    for a slot and anything beyond that is rejected with ServerOverloadedError.
+    Consecutive calls may land on different sessions, so servers that keep state
+    per session (such as the file server's cd) need a pool of one.
+    """
+
+    def __init__(self, server_name: str, clients: List["Client"], max_in_flight: int, max_queue: int):
+        self.server_name = server_name
+        self.clients = clients
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.busy = [0] * len(clients)
+        self.calls = [0] * len(clients)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.peak_waiting = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.created_at = time.monotonic()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator["Client"]:
+        """Wait for a slot, then lend out the session with the fewest in-flight calls"""
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise ServerOverloadedError(
+                    f"Server '{self.server_name}' is overloaded: {self.in_flight} calls in flight "
+                    f"and {self.waiting} waiting (limits {self.max_in_flight}/{self.max_queue})"
+                )
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            queued_at = time.monotonic()
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+                self.wait_seconds += time.monotonic() - queued_at
+        else:
+            await self._slots.acquire()
+
+        index = min(range(len(self.clients)), key=self.busy.__getitem__)
+        self.busy[index] += 1
+        self.calls[index] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.monotonic()
+        try:
+            yield self.clients[index]
+        finally:
+            self.busy_seconds += time.monotonic() - started
+            self.busy[index] -= 1
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        uptime = max(time.monotonic() - self.created_at, 1e-9)
+        total_calls = sum(self.calls)
+        return {
+            "sessions": len(self.clients),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_in_flight": self.peak_in_flight,
+            "peak_waiting": self.peak_waiting,
+            "calls": total_calls,
+            "calls_per_session": list(self.calls),
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / total_calls * 1000, 2) if total_calls else 0.0,
+            # Average fraction of session capacity that was busy since the pool was opened
+            "utilization": round(self.busy_seconds / (uptime * len(self.clients)), 4),
+        }
+
+class ServerStatus:
+    """Connection state and health of one registered server"""
+
+    def __init__(self, url: str, supervised: bool, pool_size: int = 1):
+        self.url = url
+        self.pool_size = pool_size
+        # Supervised servers are health-checked and reconnected until explicitly disconnected
+        self.supervised = supervised
+        self.state = "connecting"
+        self.handshake_ms: Optional[float] = None
+        self.ping_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self.next_check_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "transport": transport_kind(self.url),
+            "state": self.state,
+            "supervised": self.supervised,
+            "pool_size": self.pool_size,
+            "handshake_ms": self.handshake_ms,
+            "ping_ms": self.ping_ms,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+class MCPManager:
+    def __init__(
+        self,
+        tool_cache_ttl: Optional[float] = 300.0,
+        probe_timeout: float = 3.0,
+        health_interval: float = 15.0,
+        ping_timeout: float = 5.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        pool_size: int = 1,
+        max_in_flight: int = 32,
+        max_queue: int = 64,
+        result_cache: Optional[ToolResultCache] = None,
+        blob_store: Optional[BlobStore] = None,
+        max_result_chars: int = 100_000,
+        validate_arguments: bool = True,
+        coerce_arguments: bool = True,
+        resource_cache: Optional[ResourceCache] = None,
+        subscribe_resources: bool = True,
+        prefetch_resources: bool = False,
+    ):
+        # _clients holds each server's primary session (catalog, pings, resources);
+        # tool calls are dispatched over the sessions in _pools
+        self._clients: Dict[str, "Client"] = {}
+        self._pools: Dict[str, ClientPool] = {}
+        self._connections: Dict[str, List[asyncio.Task]] = {}
+        self._catalogs: Dict[str, ToolCatalog] = {}
+        self._servers: Dict[str, ServerStatus] = {}
+        self._refresh_tasks: set = set()
+        # URIs each server's primary session is subscribed to (notifications/resources/updated); a URI is
+        # unsubscribed when its read leaves the resource cache. The lock keeps (un)subscribe requests in order
+        self._resource_subscriptions: Dict[str, set] = {}
+        self._subscription_locks: Dict[str, asyncio.Lock] = {}
+        # notifications/cancelled sends still in flight for calls whose caller gave up
+        self._cancel_notifications: set = set()
+        # Catalog versions are unique across servers and reconnects, so (server, version) identifies a tool list
+        self._catalog_versions = itertools.count(1)
+        self._supervisor: Optional[asyncio.Task] = None
+        self._http_session: Optional["aiohttp.ClientSession"] = None
+        # None (or <= 0) disables expiry; catalogs are then only refreshed on notification
+        self.tool_cache_ttl = tool_cache_ttl if tool_cache_ttl and tool_cache_ttl > 0 else None
+        self.probe_timeout = probe_timeout
+        self.health_interval = health_interval
+        self.ping_timeout = ping_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        # Opt-in cache for deterministic tools; None disables result caching
+        self.result_cache = result_cache
+        # Text beyond max_result_chars and all binary content is served by reference from the blob store
+        self.blobs = blob_store or BlobStore()
+        self.results = ResultBuilder(self.blobs, max_result_chars)
+        # The blob store evicts on its own, so cached results are only served while their links still work
+        if result_cache is not None:
+            result_cache.usable = self._blobs_available
+        # Arguments are checked against the tool's input schema before any request is sent
+        self.validate_arguments = validate_arguments
+        self.coerce_arguments = coerce_arguments
+        # Resource reads are served from this cache when set; subscribed resources stay cached until updated,
+        # the rest for the cache's TTL. With prefetch_resources, listed resources are read right after connect
+        self.resource_cache = resource_cache
+        if resource_cache is not None:
+            resource_cache.on_release = self._release_subscription
+            resource_cache.usable = self._blobs_available
+        self.subscribe_resources = subscribe_resources
+        self.prefetch_resources = prefetch_resources
 
-    async def connect(self, server_name: str, server_url: str) -> bool:
-        """Connect to an MCP server and store the connection"""
+    async def probe(self, url: str) -> bool:
+        """Basic check if an HTTP server is listening at the URL (before full MCP connection)"""
+        import aiohttp
+
+        if self._http_session is None or self._http_session.closed:
+            # One session (and connection pool) is shared by all probes
+            self._http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.probe_timeout))
+
+        logger.info(f"Performing basic availability check for URL: {url}")
+        try:
+            async with self._http_session.get(url) as response:
+                # We just care if it responds, status 200-4xx is fine for a basic ping
+                logger.info(f"Availability check for {url} got status: {response.status}")
+                return True
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout during basic availability check for {url}")
+            return False
+        except aiohttp.ClientConnectorError as e:
+            logger.error(f"Connection error during basic availability check for {url}: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error during basic availability check for {url}: {e}")
+            return False
+
+    async def connect(
+        self,
+        server_name: str,
+        server_url: str,
+        supervise: bool = False,
+        probe: bool = False,
+        pool_size: Optional[int] = None,
+    ) -> bool:
+        """Connect to an MCP server and store the connection.
+
+        Once connected, a server is always supervised: the supervisor pings it and
+        reconnects it if it drops. With supervise=True it also stays registered after a
+        failed first attempt and is retried with backoff; with probe=True an HTTP availability
+        check runs before the MCP handshake (HTTP servers only). pool_size overrides the
+        manager's default number of sessions opened to this server; for a stdio server
+        each session is its own subprocess.
+        """
         if server_name in self._clients:
             logger.info(f"Already connected to {server_name}")
             return True
 
-        logger.info(f"Connecting to MCP server '{server_name}' at {server_url}")
+        status = self._servers.get(server_name)
+        if status is None or status.url != server_url:
+            status = self._servers[server_name] = ServerStatus(server_url, supervise, pool_size or self.pool_size)
+        elif pool_size:
+            status.pool_size = pool_size
+        status.supervised = status.supervised or supervise
+
+        async with status.lock:
+            if server_name in self._clients:
+                return True
+            status.state = "connecting" if status.failures == 0 else "reconnecting"
+            started = time.perf_counter()
+
+            if probe and transport_kind(server_url) == "http" and not await self.probe(server_url):
+                connected, error = False, f"Server not reachable at {server_url}"
+            else:
+                connected, error = await self._open(server_name, server_url, status.pool_size)
+
+            if connected and self._servers.get(server_name) is not status:
+                # disconnect() ran during the handshake; nothing would supervise or close this connection
+                logger.info(f"'{server_name}' was removed while connecting; closing the new connection")
+                await self._close(server_name)
+                return False
+
+            if connected:
+                # A live connection is health-checked and reconnected from now on, however it was added
+                status.supervised = True
+                status.state = "connected"
+                status.handshake_ms = round((time.perf_counter() - started) * 1000, 1)
+                status.failures = 0
+                status.last_error = None
+                status.next_check_at = time.monotonic() + self.health_interval
+                if self.prefetch_resources and self.resource_cache is not None:
+                    self._start_prefetch(server_name)
+                return True
+
+            status.failures += 1
+            status.last_error = error
+            if status.supervised:
+                status.state = "reconnecting"
+                status.next_check_at = time.monotonic() + self._backoff(status.failures)
+            elif self._servers.get(server_name) is status:
+                del self._servers[server_name]
+            return False
+
+    async def _open(self, server_name: str, server_url: str, pool_size: int = 1) -> tuple:
+        """Run the MCP handshakes and fill the tool catalog; returns (connected, error)"""
+        from fastmcp import Client
+
+        logger.info(f"Connecting to MCP server '{server_name}' at {server_url} with {pool_size} session(s)")
         try:
-            # Create a new client connection
-            client = Client(server_url)
-            # Start the connection
-            connection = asyncio.create_task(client.__aenter__())
-            await connection
+            # Create the client connections; only the primary one listens for catalog changes
+            clients = [Client(make_transport(server_url), message_handler=CatalogMessageHandler(self, server_name))]
+            clients += [Client(make_transport(server_url)) for _ in range(pool_size - 1)]
+            # Start the connections concurrently
+            connections = [asyncio.create_task(client.__aenter__()) for client in clients]
+            results = await asyncio.gather(*connections, return_exceptions=True)
             
-            # Store the client and connection
-            self._clients[server_name] = client
-            self._connections[server_name] = connection
+            # Store the clients and connections (also on failure, so _close can tear down the rest)
+            self._clients[server_name] = clients[0]
+            self._pools[server_name] = ClientPool(server_name, clients, self.max_in_flight, self.max_queue)
+            self._connections[server_name] = connections
+            self._catalogs[server_name] = ToolCatalog()
+            failure = next((result for result in results if isinstance(result, BaseException)), None)
+            if failure is not None:
+                raise failure
             
-            # Test the connection by listing tools
-            tools = await client.list_tools()
+            # Test the connection and fill the tool catalog
+            tools = await self._refresh_tools(server_name)
             logger.info(f"Successfully connected to '{server_name}'. Available tools: {len(tools)}")
-            return True
+            return True, None
             
         except Exception as e:
             logger.error(f"Error connecting to '{server_name}': {type(e).__name__} - {e}")
+            await self._close(server_name)
+            return False, f"{type(e).__name__}: {e}"
+
+    def _backoff(self, failures: int) -> float:
+        """Exponential backoff with jitter so many servers don't retry in lockstep"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def register(self, servers: Dict[str, str], pool_sizes: Optional[Dict[str, int]] = None) -> None:
+        """Register servers as supervised and "connecting" without opening sessions yet.
+
+        server_status() lists them right away; connect_all() or, once started,
+        the supervisor then makes the actual connection attempts.
+        """
+        pool_sizes = pool_sizes or {}
+        for name, url in servers.items():
+            if name not in self._servers:
+                self._servers[name] = ServerStatus(url, True, pool_sizes.get(name) or self.pool_size)
+
+    async def connect_all(self, servers: Dict[str, str], pool_sizes: Optional[Dict[str, int]] = None) -> Dict[str, bool]:
+        """Connect to a set of servers concurrently and keep them supervised"""
+        pool_sizes = pool_sizes or {}
+        results = await asyncio.gather(*(
+            self.connect(name, url, supervise=True, probe=True, pool_size=pool_sizes.get(name))
+            for name, url in servers.items()
+        ))
+        return dict(zip(servers, results))
+
+    async def sync_servers(self, servers: Dict[str, tuple]) -> None:
+        """Reconcile the registered servers with a desired set of name -> (url, pool_size).
+
+        Servers missing from the set are disconnected, new ones (or ones whose URL
+        changed) are connected under supervision, all concurrently.
+        """
+        stale = [
+            name for name in set(self._servers) | set(self._clients)
+            if name not in servers or (name in self._servers and self._servers[name].url != servers[name][0])
+        ]
+        await asyncio.gather(*(self.disconnect(name) for name in stale))
+        await asyncio.gather(*(
+            self.connect(name, url, supervise=True, probe=True, pool_size=pool_size)
+            for name, (url, pool_size) in servers.items()
+            if name not in self._servers and name not in self._clients
+        ))
+
+    def start_supervisor(self) -> None:
+        """Start the background loop that health-checks and reconnects supervised servers"""
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def _supervise(self) -> None:
+        while True:
+            now = time.monotonic()
+            due = [name for name, status in self._servers.items() if status.supervised and status.next_check_at <= now]
+            if due:
+                await asyncio.gather(*(self._check(name) for name in due), return_exceptions=True)
+
+            # Sleep until the next health check or reconnect attempt is due
+            upcoming = [status.next_check_at for status in self._servers.values() if status.supervised]
+            delay = min(upcoming, default=now + self.health_interval) - time.monotonic()
+            await asyncio.sleep(min(max(delay, 0.1), self.health_interval))
+
+    async def _check(self, server_name: str) -> None:
+        """Ping a connected server, or try to reconnect a server that is down"""
+        status = self._servers.get(server_name)
+        if status is None:
+            return
+        pool = self._pools.get(server_name)
+        if pool is None:
+            logger.info(f"Reconnecting to '{server_name}' (attempt {status.failures + 1})")
+            await self.connect(server_name, status.url, supervise=True, probe=True)
+            return
+
+        started = time.perf_counter()
+        try:
+            # Every pooled session must answer; one dead session takes the pool down for a clean reconnect
+            await asyncio.wait_for(
+                asyncio.gather(*(client.ping() for client in pool.clients)),
+                timeout=self.ping_timeout,
+            )
+            status.ping_ms = round((time.perf_counter() - started) * 1000, 1)
+            status.next_check_at = time.monotonic() + self.health_interval
+        except Exception as e:
+            logger.warning(f"Health check failed for '{server_name}': {type(e).__name__} - {e}; reconnecting")
+            status.last_error = f"{type(e).__name__}: {e}"
+            status.state = "reconnecting"
+            await self._close(server_name)
+            status.next_check_at = time.monotonic()
+
+    def connected_servers(self) -> List[str]:
+        """Names of the servers with a live connection"""
+        return list(self._clients.keys())
+
+    def admission_limit(self, server_name: str) -> int:
+        """Calls a server's pool admits at once, running or queued; more are rejected"""
+        pool = self._pools.get(server_name)
+        if pool is None:
+            return self.max_in_flight + self.max_queue
+        return pool.max_in_flight + pool.max_queue
+
+    def pool_stats(self) -> Dict[str, dict]:
+        """Utilization and admission counters of every server's session pool"""
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    def server_status(self) -> Dict[str, dict]:
+        """State, handshake latency and health of every registered server"""
+        return {name: status.stats() for name, status in self._servers.items()}
+
+    async def close(self) -> None:
+        """Stop supervision, disconnect from every server and release the probe session"""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        for server_name in set(self._servers) | set(self._clients):
             await self.disconnect(server_name)
-            return False
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
 
     async def disconnect(self, server_name: str) -> bool:
-        """Disconnect from an MCP server"""
+        """Disconnect from an MCP server and stop supervising it"""
+        self._servers.pop(server_name, None)
+        return await self._close(server_name)
+
+    async def _close(self, server_name: str) -> bool:
+        """Tear down the client connection, leaving the server registration in place"""
         if server_name not in self._clients:
             logger.warning(f"No connection found for '{server_name}'")
             return True
 
         logger.info(f"Disconnecting from '{server_name}'")
         try:
-            client = self._clients.pop(server_name)
-            connection = self._connections.pop(server_name)
+            self._clients.pop(server_name)
+            pool = self._pools.pop(server_name)
+            connections = self._connections.pop(server_name)
+            self._catalogs.pop(server_name, None)
+            self._resource_subscriptions.pop(server_name, None)
+            if self.result_cache is not None:
+                # The server may come back with different tools or code
+                self.result_cache.invalidate(server_name)
+            if self.resource_cache is not None:
+                # Updates are no longer pushed once the session is gone
+                self.resource_cache.invalidate(server_name)
             
-            # Close the client connection
-            await client.__aexit__(None, None, None)
-            # Cancel the connection task if it's still running
-            if not connection.done():
-                connection.cancel()
+            # Close the client connections; a dead server must not hang the teardown
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    *(self._exit_client(client) for client in pool.clients),
+                    return_exceptions=True,
+                ),
+                timeout=self.ping_timeout,
+            )
+            # Cancel the connection tasks if they're still running
+            for connection in connections:
+                if not connection.done():
+                    connection.cancel()
+            failure = next((result for result in results if isinstance(result, Exception)), None)
+            if failure is not None:
+                raise failure
             
             logger.info(f"Successfully disconnected from '{server_name}'")
             return True
@@ -67,70 +636,372 @@ class MCPManager:
             logger.error(f"Error disconnecting from '{server_name}': {type(e).__name__} - {e}")
             return False
 
+    @staticmethod
+    async def _exit_client(client: "Client") -> None:
+        await client.__aexit__(None, None, None)
+        # Stdio transports may keep their subprocess alive across sessions; this server is done with it
+        close = getattr(client.transport, "close", None)
+        if close is not None:
+            await close()
+
     def is_connected(self, server_name: str) -> bool:
         """Check if connected to a server"""
         return server_name in self._clients
 
-    async def call_tool(self, server_name: str, tool_name: str, parameters: dict) -> Any:
-        """Call a tool on a specific server"""
+    async def call_tool(
+        self, server_name: str, tool_name: str, parameters: dict, timeout: Optional[float] = None
+    ) -> ToolResult:
+        """Call a tool on a specific server, serving cacheable tools from the result cache.
+
+        timeout bounds the whole call, including the wait for a pool slot. When it
+        expires, or the caller is cancelled, the server is sent notifications/cancelled
+        for the request so it can stop working on it.
+        """
         if not self.is_connected(server_name):
             raise ConnectionError(f"Not connected to server: {server_name}")
 
-        client = self._clients[server_name]
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            result = await client.call_tool(tool_name, parameters)
-            # Handle different types of responses
-            if isinstance(result, list) and len(result) > 0 and hasattr(result[0], 'text'):
-                # Handle list of TextContent objects
-                return result[0].text
-            elif hasattr(result, 'text'):
-                return result.text
-            elif isinstance(result, (str, int, float, bool)):
-                return str(result)
-            elif isinstance(result, (list, dict)):
-                return str(result)  # Convert to string to ensure proper serialization
-            else:
-                return str(result)
+            with span("tool_call", server=server_name, tool=tool_name):
+                parameters = self.validate(server_name, tool_name, parameters)
+                ttl = None
+                if self.result_cache is not None:
+                    tool = self._catalogs[server_name].by_name.get(tool_name)
+                    ttl = self.result_cache.ttl_for(server_name, tool_name, getattr(tool, "annotations", None))
+                if ttl:
+                    call = self.result_cache.get_or_call(
+                        server_name, tool_name, parameters, ttl,
+                        lambda: self._call_tool(server_name, tool_name, parameters),
+                    )
+                else:
+                    call = self._call_tool(server_name, tool_name, parameters)
+                result = await asyncio.wait_for(call, timeout)
+                outcome = "ok"
+                return result
+        except ServerOverloadedError:
+            outcome = "rejected"
+            raise
+        except asyncio.TimeoutError:
+            if timeout is None:
+                # Raised inside the call (a transport timeout, say), not by a deadline of ours
+                raise
+            outcome = "timeout"
+            raise asyncio.TimeoutError(
+                f"Tool '{tool_name}' on '{server_name}' did not finish within {timeout:g}s"
+            ) from None
+        except ArgumentValidationError:
+            outcome = "invalid"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            # Tool names come from clients; only catalogued ones become label values, so the series stay bounded
+            catalog = self._catalogs.get(server_name)
+            label = tool_name if catalog is not None and tool_name in catalog.by_name else "unknown"
+            observe_tool_call(server_name, label, time.perf_counter() - started, outcome)
+
+    def validate(self, server_name: str, tool_name: str, parameters: Optional[dict]) -> dict:
+        """Check arguments against the tool's input schema; returns them, coerced where allowed.
+
+        Raises ArgumentValidationError without contacting the server. Tools that are
+        not in the catalog yet are passed through for the server to judge.
+        """
+        parameters = parameters if parameters is not None else {}
+        catalog = self._catalogs.get(server_name)
+        if not self.validate_arguments or catalog is None:
+            return parameters
+        validator = catalog.validators.get(tool_name)
+        if validator is None:
+            return parameters
+        parameters, errors = validator(parameters)
+        if errors:
+            raise ArgumentValidationError(server_name, tool_name, errors)
+        return parameters
+
+    def _compile_validators(self, server_name: str, tools: list) -> Dict[str, SchemaValidator]:
+        validators = {}
+        for tool in tools:
+            try:
+                validators[tool.name] = SchemaValidator(getattr(tool, "inputSchema", None), coerce=self.coerce_arguments)
+            except Exception as e:
+                # A schema we cannot compile only means the server does the checking
+                logger.warning(f"Not validating arguments of '{tool.name}' on '{server_name}': {type(e).__name__} - {e}")
+        return validators
+
+    async def _call_tool(self, server_name: str, tool_name: str, parameters: dict) -> ToolResult:
+        try:
+            async with self._pools[server_name].acquire() as client:
+                response = await self._send_tool_call(client, server_name, tool_name, parameters)
+            result = self.results.build(response.content, response.structuredContent, response.isError)
+            if result.is_error:
+                from fastmcp.exceptions import ToolError
+
+                raise ToolError(result.text() or f"Tool '{tool_name}' reported an error")
+            return result
+        except ServerOverloadedError as e:
+            logger.warning(str(e))
+            raise
         except Exception as e:
             logger.error(f"Error calling tool '{tool_name}' on '{server_name}': {type(e).__name__} - {e}")
             raise
 
-    async def list_tools(self, server_name: str) -> list:
-        """List tools available on a specific server"""
+    async def _send_tool_call(self, client: "Client", server_name: str, tool_name: str, parameters: dict):
+        """Send tools/call; if the caller is cancelled meanwhile, tell the server to cancel it too"""
+        try:
+            # The SDK takes the next id from this counter before its first await, so it is this call's id.
+            # It is private: requirements.txt bounds mcp to versions tests/test_mcp_client.py checks this on
+            request_id = client.session._request_id
+        except (AttributeError, RuntimeError):
+            request_id = None
+        try:
+            return await client.call_tool_mcp(tool_name, parameters or {})
+        except asyncio.CancelledError:
+            if request_id is not None:
+                # Sent from a separate task: this one is being cancelled and must not wait for it
+                task = asyncio.create_task(self._notify_cancelled(client, server_name, tool_name, request_id))
+                self._cancel_notifications.add(task)
+                task.add_done_callback(self._cancel_notifications.discard)
+            raise
+
+    async def _notify_cancelled(self, client: "Client", server_name: str, tool_name: str, request_id: int) -> None:
+        from mcp.types import CancelledNotification, CancelledNotificationParams, ClientNotification
+
+        try:
+            await asyncio.wait_for(
+                client.session.send_notification(ClientNotification(CancelledNotification(
+                    method="notifications/cancelled",
+                    params=CancelledNotificationParams(requestId=request_id, reason="Caller cancelled or deadline passed"),
+                ))),
+                timeout=self.ping_timeout,
+            )
+            logger.debug(f"Sent cancellation of '{tool_name}' (request {request_id}) to '{server_name}'")
+        except Exception as e:
+            # The session may be gone already; the server then drops the request on its own
+            logger.debug(f"Could not send cancellation to '{server_name}': {type(e).__name__} - {e}")
+
+    async def list_tools(self, server_name: str, refresh: bool = False) -> list:
+        """List tools available on a specific server, served from the catalog cache when fresh"""
+        if not self.is_connected(server_name):
+            raise ConnectionError(f"Not connected to server: {server_name}")
+
+        catalog = self._catalogs[server_name]
+        if not refresh and catalog.is_fresh(self.tool_cache_ttl):
+            catalog.hits += 1
+            return catalog.tools
+
+        catalog.misses += 1
+        return await self._refresh_tools(server_name, force=refresh)
+
+    async def _refresh_tools(self, server_name: str, force: bool = True) -> list:
+        """Fetch the tool list from the server and store it in the catalog"""
+        catalog = self._catalogs[server_name]
+        async with catalog.lock:
+            # Another caller may have refreshed the catalog while we waited for the lock
+            if not force and catalog.is_fresh(self.tool_cache_ttl):
+                return catalog.tools
+
+            client = self._clients[server_name]
+            try:
+                tools = await client.list_tools()
+            except Exception as e:
+                logger.error(f"Error listing tools on '{server_name}': {type(e).__name__} - {e}")
+                raise
+
+            if tools != catalog.tools:
+                # Only a real change bumps the version, so prompts built from the catalog stay cacheable
+                catalog.version = next(self._catalog_versions)
+                catalog.validators = self._compile_validators(server_name, tools)
+            catalog.tools = tools
+            catalog.by_name = {tool.name: tool for tool in tools}
+            catalog.fetched_at = time.monotonic()
+            catalog.stale = False
+            return tools
+
+    def invalidate_tools(self, server_name: str) -> None:
+        """Mark a server's tool catalog as stale and refresh it in the background"""
+        catalog = self._catalogs.get(server_name)
+        if catalog is None:
+            return
+        catalog.stale = True
+        if self.result_cache is not None:
+            self.result_cache.invalidate(server_name)
+        task = asyncio.create_task(self._background_refresh(server_name))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _background_refresh(self, server_name: str) -> None:
+        try:
+            if self.is_connected(server_name):
+                await self._refresh_tools(server_name, force=False)
+        except Exception:
+            # Already logged; the next list_tools() call will retry
+            pass
+
+    def catalog_versions(self) -> Dict[str, int]:
+        """Current catalog version of each server; bumps whenever its tool list is refetched"""
+        return {name: catalog.version for name, catalog in self._catalogs.items()}
+
+    def catalog_stats(self) -> Dict[str, dict]:
+        """Age and hit/miss counters of every server's tool catalog"""
+        return {name: catalog.stats() for name, catalog in self._catalogs.items()}
+
+    async def get_resource(self, server_name: str, resource_path: str, refresh: bool = False) -> ToolResult:
+        """Read a resource from a specific server, served from the resource cache when fresh.
+
+        refresh=True skips the cached copy and reads the resource again.
+        """
         if not self.is_connected(server_name):
             raise ConnectionError(f"Not connected to server: {server_name}")
 
-        client = self._clients[server_name]
+        if self.resource_cache is None:
+            return self.results.build(await self._read_resource(server_name, resource_path))
+        if refresh:
+            self.resource_cache.invalidate(server_name, resource_path)
+        # Subscribe before reading, so an update that lands during the read is not missed
+        subscribed = await self._subscribe_resource(server_name, resource_path)
+        return await self.resource_cache.get_or_read(
+            server_name, resource_path,
+            lambda: self._read_resource(server_name, resource_path),
+            self.results.build,
+            subscribed,
+        )
+
+    async def _read_resource(self, server_name: str, resource_path: str) -> list:
         try:
-            return await client.list_tools()
+            async with self._pools[server_name].acquire() as client:
+                return await client.read_resource(resource_path)
+        except ServerOverloadedError as e:
+            logger.warning(str(e))
+            raise
         except Exception as e:
-            logger.error(f"Error listing tools on '{server_name}': {type(e).__name__} - {e}")
+            logger.error(f"Error getting resource '{resource_path}' from '{server_name}': {type(e).__name__} - {e}")
             raise
 
-    async def get_resource(self, server_name: str, resource_path: str) -> str:
-        """Get a resource from a specific server"""
+    def _resource_capabilities(self, server_name: str):
+        try:
+            return self._clients[server_name].initialize_result.capabilities.resources
+        except (KeyError, AttributeError, RuntimeError):
+            return None
+
+    async def _subscribe_resource(self, server_name: str, uri: str) -> bool:
+        """Subscribe the primary session to updates of uri; False if the server cannot push them"""
+        subscriptions = self._resource_subscriptions.setdefault(server_name, set())
+        if uri in subscriptions:
+            return True
+        capabilities = self._resource_capabilities(server_name)
+        if not self.subscribe_resources or not getattr(capabilities, "subscribe", False):
+            return False
+        async with self._subscription_locks.setdefault(server_name, asyncio.Lock()):
+            if uri in subscriptions:
+                return True
+            try:
+                await asyncio.wait_for(self._clients[server_name].session.subscribe_resource(uri), self.ping_timeout)
+            except Exception as e:
+                # Reads of this resource fall back to the cache TTL
+                logger.warning(f"Could not subscribe to '{uri}' on '{server_name}': {type(e).__name__} - {e}")
+                return False
+            subscriptions.add(uri)
+        return True
+
+    def _blobs_available(self, result: ToolResult) -> bool:
+        """Whether every blob a cached result links to can still be downloaded"""
+        return all(blob_id in self.blobs for blob_id in result.blob_ids())
+
+    def _release_subscription(self, server_name: str, uri: str) -> None:
+        """Called by the resource cache when a subscribed resource is no longer cached"""
+        if uri in self._resource_subscriptions.get(server_name, ()):
+            task = asyncio.create_task(self._unsubscribe_resource(server_name, uri))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _unsubscribe_resource(self, server_name: str, uri: str) -> None:
+        async with self._subscription_locks.setdefault(server_name, asyncio.Lock()):
+            subscriptions = self._resource_subscriptions.get(server_name)
+            # Skip it if the server reconnected meanwhile or the resource is being read again
+            if not subscriptions or uri not in subscriptions or self.resource_cache.holds(server_name, uri):
+                return
+            subscriptions.discard(uri)
+            try:
+                await asyncio.wait_for(self._clients[server_name].session.unsubscribe_resource(uri), self.ping_timeout)
+            except Exception as e:
+                # At worst the server keeps sending updates for a resource that is not cached
+                logger.debug(f"Could not unsubscribe from '{uri}' on '{server_name}': {type(e).__name__} - {e}")
+
+    def invalidate_resource(self, server_name: str, uri: str) -> None:
+        """Mark the cached copy of a resource the server reported as updated as stale"""
+        if self.resource_cache is not None:
+            stale = self.resource_cache.mark_stale(server_name, uri)
+            logger.debug(f"Resource '{uri}' updated on '{server_name}' ({stale} cached read(s) marked stale)")
+
+    def resource_list_changed(self, server_name: str) -> None:
+        """Prefetch resources a server newly lists, when prefetching is enabled"""
+        if self.prefetch_resources and self.resource_cache is not None and self.is_connected(server_name):
+            self._start_prefetch(server_name)
+
+    async def list_resources(self, server_name: str) -> list:
+        """List the static resources a server offers (templates are not included)"""
         if not self.is_connected(server_name):
             raise ConnectionError(f"Not connected to server: {server_name}")
+        if self._resource_capabilities(server_name) is None:
+            return []
+        return await self._clients[server_name].list_resources()
+
+    async def prefetch(self, server_name: str, uris: Optional[List[str]] = None, concurrency: int = 4) -> Dict[str, bool]:
+        """Read resources into the cache ahead of use; returns whether each URI was read.
 
-        client = self._clients[server_name]
+        Without uris, every listed resource is read that fits the cache (by its
+        advertised size, when given), up to the cache's entry limit.
+        """
+        if self.resource_cache is None:
+            return {}
+        if uris is None:
+            resources = await self.list_resources(server_name)
+            uris = [
+                str(resource.uri) for resource in resources
+                if getattr(resource, "size", None) is None or resource.size <= self.resource_cache.max_bytes
+            ][: self.resource_cache.max_entries]
+        slots = asyncio.Semaphore(concurrency)
+
+        async def read(uri: str) -> bool:
+            async with slots:
+                try:
+                    await self.get_resource(server_name, uri)
+                    return True
+                except Exception:
+                    # Already logged; a later read retries
+                    return False
+
+        results = await asyncio.gather(*(read(uri) for uri in uris))
+        return dict(zip(uris, results))
+
+    def _start_prefetch(self, server_name: str) -> None:
+        task = asyncio.create_task(self._background_prefetch(server_name))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _background_prefetch(self, server_name: str) -> None:
         try:
-            result = await client.get_resource(resource_path)
-            # Handle different types of responses
-            if hasattr(result, 'text'):
-                return result.text
-            elif isinstance(result, (str, int, float, bool)):
-                return str(result)
-            elif isinstance(result, (list, dict)):
-                return str(result)  # Convert to string to ensure proper serialization
-            else:
-                return str(result)
+            started = time.perf_counter()
+            results = await self.prefetch(server_name)
+            if results:
+                logger.info(
+                    f"Prefetched {sum(results.values())}/{len(results)} resource(s) from '{server_name}' "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+                )
         except Exception as e:
-            logger.error(f"Error getting resource '{resource_path}' from '{server_name}': {type(e).__name__} - {e}")
-            raise
+            logger.warning(f"Could not prefetch resources from '{server_name}': {type(e).__name__} - {e}")
+
+    def resource_cache_stats(self) -> dict:
+        """Hit rate, size and invalidations of the resource cache"""
+        stats = self.resource_cache.stats() if self.resource_cache is not None else {"enabled": False}
+        stats["subscriptions"] = {name: len(uris) for name, uris in self._resource_subscriptions.items()}
+        return stats
 
 async def main():
     """Test the MCP manager with multiple servers"""
-    manager = MCPManager()
+    manager = MCPManager(resource_cache=ResourceCache())
     
     # Connect to multiple servers
     servers = {
@@ -150,12 +1021,12 @@ async def main():
             # Call echo tool if available
             if any(tool.name == "echo" for tool in tools):
                 result = await manager.call_tool(name, "echo", {"message": f"Hello from {name}!"})
-                logger.info(f"Echo result from {name}: {result}")
+                logger.info(f"Echo result from {name}: {result.text()}")
             
             # Get conversation history
             try:
                 history = await manager.get_resource(name, "conversation://history")
-                logger.info(f"History from {name}: {history}")
+                logger.info(f"History from {name}: {history.text()}")
             except Exception as e:
                 logger.warning(f"Could not get history from {name}: {e}")
     
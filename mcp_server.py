@@ -1,5 +1,7 @@
 from fastmcp import FastMCP
 import logging
+import os
+import sys
 
 # Configure logging
 logging.basicConfig(
@@ -8,35 +10,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pure functions of their arguments: clients may cache and coalesce calls to these tools
+DETERMINISTIC = {"readOnlyHint": True, "idempotentHint": True, "openWorldHint": False}
+
+# Largest result a single tool call may produce
+MAX_OUTPUT_CHARS = int(os.getenv("MCP_MAX_OUTPUT_CHARS", "100000"))
+
 # Create an MCP server
 mcp = FastMCP(
     "Tools Server",
-    description="A server providing echo and repeat tools",
+    instructions="A server providing echo and repeat tools",
     version="1.0.0"
 )
 
-@mcp.tool()
+@mcp.tool(annotations=DETERMINISTIC)
 def echo(message: str) -> str:
     """Echoes back the input message"""
     logger.info(f"Echo tool called with message: {message}")
     return message
 
-@mcp.tool()
+@mcp.tool(annotations=DETERMINISTIC)
 def repeat(message: str, times: int = 10) -> str:
     """Repeats the input message a specified number of times (default: 10)"""
-    logger.info(f"Repeat tool called with message: {message} and times: {times}")
+    logger.info(f"Repeat tool called with message: {message[:100]} and times: {times}")
+    if times < 0:
+        return "Error: times must be a non-negative integer"
+    # Size is known up front, so oversized requests are refused before anything is allocated
+    size = len(message) * times + max(times - 1, 0)
+    if size > MAX_OUTPUT_CHARS:
+        return f"Error: output would be {size} characters, the limit is {MAX_OUTPUT_CHARS}"
     repeated = "\n".join([message] * times)
     return f"Repeating {times} times:\n{repeated}"
 
 if __name__ == "__main__":
-    logger.info("Starting MCP server...")
-    logger.info("Server will be available at http://localhost:8000/mcp")
-    logger.info("Available tools:")
-    logger.info("- echo: Echoes back the input message")
-    logger.info("- repeat: Repeats the input message a specified number of times")
-    mcp.run(
-        transport="streamable-http",
-        host="0.0.0.0",
-        port=8000,
-        path="/mcp"
-    ) 
\ No newline at end of file
+    if "--stdio" in sys.argv:
+        # Spawned as a subprocess for a "stdio:python mcp_server.py --stdio" server address;
+        # logging goes to stderr, so stdout carries only the protocol
+        mcp.run(transport="stdio")
+    else:
+        logger.info("Starting MCP server...")
+        logger.info("Server will be available at http://localhost:8000/mcp")
+        logger.info("Available tools:")
+        logger.info("- echo: Echoes back the input message")
+        logger.info("- repeat: Repeats the input message a specified number of times")
+        mcp.run(
+            transport="streamable-http",
+            host="0.0.0.0",
+            port=8000,
+            path="/mcp"
+        ) 
\ No newline at end of file
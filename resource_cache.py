@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from result_cache import CoalescingLRUCache, InFlightCall, result_size
+
+logger = logging.getLogger(__name__)
+
+ResourceKey = Tuple[str, str]
+
+
+def contents_digest(contents: Any) -> bytes:
+    """Fingerprint of resources/read contents, used to tell whether a re-read changed anything"""
+    digest = hashlib.blake2b(digest_size=16)
+    for item in contents or []:
+        for field in ("uri", "mimeType", "text", "blob"):
+            value = getattr(item, field, None)
+            if value is not None:
+                digest.update(field.encode())
+                digest.update(str(value).encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class CachedResource:
+    def __init__(self, value: Any, size: int, digest: bytes, expires_at: Optional[float], subscribed: bool):
+        self.value = value
+        self.size = size
+        self.digest = digest
+        # None: valid until the server reports an update
+        self.expires_at = expires_at
+        self.subscribed = subscribed
+
+    def is_fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > time.monotonic()
+
+
+class ResourceCache(CoalescingLRUCache):
+    """LRU cache for MCP resource reads, keyed by (server, uri) and bounded in count and bytes.
+
+    Resources the server pushes updates for (the manager subscribed to them)
+    stay cached until notifications/resources/updated marks them stale. Others
+    expire after ttl; MCP has no conditional read, so a stale or expired entry
+    is re-read and, when the contents digest is unchanged, its built result is
+    kept and only its expiry moves. Concurrent reads of one resource share a
+    single request.
+
+    on_release, when set, is called with (server, uri) whenever a subscribed
+    resource stops being cached, so the subscription can be dropped with it.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, ttl: float = 30.0):
+        super().__init__(max_entries, max_bytes)
+        self.ttl = ttl
+        self.on_release: Optional[Callable[[str, str], None]] = None
+        self.revalidated = 0
+        self.invalidations = 0
+
+    async def get_or_read(
+        self,
+        server_name: str,
+        uri: str,
+        read: Callable[[], Awaitable[Any]],
+        build: Callable[[Any], Any],
+        subscribed: bool = False,
+    ) -> Any:
+        """Return the cached result, join an in-flight read, or read() the contents and cache build(contents)"""
+        key = (server_name, uri)
+        entry = self._entries.get(key)
+        if entry is not None and entry.is_fresh() and self._usable(entry):
+            return self._hit(key)
+        return await self._shared_call(key, lambda shared: self._fill(key, shared, read, build, subscribed))
+
+    async def _fill(
+        self, key: ResourceKey, shared: InFlightCall, read: Callable[[], Awaitable[Any]],
+        build: Callable[[Any], Any], subscribed: bool,
+    ) -> Any:
+        contents = await read()
+        digest = contents_digest(contents)
+        previous = self._entries.get(key)
+        if previous is not None and previous.digest == digest and self._usable(previous):
+            # Stale or expired but unchanged: keep the built result (and any blobs it references)
+            value = previous.value
+            self.revalidated += 1
+        else:
+            value = build(contents)
+        if shared.invalidated:
+            cached = False
+        else:
+            expires_at = None if subscribed else time.monotonic() + self.ttl
+            cached = self._store(key, CachedResource(value, result_size(value), digest, expires_at, subscribed))
+        if subscribed and not cached:
+            self._release(key)
+        return value
+
+    def _dropped(self, key: ResourceKey, entry: CachedResource) -> None:
+        if entry.subscribed:
+            self._release(key)
+
+    def _release(self, key: ResourceKey) -> None:
+        if self.on_release is not None:
+            self.on_release(*key)
+
+    def holds(self, server_name: str, uri: str) -> bool:
+        """Whether the resource has an entry, fresh or not, or a read in flight"""
+        return (server_name, uri) in self._entries or (server_name, uri) in self._in_flight
+
+    def contains(self, server_name: str, uri: str) -> bool:
+        """Whether a fresh read of the resource is cached"""
+        entry = self._entries.get((server_name, uri))
+        return entry is not None and entry.is_fresh()
+
+    def mark_stale(self, server_name: str, uri: str) -> int:
+        """The server reported an update: stop serving the cached read, but keep it for revalidation.
+
+        The entry keeps its place, and its subscription, until it is re-read or
+        evicted. A read in flight is returned to its callers but not cached.
+        """
+        entry = self._entries.get((server_name, uri))
+        if entry is not None:
+            entry.expires_at = 0.0
+        if (server_name, uri) in self._in_flight:
+            self._in_flight.pop((server_name, uri)).invalidated = True
+        dropped = int(entry is not None)
+        self.invalidations += dropped
+        return dropped
+
+    def invalidate(self, server_name: str, uri: Optional[str] = None) -> int:
+        """Drop cached reads of a server, or of one of its resources, including reads in flight"""
+        dropped = self._invalidate(server_name, uri)
+        self.invalidations += dropped
+        return dropped
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            "subscribed": sum(1 for entry in self._entries.values() if entry.subscribed),
+            "ttl": self.ttl,
+            "revalidated": self.revalidated,
+            "invalidations": self.invalidations,
+        })
+        return stats
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+def canonical_arguments(arguments: Optional[dict]) -> str:
+    """Serialize tool arguments so that equal argument sets produce equal keys"""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def result_size(result: Any) -> int:
+    """Approximate number of bytes a cached result occupies"""
+    if isinstance(getattr(result, "size", None), int):
+        # Typed tool results know their inline size; their blobs live in the blob store
+        return result.size
+    if isinstance(result, str):
+        return len(result.encode("utf-8"))
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    return len(repr(result).encode("utf-8"))
+
+
+class CachedResult:
+    def __init__(self, value: Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class InFlightCall:
+    """A call shared by every concurrent caller with the same cache key"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        # Set when the key is invalidated mid-call: the result is returned but not cached
+        self.invalidated = False
+
+
+class CoalescingLRUCache:
+    """Entries in LRU order, bounded in count and total bytes, filled by calls that concurrent callers share.
+
+    The common part of ToolResultCache and ResourceCache. Keys start with the
+    server name and the tool or resource name; entries have a value and a size.
+
+    usable, when set, is asked on every hit whether a cached value can still be
+    served; values it rejects (whose blobs expired, say) count as misses.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._in_flight: Dict[Hashable, InFlightCall] = {}
+        self.usable: Optional[Callable[[Any], bool]] = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _usable(self, entry: Any) -> bool:
+        return self.usable is None or self.usable(entry.value)
+
+    def _hit(self, key: Hashable) -> Any:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key].value
+
+    async def _shared_call(self, key: Hashable, fill: Callable[[InFlightCall], Awaitable[Any]]) -> Any:
+        """Join the call in flight for key, or start fill(shared) as the one later callers join"""
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            shared = self._in_flight[key] = InFlightCall()
+            shared.task = asyncio.create_task(self._run_shared(key, shared, fill))
+
+        # The shared call outlives any single caller; it is only cancelled once nobody waits for it
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            if shared.waiters == 1 and not shared.task.done():
+                shared.task.cancel()
+            raise
+        finally:
+            shared.waiters -= 1
+
+    async def _run_shared(self, key: Hashable, shared: InFlightCall, fill: Callable[[InFlightCall], Awaitable[Any]]) -> Any:
+        try:
+            return await fill(shared)
+        finally:
+            if self._in_flight.get(key) is shared:
+                del self._in_flight[key]
+
+    def _store(self, key: Hashable, entry: Any) -> bool:
+        """Cache an entry in place of any earlier one for key, evicting as needed; False if it is too big"""
+        self._remove(key)
+        if entry.size > self.max_bytes:
+            return False
+        self._entries[key] = entry
+        self.bytes += entry.size
+        self._evict()
+        return True
+
+    def _remove(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+        return entry
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+            self._dropped(key, entry)
+
+    def _dropped(self, key: Hashable, entry: Any) -> None:
+        """Called for each entry evicted or invalidated"""
+
+    def _matching(self, keys, server_name: str, name: Optional[str]) -> list:
+        return [key for key in keys if key[0] == server_name and (name is None or key[1] == name)]
+
+    def _invalidate(self, server_name: str, name: Optional[str]) -> int:
+        """Drop the entries of a server, or of one of its tools or resources, and detach their calls in flight"""
+        keys = self._matching(self._entries, server_name, name)
+        for key in keys:
+            self._dropped(key, self._remove(key))
+        # Callers already waiting get the old result; callers arriving from now on start a fresh call
+        for key in self._matching(self._in_flight, server_name, name):
+            self._in_flight.pop(key).invalidated = True
+        return len(keys)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "in_flight": len(self._in_flight),
+            # Coalesced calls also avoided a round trip, so they count towards the hit rate
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ToolResultCache(CoalescingLRUCache):
+    """LRU cache for results of deterministic MCP tools.
+
+    Entries are keyed by (server, tool, canonical JSON arguments) and bounded both
+    in count and in total bytes. Tools are cached only when opted in, either
+    through tool_ttls ("server.tool" or "*.tool" -> seconds) or, if use_annotations
+    is set, because the server marks them readOnlyHint and idempotentHint without
+    openWorldHint. Concurrent identical calls share one in-flight request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        default_ttl: float = 300.0,
+        tool_ttls: Optional[Dict[str, float]] = None,
+        use_annotations: bool = True,
+    ):
+        super().__init__(max_entries, max_bytes)
+        self.default_ttl = default_ttl
+        self.tool_ttls = tool_ttls or {}
+        self.use_annotations = use_annotations
+
+    def ttl_for(self, server_name: str, tool_name: str, annotations: Any = None) -> Optional[float]:
+        """Seconds to cache this tool's results for, or None if it is not cacheable"""
+        for pattern in (f"{server_name}.{tool_name}", f"*.{tool_name}"):
+            if pattern in self.tool_ttls:
+                ttl = self.tool_ttls[pattern]
+                return ttl if ttl > 0 else None
+        if self.use_annotations and annotations is not None:
+            if (
+                getattr(annotations, "readOnlyHint", None)
+                and getattr(annotations, "idempotentHint", None)
+                and not getattr(annotations, "openWorldHint", None)
+            ):
+                return self.default_ttl
+        return None
+
+    async def get_or_call(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Optional[dict],
+        ttl: float,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return a cached result, join an identical in-flight call, or run call() and cache it"""
+        key = (server_name, tool_name, canonical_arguments(arguments))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic() and self._usable(entry):
+                return self._hit(key)
+            self._remove(key)
+        return await self._shared_call(key, lambda shared: self._fill(key, shared, ttl, call))
+
+    async def _fill(self, key: CacheKey, shared: InFlightCall, ttl: float, call: Callable[[], Awaitable[Any]]) -> Any:
+        value = await call()
+        if not shared.invalidated:
+            self._store(key, CachedResult(value, result_size(value), time.monotonic() + ttl))
+        return value
+
+    def invalidate(self, server_name: str, tool_name: Optional[str] = None) -> int:
+        """Drop cached results of a server, or of one of its tools"""
+        return self._invalidate(server_name, tool_name)
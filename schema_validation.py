@@ -0,0 +1,384 @@
+import logging
+import math
+import re
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A compiled check takes (value, path, errors), appends any errors and returns the value,
+# coerced where the schema allows it
+Check = Callable[[Any, str, List[dict]], Any]
+
+_INTEGER = re.compile(r"\s*[+-]?\d+\s*")
+_NUMBER = re.compile(r"\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*")
+_BOOLEANS = {"true": True, "false": False}
+
+
+class ArgumentValidationError(ValueError):
+    """Tool arguments that do not match the tool's input schema; raised before anything is sent"""
+
+    def __init__(self, server_name: str, tool_name: str, errors: List[dict]):
+        self.server_name = server_name
+        self.tool_name = tool_name
+        self.errors = errors
+        details = "; ".join(f"{error['path'] or '(arguments)'}: {error['message']}" for error in errors)
+        super().__init__(f"Invalid arguments for '{tool_name}': {details}")
+
+    def to_dict(self) -> dict:
+        return {"server": self.server_name, "tool": self.tool_name, "errors": self.errors}
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if name == "object":
+        return isinstance(value, dict)
+    if name == "array":
+        return isinstance(value, list)
+    if name == "string":
+        return isinstance(value, str)
+    if name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if name == "boolean":
+        return isinstance(value, bool)
+    if name == "null":
+        return value is None
+    # Unknown type names are the server's business
+    return True
+
+
+def _coerce(value: Any, name: str) -> Tuple[bool, Any]:
+    """Lossless conversions models commonly get wrong: "10" for 10, 10.0 for 10, "true" for true, 5 for "5\""""
+    if isinstance(value, str):
+        if name == "integer" and _INTEGER.fullmatch(value):
+            return True, int(value)
+        if name == "number" and _NUMBER.fullmatch(value):
+            return True, int(value) if _INTEGER.fullmatch(value) else float(value)
+        if name == "boolean" and value.strip().lower() in _BOOLEANS:
+            return True, _BOOLEANS[value.strip().lower()]
+    elif isinstance(value, float) and name == "integer" and value.is_integer():
+        return True, int(value)
+    elif name == "string" and isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return True, str(value)
+    return False, value
+
+
+def _multiple_of(value: Any, step: Decimal) -> bool:
+    """multipleOf in decimal arithmetic, where 0.3 is a multiple of 0.1 as the schema author meant"""
+    if isinstance(value, int):
+        if step == step.to_integral_value():
+            return value % int(step) == 0
+    elif not math.isfinite(value):
+        return False
+    # str() gives the shortest decimal that round-trips the float
+    quotient = Decimal(str(value)) / step
+    return quotient == quotient.to_integral_value()
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    # In Python True == 1; in JSON a boolean never equals a number
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    return a == b
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _error(errors: List[dict], path: str, keyword: str, message: str) -> None:
+    errors.append({"path": path, "keyword": keyword, "message": message})
+
+
+def _child(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+class SchemaValidator:
+    """A JSON Schema compiled once into a chain of small Python checks.
+
+    Covers the keywords tool schemas use in practice: type, properties, required,
+    additionalProperties, items, enum, const, numeric and length bounds, pattern,
+    anyOf/oneOf/allOf and local $refs. Other keywords are accepted unchecked and
+    left to the server. With coerce=True, values that convert losslessly to the
+    declared type (the string "10" for an integer) are converted instead of rejected.
+    """
+
+    def __init__(self, schema: Optional[dict], coerce: bool = True):
+        self.coerce = coerce
+        self._root = schema if isinstance(schema, dict) else {}
+        self._refs: Dict[str, Check] = {}
+        self._strict: Optional["SchemaValidator"] = None
+        self._check = self._compile(self._root)
+
+    def __call__(self, value: Any) -> Tuple[Any, List[dict]]:
+        """Validate a value; returns it (coerced where allowed) and the list of errors, empty if valid"""
+        errors: List[dict] = []
+        value = self._check(value, "", errors)
+        return value, errors
+
+    def _compile(self, schema: Any) -> Check:
+        if schema is False:
+            return lambda value, path, errors: _error(errors, path, "false", "no value is allowed here") or value
+        if not isinstance(schema, dict) or not schema:
+            return lambda value, path, errors: value
+
+        checks: List[Check] = []
+        if "$ref" in schema:
+            checks.append(self._compile_ref(schema["$ref"]))
+        if "type" in schema:
+            checks.append(self._compile_type(schema["type"]))
+        if "enum" in schema or "const" in schema:
+            checks.append(self._compile_enum(schema))
+        if any(key in schema for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "multipleOf")):
+            checks.append(self._compile_number(schema))
+        if any(key in schema for key in ("minLength", "maxLength", "pattern")):
+            checks.append(self._compile_string(schema))
+        if any(key in schema for key in ("properties", "required", "additionalProperties")):
+            checks.append(self._compile_object(schema))
+        if any(key in schema for key in ("items", "minItems", "maxItems", "uniqueItems")):
+            checks.append(self._compile_array(schema))
+        for keyword in ("anyOf", "oneOf", "allOf"):
+            if isinstance(schema.get(keyword), list):
+                checks.append(self._compile_combinator(keyword, schema[keyword]))
+
+        if not checks:
+            return lambda value, path, errors: value
+        if len(checks) == 1:
+            return checks[0]
+
+        def check_all(value, path, errors):
+            for check in checks:
+                value = check(value, path, errors)
+            return value
+        return check_all
+
+    def _compile_ref(self, ref: str) -> Check:
+        if not isinstance(ref, str) or not ref.startswith("#"):
+            logger.debug(f"Not checking remote schema reference {ref!r}")
+            return lambda value, path, errors: value
+
+        def check_ref(value, path, errors):
+            # Compiled on first use, so recursive definitions terminate
+            check = self._refs.get(ref)
+            if check is None:
+                check = self._refs[ref] = self._compile(self._resolve(ref))
+            return check(value, path, errors)
+        return check_ref
+
+    def _resolve(self, ref: str) -> Any:
+        target: Any = self._root
+        for part in ref.lstrip("#").split("/"):
+            if not part:
+                continue
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(target, dict) or part not in target:
+                logger.debug(f"Unresolvable schema reference {ref!r}")
+                return {}
+            target = target[part]
+        return target
+
+    def _compile_type(self, declared: Any) -> Check:
+        names = [declared] if isinstance(declared, str) else [name for name in declared if isinstance(name, str)]
+        expected = " or ".join(names)
+        coerce = self.coerce
+
+        def check_type(value, path, errors):
+            for name in names:
+                if _is_type(value, name):
+                    return value
+            if coerce:
+                for name in names:
+                    converted, coerced = _coerce(value, name)
+                    if converted:
+                        return coerced
+            _error(errors, path, "type", f"expected {expected}, got {_type_name(value)} {value!r}"[:200])
+            return value
+        return check_type
+
+    def _compile_enum(self, schema: dict) -> Check:
+        if "const" in schema:
+            allowed = [schema["const"]]
+            keyword = "const"
+        else:
+            allowed = list(schema["enum"] or [])
+            keyword = "enum"
+
+        def check_enum(value, path, errors):
+            if not any(_json_equal(value, option) for option in allowed):
+                options = ", ".join(repr(option) for option in allowed[:10])
+                _error(errors, path, keyword, f"must be one of {options}, got {value!r}"[:200])
+            return value
+        return check_enum
+
+    def _compile_number(self, schema: dict) -> Check:
+        minimum = schema.get("minimum")
+        maximum = schema.get("maximum")
+        exclusive_minimum = schema.get("exclusiveMinimum")
+        exclusive_maximum = schema.get("exclusiveMaximum")
+        multiple_of = schema.get("multipleOf")
+        step = None
+        if _is_type(multiple_of, "number") and math.isfinite(multiple_of) and multiple_of > 0:
+            step = Decimal(str(multiple_of))
+
+        def check_number(value, path, errors):
+            if not _is_type(value, "number"):
+                return value
+            if minimum is not None and value < minimum:
+                _error(errors, path, "minimum", f"must be >= {minimum}, got {value}")
+            if maximum is not None and value > maximum:
+                _error(errors, path, "maximum", f"must be <= {maximum}, got {value}")
+            if exclusive_minimum is not None and not isinstance(exclusive_minimum, bool) and value <= exclusive_minimum:
+                _error(errors, path, "exclusiveMinimum", f"must be > {exclusive_minimum}, got {value}")
+            if exclusive_maximum is not None and not isinstance(exclusive_maximum, bool) and value >= exclusive_maximum:
+                _error(errors, path, "exclusiveMaximum", f"must be < {exclusive_maximum}, got {value}")
+            if step is not None and not _multiple_of(value, step):
+                _error(errors, path, "multipleOf", f"must be a multiple of {multiple_of}, got {value}")
+            return value
+        return check_number
+
+    def _compile_string(self, schema: dict) -> Check:
+        min_length = schema.get("minLength")
+        max_length = schema.get("maxLength")
+        pattern = None
+        if isinstance(schema.get("pattern"), str):
+            try:
+                pattern = re.compile(schema["pattern"])
+            except re.error as e:
+                logger.debug(f"Not checking unsupported pattern {schema['pattern']!r}: {e}")
+
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return value
+            if min_length is not None and len(value) < min_length:
+                _error(errors, path, "minLength", f"must be at least {min_length} characters long")
+            if max_length is not None and len(value) > max_length:
+                _error(errors, path, "maxLength", f"must be at most {max_length} characters long")
+            if pattern is not None and not pattern.search(value):
+                _error(errors, path, "pattern", f"must match {pattern.pattern!r}")
+            return value
+        return check_string
+
+    def _compile_object(self, schema: dict) -> Check:
+        properties = {
+            name: self._compile(subschema)
+            for name, subschema in (schema.get("properties") or {}).items()
+        }
+        required = [name for name in schema.get("required") or [] if isinstance(name, str)]
+        additional = schema.get("additionalProperties", True)
+        check_additional = None if additional is True else self._compile(additional) if additional is not False else False
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return value
+            for name in required:
+                if name not in value:
+                    _error(errors, _child(path, name), "required", "is required")
+            result = value
+            for key, item in value.items():
+                check = properties.get(key)
+                if check is None:
+                    if check_additional is False:
+                        _error(errors, _child(path, key), "additionalProperties", "is not an accepted argument")
+                        continue
+                    if check_additional is None:
+                        continue
+                    check = check_additional
+                checked = check(item, _child(path, key), errors)
+                if checked is not item:
+                    # Copy on first coercion; the caller's arguments are never modified
+                    if result is value:
+                        result = dict(value)
+                    result[key] = checked
+            return result
+        return check_object
+
+    def _compile_array(self, schema: dict) -> Check:
+        items = schema.get("items")
+        # Tuple form (a list of schemas, one per position) is only length-checked
+        check_item = self._compile(items) if isinstance(items, (dict, bool)) else None
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        unique = schema.get("uniqueItems") is True
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return value
+            if min_items is not None and len(value) < min_items:
+                _error(errors, path, "minItems", f"must have at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                _error(errors, path, "maxItems", f"must have at most {max_items} items")
+            result = value
+            if check_item is not None:
+                for index, item in enumerate(value):
+                    checked = check_item(item, _child(path, index), errors)
+                    if checked is not item:
+                        if result is value:
+                            result = list(value)
+                        result[index] = checked
+            if unique:
+                seen: List[Any] = []
+                for item in result:
+                    if any(_json_equal(item, other) for other in seen):
+                        _error(errors, path, "uniqueItems", "must not contain duplicates")
+                        break
+                    seen.append(item)
+            return result
+        return check_array
+
+    def _compile_combinator(self, keyword: str, subschemas: list) -> Check:
+        checks = [self._compile(subschema) for subschema in subschemas]
+
+        if keyword == "allOf":
+            def check_all_of(value, path, errors):
+                for check in checks:
+                    value = check(value, path, errors)
+                return value
+            return check_all_of
+
+        # A value that matches a branch as given is never converted to fit another one,
+        # so branches are tried without coercion first and with it only if none matched
+        strict_checks = checks
+        if self.coerce:
+            if self._strict is None:
+                self._strict = SchemaValidator(self._root, coerce=False)
+            strict_checks = [self._strict._compile(subschema) for subschema in subschemas]
+
+        def match(branches, value, path):
+            matches = []
+            for check in branches:
+                branch_errors: List[dict] = []
+                checked = check(value, path, branch_errors)
+                if not branch_errors:
+                    matches.append(checked)
+                    if keyword == "anyOf":
+                        break
+            return matches
+
+        def check_branches(value, path, errors):
+            matches = match(strict_checks, value, path)
+            if not matches and strict_checks is not checks:
+                matches = match(checks, value, path)
+            if keyword == "anyOf" and not matches:
+                _error(errors, path, "anyOf", f"does not match any of the {len(checks)} accepted forms")
+            elif keyword == "oneOf" and len(matches) != 1:
+                _error(errors, path, "oneOf", f"must match exactly one of {len(checks)} forms, matched {len(matches)}")
+            return matches[0] if matches else value
+        return check_branches
@@ -1,5 +1,12 @@
 from fastmcp import FastMCP
+import asyncio
 import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from decimal import MAX_EMAX, Decimal, localcontext
+from functools import lru_cache
+from typing import Optional, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -8,47 +15,145 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pure functions of their arguments: clients may cache and coalesce calls to these tools
+DETERMINISTIC = {"readOnlyHint": True, "idempotentHint": True, "openWorldHint": False}
+
+# Limits on a single call: largest n, digits printed in full, and seconds of CPU work
+MAX_FIB_N = int(os.getenv("MATH_MAX_FIB_N", str(10**12)))
+MAX_OUTPUT_DIGITS = int(os.getenv("MATH_MAX_OUTPUT_DIGITS", "4000"))
+if hasattr(sys, "get_int_max_str_digits") and sys.get_int_max_str_digits():
+    MAX_OUTPUT_DIGITS = min(MAX_OUTPUT_DIGITS, sys.get_int_max_str_digits())
+TOOL_TIMEOUT = float(os.getenv("MATH_TOOL_TIMEOUT", "5"))
+# Calls with n above this run in the worker pool instead of on the event loop
+OFFLOAD_ABOVE_N = int(os.getenv("MATH_OFFLOAD_ABOVE_N", "2000"))
+COMPUTE_WORKERS = int(os.getenv("MATH_COMPUTE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Leading and trailing digits shown for results too long to print in full
+EDGE_DIGITS = 20
+
 # Create an MCP server
 mcp = FastMCP(
     "Math Tools Server",
-    description="A server providing letter counting and fibonacci tools",
+    instructions="A server providing letter counting and fibonacci tools",
     version="1.0.0"
 )
 
-@mcp.tool()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def compute_pool() -> ProcessPoolExecutor:
+    """Worker processes for CPU-heavy tool bodies, so they never hold the event loop or its GIL"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=COMPUTE_WORKERS)
+    return _pool
+
+
+@lru_cache(maxsize=4096)
+def fib_pair(n: int) -> Tuple[int, int]:
+    """(F(n), F(n+1)) by fast doubling: O(log n) steps, memoized across calls"""
+    if n == 0:
+        return 0, 1
+    a, b = fib_pair(n >> 1)
+    c = a * (2 * b - a)
+    d = a * a + b * b
+    return (d, c + d) if n & 1 else (c, d)
+
+
+def fib_mod(n: int, m: int) -> int:
+    """F(n) mod m by iterative fast doubling; numbers never exceed m squared"""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * ((2 * b - a) % m) % m
+        d = (a * a + b * b) % m
+        a, b = (d, (c + d) % m) if bit == "1" else (c, d)
+    return a
+
+
+def fib_digits(n: int) -> int:
+    """Number of decimal digits of F(n), without computing F(n)"""
+    if n < 7:
+        return 1
+    if n <= 4 * MAX_OUTPUT_DIGITS:
+        return len(str(fib_pair(n)[0]))
+    return fib_leading(n, 1)[1]
+
+
+def fib_leading(n: int, count: int) -> Tuple[str, int]:
+    """First count digits of F(n) and its digit count, from Binet's formula phi**n / sqrt(5).
+
+    The dropped psi**n term is below 10**-(n/5), far under the working precision.
+    """
+    with localcontext() as ctx:
+        ctx.prec = count + len(str(n)) + 20
+        ctx.Emax = MAX_EMAX
+        sqrt5 = Decimal(5).sqrt()
+        value = ((1 + sqrt5) / 2) ** n / sqrt5
+        digits = value.adjusted() + 1
+        leading = value.scaleb(count - digits).to_integral_value(rounding="ROUND_FLOOR")
+    return str(leading), digits
+
+
+def fibonacci_text(n: int) -> str:
+    """The fibonacci tool's answer: F(n) in full, or its edges and length when it is too long"""
+    digits = fib_digits(n)
+    if digits <= MAX_OUTPUT_DIGITS:
+        return f"Fibonacci({n}) = {fib_pair(n)[0]}"
+    leading, _ = fib_leading(n, EDGE_DIGITS)
+    trailing = str(fib_mod(n, 10**EDGE_DIGITS)).zfill(EDGE_DIGITS)
+    return (
+        f"Fibonacci({n}) has {digits} digits, too many to print "
+        f"(limit {MAX_OUTPUT_DIGITS}): {leading}...{trailing}"
+    )
+
+
+async def run_bounded(fn, *args):
+    """Run fn in the worker pool with the per-call time limit.
+
+    A call that times out returns an error to its client right away; the
+    worker finishes in the background, bounded by the input limits above.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(compute_pool(), fn, *args), TOOL_TIMEOUT)
+
+
+@mcp.tool(annotations=DETERMINISTIC)
 def count_letters(word: str) -> str:
     """Count the number of letters in a word"""
-    logger.info(f"Count letters tool called with word: {word}")
+    logger.info(f"Count letters tool called with word: {word[:100]}")
     count = len(word)
     return f"The word '{word}' has {count} letters"
 
-@mcp.tool()
-def fibonacci(n: int) -> str:
+
+@mcp.tool(annotations=DETERMINISTIC)
+async def fibonacci(n: int) -> str:
     """Calculate the fibonacci number for a given input"""
     logger.info(f"Fibonacci tool called with n: {n}")
     if n < 0:
         return "Error: Input must be a non-negative integer"
-    
-    def fib(n):
-        if n <= 1:
-            return n
-        a, b = 0, 1
-        for _ in range(2, n + 1):
-            a, b = b, a + b
-        return b
-    
-    result = fib(n)
-    return f"Fibonacci({n}) = {result}"
+    if n > MAX_FIB_N:
+        return f"Error: n must be at most {MAX_FIB_N}"
+    if n <= OFFLOAD_ABOVE_N:
+        return fibonacci_text(n)
+    try:
+        return await run_bounded(fibonacci_text, n)
+    except asyncio.TimeoutError:
+        return f"Error: computation exceeded the {TOOL_TIMEOUT:g}s time limit"
+
 
 if __name__ == "__main__":
-    logger.info("Starting second MCP server...")
-    logger.info("Server will be available at http://localhost:8002/mcp")
-    logger.info("Available tools:")
-    logger.info("- count_letters: Count the number of letters in a word")
-    logger.info("- fibonacci: Calculate the fibonacci number for a given input")
-    mcp.run(
-        transport="streamable-http",
-        host="0.0.0.0",
-        port=8002,
-        path="/mcp"
-    ) 
\ No newline at end of file
+    if "--stdio" in sys.argv:
+        # Spawned as a subprocess for a "stdio:python second_mcp_server.py --stdio" server address;
+        # logging goes to stderr, so stdout carries only the protocol
+        mcp.run(transport="stdio")
+    else:
+        logger.info("Starting second MCP server...")
+        logger.info("Server will be available at http://localhost:8002/mcp")
+        logger.info("Available tools:")
+        logger.info("- count_letters: Count the number of letters in a word")
+        logger.info("- fibonacci: Calculate the fibonacci number for a given input")
+        mcp.run(
+            transport="streamable-http",
+            host="0.0.0.0",
+            port=8002,
+            path="/mcp"
+        )
@@ -1,19 +1,24 @@
-from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, List
-import aiohttp
 import asyncio
 import os
+import time
 from dotenv import load_dotenv
-from mcp_client import MCPManager
+from mcp_client import MCPManager, preload, transport_kind
+from resource_cache import ResourceCache
+from result_cache import ToolResultCache
+from schema_validation import ArgumentValidationError
+from tool_results import BlobStore
+from http_responses import CachedStaticFiles, CompressionMiddleware, FastJSONResponse, VersionedIndex, dumps
 import logging
 from contextlib import asynccontextmanager
-from anthropic import Anthropic
-import json
-import re
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from chat_agent import ChatAgent
+from sessions import SessionStore
+from metrics import configure_tracing, registry, span
+from shared_state import ServerRegistry, follow_registry
 
 # Configure logging
 logging.basicConfig(
@@ -24,40 +29,144 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-# Initialize Anthropic client
 api_key = os.getenv("ANTHROPIC_API_KEY")
-if not api_key:
-    raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
-anthropic = Anthropic(api_key=api_key)
+
+# Fast-start mode: accept traffic as soon as the app is up, create the Anthropic client on the
+# first chat and connect to MCP servers in the background; /readyz reports when that is done
+FAST_START = os.getenv("FAST_START", "false").lower() in ("1", "true", "yes")
+
+# Model calls share one pooled HTTP client; the semaphore caps in-flight requests so a
+# burst of chats queues here instead of opening unbounded connections upstream.
+ANTHROPIC_MAX_CONCURRENCY = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "16"))
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "32"))
+ANTHROPIC_TIMEOUT = float(os.getenv("ANTHROPIC_TIMEOUT", "60"))
+ANTHROPIC_CONNECT_TIMEOUT = float(os.getenv("ANTHROPIC_CONNECT_TIMEOUT", "5"))
+ANTHROPIC_MAX_RETRIES = int(os.getenv("ANTHROPIC_MAX_RETRIES", "2"))
+
+class LazyAnthropic:
+    """The pooled AsyncAnthropic client, built on first use.
+
+    Importing the SDK and opening its connection pool is left out of module
+    import; attribute access (anthropic.messages...) creates the client.
+    """
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def get(self):
+        if self._client is None:
+            if not api_key:
+                raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+            import httpx
+            from anthropic import AsyncAnthropic
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=ANTHROPIC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ANTHROPIC_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(ANTHROPIC_TIMEOUT, connect=ANTHROPIC_CONNECT_TIMEOUT),
+            )
+            self._client = AsyncAnthropic(
+                api_key=api_key,
+                http_client=http_client,
+                timeout=httpx.Timeout(ANTHROPIC_TIMEOUT, connect=ANTHROPIC_CONNECT_TIMEOUT),
+                max_retries=ANTHROPIC_MAX_RETRIES,
+            )
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+anthropic = LazyAnthropic()
+anthropic_semaphore = asyncio.Semaphore(ANTHROPIC_MAX_CONCURRENCY)
+
+def parse_server_list(value: str, variable: str = "MCP_SERVERS") -> Dict[str, str]:
+    """Parse a comma-separated list of name=value pairs such as MCP_SERVERS"""
+    servers = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, _, url = entry.partition("=")
+        if not url:
+            raise ValueError(f"Invalid {variable} entry {entry!r}; expected name=value")
+        servers[name.strip()] = url.strip()
+    return servers
+
+# First connection round to the configured MCP servers; /readyz waits for it
+startup_task: Optional[asyncio.Task] = None
+started_at = time.monotonic()
+
+async def start_mcp(servers: Dict[str, str], pool_sizes: Dict[str, int]) -> Optional[asyncio.Task]:
+    """Connect to the configured servers and start supervising them; returns the registry follower, if any"""
+    # The MCP client stack is imported on first use; warm it in a thread so the event loop keeps serving
+    await asyncio.to_thread(preload)
+    registry_sync = None
+    if server_registry is not None:
+        # Multi-worker mode: the shared registry decides which servers every worker connects to
+        if await server_registry.seed(servers, pool_sizes):
+            logger.info("Seeded the shared server registry from MCP_SERVERS")
+        _, registered = await server_registry.servers()
+        await mcp_manager.sync_servers(registered)
+        registry_sync = asyncio.create_task(follow_registry(server_registry, mcp_manager, registry_sync_interval))
+    else:
+        results = await mcp_manager.connect_all(servers, pool_sizes)
+        for server_name, success in results.items():
+            if success:
+                logger.info(f"Successfully connected to MCP server '{server_name}' on startup.")
+            else:
+                logger.error(f"Could not connect to MCP server '{server_name}' on startup; the supervisor will keep retrying.")
+    mcp_manager.start_supervisor()
+    logger.info(f"MCP startup finished {time.monotonic() - started_at:.2f}s after the app started")
+    return registry_sync
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    default_mcp_server_url = "http://localhost:8000/mcp" # Full path
-    default_server_name = "default_mcp"
-    logger.info(f"Attempting to connect to default MCP server '{default_server_name}' at {default_mcp_server_url} on startup.")
-    
-    # Perform a quick availability check first
-    if await check_server_availability(default_mcp_server_url):
-        logger.info(f"Basic availability check passed for {default_mcp_server_url}. Proceeding with FastMCP connection.")
-        success = await mcp_manager.connect(default_server_name, default_mcp_server_url)
-        if success:
-            logger.info(f"Successfully connected to default MCP server '{default_server_name}' using MCPManager.")
-            try:
-                tools = await mcp_manager.list_tools(default_server_name)
-                logger.info(f"Tools on '{default_server_name}': {tools}")
-            except Exception as e:
-                logger.error(f"Error listing tools on default server after startup connection: {e}")
-        else:
-            logger.error(f"Failed to connect to default MCP server '{default_server_name}' using MCPManager after availability check.")
+    global startup_task, started_at
+    # Startup: connect to every configured server concurrently, then keep them supervised
+    started_at = time.monotonic()
+    servers = parse_server_list(os.getenv("MCP_SERVERS", "default_mcp=http://localhost:8000/mcp"))
+    logger.info(f"Connecting to {len(servers)} MCP server(s) on startup: {servers}")
+    pool_sizes = {
+        name: int(size)
+        for name, size in parse_server_list(os.getenv("MCP_POOL_SIZES", ""), "MCP_POOL_SIZES").items()
+    }
+    if FAST_START:
+        # Listed as "connecting" by /api/servers until the background attempt settles
+        if server_registry is None:
+            mcp_manager.register(servers, pool_sizes)
+        startup_task = asyncio.create_task(start_mcp(servers, pool_sizes))
     else:
-        logger.error(f"Basic availability check failed for default MCP server at {default_mcp_server_url}. Will not attempt FastMCP connection on startup.")
+        # Fails startup right away when the API key is missing
+        anthropic.get()
+        startup_task = asyncio.create_task(start_mcp(servers, pool_sizes))
+        await startup_task
     
     yield
     
     # Disconnect from all servers
-    for server_name in list(mcp_manager._clients.keys()):
-        await mcp_manager.disconnect(server_name)
+    registry_sync = None
+    if not startup_task.done():
+        startup_task.cancel()
+    try:
+        registry_sync = await startup_task
+    except (asyncio.CancelledError, Exception):
+        pass
+    if registry_sync is not None:
+        registry_sync.cancel()
+    if server_registry is not None:
+        server_registry.close()
+    await mcp_manager.close()
+    await anthropic.close()
+    session_store.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -70,11 +179,137 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Responses are compressed (brotli or gzip) when the client accepts it and the body is large enough
+if os.getenv("HTTP_COMPRESSION", "true").lower() in ("1", "true", "yes"):
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("HTTP_COMPRESSION_MIN_SIZE", "1024")),
+        gzip_level=int(os.getenv("HTTP_GZIP_LEVEL", "6")),
+        brotli_quality=int(os.getenv("HTTP_BROTLI_QUALITY", "4")),
+    )
+
+# Mount static files; versioned asset URLs from the index page are cached as immutable
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+index_page = VersionedIndex("static/index.html", "static")
+
+# Multi-worker mode: with SHARED_STATE_PATH set, the server registry and conversations live in
+# that SQLite file, and every worker keeps its own connections in sync with the registry
+shared_state_path = os.getenv("SHARED_STATE_PATH") or None
+server_registry = ServerRegistry(shared_state_path) if shared_state_path else None
+registry_sync_interval = float(os.getenv("REGISTRY_SYNC_INTERVAL", "1"))
+
+# python: and stdio: servers run code on this host, so by default only MCP_SERVERS may name them
+ALLOW_LOCAL_TRANSPORTS = os.getenv("MCP_ALLOW_LOCAL_TRANSPORTS", "false").lower() in ("1", "true", "yes")
 
-# Instantiate the MCP manager
-mcp_manager = MCPManager()
+# /api/tools/batch: calls accepted per request, and calls in flight per server unless the request says otherwise
+BATCH_MAX_CALLS = int(os.getenv("BATCH_MAX_CALLS", "1000"))
+BATCH_PER_SERVER_CONCURRENCY = int(os.getenv("BATCH_PER_SERVER_CONCURRENCY", "8"))
+
+# Instantiate the MCP manager; tool catalogs are cached and refreshed on change or TTL expiry
+mcp_manager = MCPManager(
+    tool_cache_ttl=float(os.getenv("MCP_TOOL_CACHE_TTL", "300")),
+    health_interval=float(os.getenv("MCP_HEALTH_INTERVAL", "15")),
+    backoff_max=float(os.getenv("MCP_RECONNECT_BACKOFF_MAX", "60")),
+    # Servers with per-session state (the file server's cd) need MCP_POOL_SIZES=<name>=1
+    pool_size=int(os.getenv("MCP_POOL_SIZE", "1")),
+    max_in_flight=int(os.getenv("MCP_MAX_IN_FLIGHT", "32")),
+    max_queue=int(os.getenv("MCP_MAX_QUEUE", "64")),
+    result_cache=ToolResultCache(
+        max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("TOOL_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+        default_ttl=float(os.getenv("TOOL_CACHE_TTL", "300")),
+        # e.g. "math.fibonacci=3600,*.echo=60"; a TTL of 0 disables caching for that tool
+        tool_ttls={
+            name: float(ttl)
+            for name, ttl in parse_server_list(os.getenv("TOOL_CACHE_TTLS", ""), "TOOL_CACHE_TTLS").items()
+        },
+        use_annotations=os.getenv("TOOL_CACHE_USE_ANNOTATIONS", "true").lower() in ("1", "true", "yes"),
+    ),
+    # Text beyond this many chars per result is truncated for the model; the full output stays downloadable
+    max_result_chars=int(os.getenv("TOOL_RESULT_MAX_CHARS", "100000")),
+    blob_store=BlobStore(
+        max_bytes=int(os.getenv("TOOL_BLOB_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl=float(os.getenv("TOOL_BLOB_TTL", "600")),
+    ),
+    # Arguments are checked against each tool's input schema before the call; "10" for an integer is coerced
+    validate_arguments=os.getenv("TOOL_ARGUMENT_VALIDATION", "true").lower() in ("1", "true", "yes"),
+    coerce_arguments=os.getenv("TOOL_ARGUMENT_COERCION", "true").lower() in ("1", "true", "yes"),
+    # Resource reads are cached until the server reports an update, or for RESOURCE_CACHE_TTL when it can't
+    resource_cache=ResourceCache(
+        max_entries=int(os.getenv("RESOURCE_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("RESOURCE_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+        ttl=float(os.getenv("RESOURCE_CACHE_TTL", "30")),
+    ),
+    subscribe_resources=os.getenv("RESOURCE_SUBSCRIBE", "true").lower() in ("1", "true", "yes"),
+    prefetch_resources=os.getenv("RESOURCE_PREFETCH", "false").lower() in ("1", "true", "yes"),
+)
+
+# Conversation history per session id, bounded in count, age and tokens
+session_store = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX", "1000")),
+    ttl=float(os.getenv("SESSION_TTL", "3600")),
+    token_budget=int(os.getenv("SESSION_TOKEN_BUDGET", "8000")),
+    max_tool_result_chars=int(os.getenv("SESSION_MAX_TOOL_RESULT_CHARS", "4000")),
+    spill_path=shared_state_path or os.getenv("SESSION_SPILL_PATH"),
+    shared=shared_state_path is not None,
+)
+
+chat_agent = ChatAgent(
+    mcp_manager,
+    anthropic,
+    anthropic_semaphore,
+    tool_result_chunk_size=int(os.getenv("TOOL_RESULT_CHUNK_SIZE", "4096")),
+    max_steps=int(os.getenv("CHAT_MAX_STEPS", "8")),
+    turn_deadline=float(os.getenv("CHAT_TURN_DEADLINE", "120")),
+    prompt_caching=os.getenv("PROMPT_CACHING", "true").lower() in ("1", "true", "yes"),
+    tool_top_k=int(os.getenv("TOOL_TOP_K", "20")),
+    # Also run {"tool": ..., "parameters": ...} objects written in reply text (models without native tool use)
+    text_tool_calls=os.getenv("CHAT_TEXT_TOOL_CALLS", "false").lower() in ("1", "true", "yes"),
+    # Tool calls may use this fraction of the turn's remaining budget; the rest is kept for the model's answer
+    tool_budget_share=float(os.getenv("CHAT_TOOL_BUDGET_SHARE", "0.5")),
+)
+
+# Scrape-time views of the stats the components already keep; spans are exported over OTLP when configured
+configure_tracing()
+registry.gauge(
+    "mcp_server_up", "1 if the server's MCP session is connected", ["server"],
+    lambda: {(name,): float(status["state"] == "connected") for name, status in mcp_manager.server_status().items()},
+)
+registry.gauge(
+    "mcp_pool_in_flight", "Tool calls currently running per server", ["server"],
+    lambda: {(name,): pool["in_flight"] for name, pool in mcp_manager.pool_stats().items()},
+)
+registry.gauge(
+    "mcp_pool_waiting", "Tool calls queued for a free slot per server", ["server"],
+    lambda: {(name,): pool["waiting"] for name, pool in mcp_manager.pool_stats().items()},
+)
+registry.gauge(
+    "mcp_pool_rejected_total", "Tool calls rejected because the server's queue was full", ["server"],
+    lambda: {(name,): pool["rejected"] for name, pool in mcp_manager.pool_stats().items()},
+    metric_type="counter",
+)
+registry.gauge(
+    "tool_result_cache_lookups_total", "Tool result cache lookups by result", ["result"],
+    lambda: {(key,): mcp_manager.result_cache.stats()[key] for key in ("hits", "misses", "coalesced")},
+    metric_type="counter",
+)
+registry.gauge(
+    "tool_result_cache_bytes", "Bytes held by the tool result cache", [],
+    lambda: {(): mcp_manager.result_cache.bytes},
+)
+registry.gauge(
+    "resource_cache_lookups_total", "Resource cache lookups by result", ["result"],
+    lambda: {(key,): mcp_manager.resource_cache.stats()[key] for key in ("hits", "misses", "coalesced")},
+    metric_type="counter",
+)
+registry.gauge(
+    "resource_cache_bytes", "Bytes held by the resource cache", [],
+    lambda: {(): mcp_manager.resource_cache.bytes},
+)
+registry.gauge(
+    "chat_sessions", "Conversations held in memory", [],
+    lambda: {(): session_store.in_memory},
+)
 
 # Data models
 class ServerConfig(BaseModel):
@@ -86,45 +321,61 @@ class ConnectionRequest(BaseModel):
     server_name: str
     server_url: str
     api_key: Optional[str] = None
+    pool_size: Optional[int] = Field(default=None, ge=1, le=64)
 
 class ChatRequest(BaseModel):
     message: str  # Removed server_name since we'll use all servers
+    session_id: Optional[str] = None  # Continue an earlier conversation
+    pinned_tools: Optional[List[str]] = None  # "server.tool" names always offered to the model
+    timeout: Optional[float] = Field(default=None, gt=0)  # Deadline budget in seconds, at most CHAT_TURN_DEADLINE
 
 class DisconnectRequest(BaseModel):
     server_name: str
 
-async def check_server_availability(url: str) -> bool:
-    """Basic check if an HTTP server is listening at the URL (before full MCP connection)."""
-    logger.info(f"Performing basic availability check for URL: {url}")
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=3) as response:
-                # We just care if it responds, status 200-4xx is fine for a basic ping
-                logger.info(f"Availability check for {url} got status: {response.status}")
-                return True # Server is at least responding to HTTP
-    except asyncio.TimeoutError:
-        logger.error(f"Timeout during basic availability check for {url}")
-        return False
-    except aiohttp.ClientConnectorError as e:
-        logger.error(f"Connection error during basic availability check for {url}: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error during basic availability check for {url}: {e}")
-        return False
+class BatchToolCall(BaseModel):
+    server: str
+    tool: str
+    arguments: Dict = Field(default_factory=dict)
+    id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    calls: List[BatchToolCall] = Field(max_length=BATCH_MAX_CALLS)
+    # Calls in flight per server for this batch; defaults to BATCH_PER_SERVER_CONCURRENCY
+    per_server_concurrency: Optional[int] = Field(default=None, ge=1, le=256)
+    # Per-call timeout in seconds
+    timeout: Optional[float] = Field(default=None, gt=0)
 
 @app.post("/api/connect")
 async def connect_mcp_server(request: ConnectionRequest):
     logger.info(f"API call to connect to MCP server: '{request.server_name}' at {request.server_url}")
     
-    if not request.server_url.startswith(("http://", "https://")):
-        raise HTTPException(status_code=400, detail="Invalid server_url format. Must include http:// or https://")
+    kind = transport_kind(request.server_url)
+    if kind == "http" and not request.server_url.startswith(("http://", "https://")):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid server_url format. Must include http:// or https://, or start with python: or stdio:",
+        )
+    if kind != "http" and not ALLOW_LOCAL_TRANSPORTS:
+        raise HTTPException(
+            status_code=403,
+            detail=f"{kind}: servers can only be added through MCP_SERVERS unless MCP_ALLOW_LOCAL_TRANSPORTS is set",
+        )
 
-    # The server_url for connect should already include the /mcp path if needed by FastMCP server
-    if await check_server_availability(request.server_url):
-        logger.info(f"Basic availability check passed for '{request.server_name}'. Proceeding with FastMCP connection.")
-        success = await mcp_manager.connect(request.server_name, request.server_url)
+    # The server_url for connect should already include the /mcp path if needed by FastMCP server;
+    # in-process and stdio servers have no HTTP endpoint to probe
+    if kind != "http" or await mcp_manager.probe(request.server_url):
+        logger.info(f"Availability check passed for '{request.server_name}'. Proceeding with FastMCP connection.")
+        success = await mcp_manager.connect(
+            request.server_name,
+            request.server_url,
+            supervise=server_registry is not None,
+            pool_size=request.pool_size,
+        )
         if success:
             logger.info(f"Successfully initiated connection to '{request.server_name}'.")
+            if server_registry is not None:
+                # The other workers pick the server up on their next registry sync
+                await server_registry.put(request.server_name, request.server_url, request.pool_size)
             return {"status": "connected", "server_name": request.server_name}
         else:
             logger.error(f"Failed to connect to '{request.server_name}' using MCPManager after availability check.")
@@ -137,6 +388,8 @@ async def connect_mcp_server(request: ConnectionRequest):
 async def disconnect_mcp_server(request: DisconnectRequest):
     logger.info(f"API call to disconnect from MCP server: '{request.server_name}'")
     success = await mcp_manager.disconnect(request.server_name)
+    if server_registry is not None:
+        await server_registry.remove(request.server_name)
     if success:
         logger.info(f"Successfully processed disconnect for '{request.server_name}'.")
         return {"status": "disconnected", "server_name": request.server_name}
@@ -145,118 +398,271 @@ async def disconnect_mcp_server(request: DisconnectRequest):
         logger.warning(f"Disconnect for '{request.server_name}' completed, possibly with minor issues (e.g., already disconnected).")
         return {"status": "disconnected_with_issues_or_not_found", "server_name": request.server_name}
 
+class ClientDisconnected(Exception):
+    """The HTTP client went away while its request was being handled"""
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request):
+    """Cancel the current task when the client disconnects, raising ClientDisconnected in it.
+
+    A closed tab or an aborted fetch() then stops the turn's model stream and tool
+    calls instead of letting them run to completion for nobody.
+    """
+    task = asyncio.current_task()
+    disconnected = False
+
+    async def watch():
+        nonlocal disconnected
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        disconnected = True
+        task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        if hasattr(task, "uncancel"):
+            task.uncancel()
+        raise ClientDisconnected() from None
+    finally:
+        watcher.cancel()
+
 @app.post("/api/chat")
-async def chat(request: Request):
+async def chat(chat_request: ChatRequest, request: Request):
     try:
-        data = await request.json()
-        message = data.get("message", "")
-        
-        # Get response from Claude with all available tools
-        all_tools = []
-        for server_name in mcp_manager._clients.keys():
-            if mcp_manager.is_connected(server_name):
-                try:
-                    tools = await mcp_manager.list_tools(server_name)
-                    logger.info(f"Found {len(tools)} tools on server {server_name}")
-                    for tool in tools:
-                        tool_info = {
-                            "name": f"{server_name}.{tool.name}",  # Prefix tool name with server
-                            "description": tool.description,
-                            "input_schema": tool.inputSchema,
-                            "server": server_name
-                        }
-                        logger.info(f"Adding tool: {tool_info['name']}")
-                        all_tools.append(tool_info)
-                except Exception as e:
-                    logger.error(f"Error getting tools from server {server_name}: {e}")
-        
-        logger.info(f"Total tools available: {len(all_tools)}")
-        
-        # Create system message with tool descriptions
-        system_content = f"""You are a helpful AI assistant with access to the following tools:
-{json.dumps(all_tools, indent=2)}
-
-When you need to use a tool, respond with a JSON object in this format:
-{{
-    "tool": "server_name.tool_name",
-    "parameters": {{
-        "param_name": "param_value"
-    }}
-}}
-
-For example, to use the echo tool, respond with:
-{{
-    "tool": "default_mcp.echo",
-    "parameters": {{
-        "message": "your message here"
-    }}
-}}
-
-Otherwise, respond normally with your message."""
-        
-        # Get response from Claude
-        response = anthropic.messages.create(
-            model="claude-3-7-sonnet-20250219",
-            max_tokens=1024,
-            system=system_content,
-            messages=[{"role": "user", "content": message}]
-        )
-        
-        # Check if response is a tool call
-        try:
-            response_text = response.content[0].text.strip()
-            # Try to extract JSON from code block
-            code_block_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', response_text)
-            if code_block_match:
-                json_str = code_block_match.group(1)
-                tool_call = json.loads(json_str)
-            else:
-                # Try to find the first JSON object in the text
-                json_match = re.search(r'(\{[\s\S]*\})', response_text)
-                if json_match:
-                    tool_call = json.loads(json_match.group(1))
-                else:
-                    tool_call = json.loads(response_text)
-            
-            if isinstance(tool_call, dict) and "tool" in tool_call and "parameters" in tool_call:
-                # Parse server and tool name
-                server_name, tool_name = tool_call["tool"].split(".", 1)
-                logger.info(f"Executing tool call: {tool_name} on server {server_name}")
-                # Execute the tool call
-                tool_response = await mcp_manager.call_tool(
-                    server_name,
-                    tool_name,
-                    tool_call["parameters"]
-                )
-                return {"response": str(tool_response)}
-        except Exception as e:
-            logger.error(f"Tool call parsing/execution failed: {e}")
-            # Not a tool call, return Claude's response
-            pass
-        
-        return {"response": response.content[0].text}
+        session = await session_store.get_or_create(chat_request.session_id)
+        response_text = ""
+        async with cancel_on_disconnect(request):
+            async with session.lock:
+                with span("turn"):
+                    async for event in chat_agent.run(
+                        chat_request.message, session, chat_request.pinned_tools, chat_request.timeout
+                    ):
+                        if event["type"] == "done":
+                            response_text = event["response"]
+                await session_store.save(session)
+        return FastJSONResponse({"response": response_text, "session_id": session.session_id})
+    except ClientDisconnected:
+        logger.info("Client disconnected; chat turn cancelled")
+        # Nobody is left to read this
+        return FastJSONResponse({"detail": "Client disconnected"}, status_code=499)
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def format_sse(event: dict) -> bytes:
+    """Encode a chat event as a Server-Sent Events frame"""
+    return b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream(chat_request: ChatRequest, request: Request):
+    """Stream a chat turn as Server-Sent Events: tokens, tool start/result/end, done"""
+    session = await session_store.get_or_create(chat_request.session_id)
+
+    async def event_stream():
+        try:
+            async with cancel_on_disconnect(request):
+                async with session.lock:
+                    with span("turn"):
+                        async for event in chat_agent.run(
+                            chat_request.message, session, chat_request.pinned_tools, chat_request.timeout
+                        ):
+                            yield format_sse(event)
+                    await session_store.save(session)
+        except ClientDisconnected:
+            logger.info("Client disconnected; chat turn cancelled")
+        except Exception as e:
+            logger.error(f"Error in chat stream: {e}")
+            yield format_sse({"type": "error", "detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/api/servers")
 async def list_servers():
-    """List all connected servers"""
-    connected_servers = []
-    for server_name in mcp_manager._clients.keys():
-        if mcp_manager.is_connected(server_name):
-            connected_servers.append(server_name)
-    logger.info(f"Listing connected servers: {connected_servers}")
-    return {"servers": connected_servers}
+    """List all connected servers, plus per-server state and handshake latency"""
+    connected_servers = mcp_manager.connected_servers()
+    logger.debug(f"Listing connected servers: {connected_servers}")
+    return FastJSONResponse({"servers": connected_servers, "details": mcp_manager.server_status()})
+
+@app.get("/healthz")
+async def liveness():
+    """Liveness: the process is up and its event loop answers"""
+    return {"status": "ok", "uptime_seconds": round(time.monotonic() - started_at, 3)}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: the first MCP connection round is over and the model API is configured.
+
+    Servers that failed that round do not hold readiness back; the supervisor
+    keeps reconnecting them, and their state is listed here and in /api/servers.
+    """
+    startup_ok = (
+        startup_task is not None and startup_task.done()
+        and not startup_task.cancelled() and startup_task.exception() is None
+    )
+    checks = {"mcp_startup": startup_ok, "anthropic_api_key": bool(api_key)}
+    ready = all(checks.values())
+    return FastJSONResponse(
+        {
+            "ready": ready,
+            "checks": checks,
+            "servers": {name: status["state"] for name, status in mcp_manager.server_status().items()},
+        },
+        status_code=200 if ready else 503,
+    )
+
+@app.get("/api/sessions")
+async def session_stats():
+    """Report how many conversations are held in memory and on disk"""
+    return await session_store.stats()
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a conversation"""
+    return {"deleted": await session_store.delete(session_id), "session_id": session_id}
+
+@app.get("/api/servers/pools")
+async def server_pool_stats():
+    """Report session pool utilization per server, for sizing MCP_POOL_SIZE(S)"""
+    return {"pools": mcp_manager.pool_stats()}
+
+async def run_batch_call(index: int, call: BatchToolCall, limit: asyncio.Semaphore, timeout: Optional[float]) -> dict:
+    """Run one call of a batch and describe its outcome as one NDJSON record"""
+    record = {"index": index, "id": call.id, "server": call.server, "tool": call.tool}
+    async with limit:
+        started = time.perf_counter()
+        try:
+            result = await mcp_manager.call_tool(call.server, call.tool, call.arguments, timeout=timeout)
+            record.update(ok=True, result=result.to_dict())
+        except asyncio.TimeoutError:
+            record.update(ok=False, error=f"Timed out after {timeout}s")
+        except ArgumentValidationError as e:
+            record.update(ok=False, error=str(e), validation_errors=e.errors)
+        except Exception as e:
+            record.update(ok=False, error=f"{type(e).__name__}: {e}")
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+@app.post("/api/tools/batch")
+async def call_tools_batch(batch: BatchRequest):
+    """Call many tools directly, without the model; results stream back as NDJSON in completion order"""
+    per_server = batch.per_server_concurrency or BATCH_PER_SERVER_CONCURRENCY
+    # Per-server limits keep a large batch below the pool's queue bound instead of being rejected by it
+    limits = {
+        server: asyncio.Semaphore(min(per_server, mcp_manager.admission_limit(server)))
+        for server in {call.server for call in batch.calls}
+    }
+
+    async def results():
+        tasks = [
+            asyncio.create_task(run_batch_call(index, call, limits[call.server], batch.timeout))
+            for index, call in enumerate(batch.calls)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield dumps(await next_done) + b"\n"
+        finally:
+            # The client went away: stop the calls still running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.get("/api/tools/cache")
+async def tool_result_cache_stats():
+    """Report hit rate and size of the tool result cache"""
+    return mcp_manager.result_cache.stats()
+
+@app.get("/api/resources/cache")
+async def resource_cache_stats():
+    """Report hit rate, size and subscriptions of the resource cache"""
+    return mcp_manager.resource_cache_stats()
+
+@app.get("/api/servers/{server_name}/resources")
+async def list_server_resources(server_name: str):
+    """List a server's resources, marking the ones currently cached"""
+    try:
+        resources = await mcp_manager.list_resources(server_name)
+    except ConnectionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"{type(e).__name__}: {e}")
+    return FastJSONResponse({
+        "server": server_name,
+        "resources": [
+            {
+                "uri": str(resource.uri),
+                "name": resource.name,
+                "mime_type": resource.mimeType,
+                "size": resource.size,
+                "cached": mcp_manager.resource_cache.contains(server_name, str(resource.uri)),
+            }
+            for resource in resources
+        ],
+    })
+
+# Blob types a browser may render inline; the MCP server picks the type, so anything else
+# (HTML, SVG, scripts) is served as an opaque download that cannot run in this origin
+INLINE_BLOB_TYPES = frozenset({"image/png", "image/jpeg", "image/gif", "image/webp", "text/plain", "application/json"})
+
+@app.get("/api/blobs/{blob_id}")
+async def download_blob(blob_id: str):
+    """Download binary or truncated tool output that was returned by reference"""
+    blob = mcp_manager.blobs.get(blob_id)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Blob not found or expired")
+    media_type = blob.mime_type.partition(";")[0].strip().lower()
+    if media_type in INLINE_BLOB_TYPES:
+        disposition = "inline"
+    else:
+        media_type, disposition = "application/octet-stream", "attachment"
+    return StreamingResponse(
+        blob.iter_bytes(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'{disposition}; filename="{blob_id}"',
+            "X-Content-Type-Options": "nosniff",
+        },
+    )
+
+@app.get("/api/blobs")
+async def blob_store_stats():
+    """Report the size of the blob store"""
+    return mcp_manager.blobs.stats()
+
+@app.get("/api/tools/catalog")
+async def tool_catalog_stats():
+    """Report the age and hit/miss counters of each server's cached tool catalog"""
+    return {"ttl_seconds": mcp_manager.tool_cache_ttl, "catalogs": mcp_manager.catalog_stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: per-stage and per-tool latency histograms, tool call counters, pool and cache gauges"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
-async def get_index():
+async def get_index(request: Request):
     """Serve the main page"""
-    return FileResponse("static/index.html")
+    return index_page.response(request.headers)
 
 if __name__ == "__main__":
     import uvicorn
     logger.info("Starting FastAPI server for MCP manager on http://localhost:8001")
     logger.info("Ensure your target MCP server(s) (e.g., mcp_server.py) are running.")
     # The startup event will try to connect to the default MCP server.
-    uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1 and server_registry is None:
+        logger.warning("WORKERS > 1 without SHARED_STATE_PATH: each worker would have its own servers and sessions; using 1 worker")
+        workers = 1
+    if workers > 1:
+        # Each worker process imports this module and keeps its own MCP connections
+        uvicorn.run("server:app", host="0.0.0.0", port=8001, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
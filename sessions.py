@@ -0,0 +1,302 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from shared_state import DatabaseThread
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rough chars-per-token ratio used for budgeting; close enough for English text and JSON
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+    """Cheap token estimate for a list of Messages API messages"""
+    return sum(len(json.dumps(message["content"], separators=(",", ":"))) for message in messages) // CHARS_PER_TOKEN
+
+
+def split_turns(messages: List[dict]) -> List[List[dict]]:
+    """Group messages into turns, each starting with a plain user message.
+
+    User messages with a list of blocks carry tool output (tool_result blocks, or
+    text blocks for tool calls written as text) and stay in their turn.
+    """
+    turns: List[List[dict]] = []
+    for message in messages:
+        starts_turn = message["role"] == "user" and isinstance(message["content"], str)
+        if starts_turn or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def elide_tool_results(messages: List[dict], keep_chars: int) -> List[dict]:
+    """Shorten every tool output in the given messages to a head plus an elision note"""
+    elided = []
+    for message in messages:
+        if message["role"] != "user" or isinstance(message["content"], str):
+            elided.append(message)
+            continue
+        blocks = []
+        for block in message["content"]:
+            content = block.get("content")
+            if block.get("type") == "tool_result" and isinstance(content, str) and len(content) > keep_chars:
+                block = dict(block, content=f"{content[:keep_chars]}... [tool output elided: {len(content)} chars]")
+            elif block.get("type") == "text" and len(block.get("text", "")) > keep_chars:
+                # Results of tool calls written as text
+                text = block["text"]
+                block = dict(block, text=f"{text[:keep_chars]}... [tool output elided: {len(text)} chars]")
+            blocks.append(block)
+        elided.append({"role": message["role"], "content": blocks})
+    return elided
+
+
+def trim_history(messages: List[dict], token_budget: int, keep_chars: int = 200) -> List[dict]:
+    """Fit a conversation into a token budget.
+
+    Tool outputs of earlier turns are shortened first; if that is not enough the
+    oldest turns are dropped. The most recent turn is always kept intact so the
+    model sees the question it is answering.
+    """
+    if estimate_tokens(messages) <= token_budget:
+        return messages
+
+    turns = split_turns(messages)
+    turns = [elide_tool_results(turn, keep_chars) for turn in turns[:-1]] + turns[-1:]
+    while len(turns) > 1 and estimate_tokens([m for turn in turns for m in turn]) > token_budget:
+        turns.pop(0)
+    return [message for turn in turns for message in turn]
+
+
+class ChatSession:
+    """Turn history of one conversation, in Messages API format"""
+
+    def __init__(self, session_id: str, messages: Optional[List[dict]] = None, updated_at: Optional[float] = None):
+        self.session_id = session_id
+        self.messages: List[dict] = messages or []
+        self.updated_at = updated_at or time.time()
+        # Serializes turns of the same conversation; not persisted
+        self.lock = asyncio.Lock()
+
+    def to_json(self) -> str:
+        return json.dumps({"messages": self.messages, "updated_at": self.updated_at}, separators=(",", ":"))
+
+
+class SessionStore:
+    """In-memory conversation store with LRU and TTL eviction.
+
+    At most max_sessions conversations stay in memory. When spill_path is set,
+    sessions evicted for space are written to SQLite and loaded back on their
+    next turn; expired sessions are dropped everywhere, including spilled rows
+    that never come back, which are purged at most every purge_interval seconds.
+
+    With shared=True the SQLite file is the source of truth for several worker
+    processes: every saved turn is written through, and a session is reloaded
+    when another worker saved a newer version of it.
+
+    With a database the store's methods run on its database thread, one at a
+    time, so SQLite I/O and lock waits never block the event loop.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 3600.0,
+        token_budget: int = 8000,
+        max_tool_result_chars: int = 4000,
+        spill_path: Optional[str] = None,
+        shared: bool = False,
+        purge_interval: float = 60.0,
+    ):
+        if shared and not spill_path:
+            raise ValueError("A shared session store needs a database path")
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self.max_tool_result_chars = max_tool_result_chars
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._thread: Optional[DatabaseThread] = None
+        self.evicted = 0
+        self.expired = 0
+        self.restored = 0
+        self.purged = 0
+        self.shared = shared
+        self.purge_interval = purge_interval
+        self._next_purge_at = 0.0
+        if spill_path:
+            self._thread = DatabaseThread("session-store")
+            self._db = sqlite3.connect(spill_path, check_same_thread=False, timeout=5.0)
+            if shared:
+                # WAL lets workers read sessions while another one writes
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _is_expired(self, updated_at: float) -> bool:
+        return self.ttl > 0 and time.time() - updated_at > self.ttl
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self._thread is None:
+            return fn(*args)
+        return await self._thread.run(fn, *args)
+
+    @property
+    def in_memory(self) -> int:
+        return len(self._sessions)
+
+    async def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        """Return the session with this id, restoring it from the spill file if needed"""
+        return await self._run(self._get_or_create, session_id)
+
+    async def save(self, session: ChatSession) -> None:
+        """Store a finished turn, trimming the history so memory per session stays bounded"""
+        await self._run(self._save, session)
+
+    async def delete(self, session_id: str) -> bool:
+        return await self._run(self._delete, session_id)
+
+    async def stats(self) -> Dict[str, object]:
+        return await self._run(self._stats)
+
+    def _get_or_create(self, session_id: Optional[str]) -> ChatSession:
+        if session_id:
+            session = self._sessions.get(session_id)
+            if session is not None and self._is_expired(session.updated_at):
+                del self._sessions[session_id]
+                self.expired += 1
+                session = None
+            if self.shared:
+                session = self._refresh(session_id, session)
+            elif session is None:
+                session = self._restore(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+
+        session = ChatSession(session_id or uuid.uuid4().hex)
+        self._sessions[session.session_id] = session
+        self._evict()
+        return session
+
+    def _save(self, session: ChatSession) -> None:
+        messages = elide_tool_results(session.messages, self.max_tool_result_chars)
+        session.messages = trim_history(messages, self.token_budget)
+        session.updated_at = time.time()
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        if self.shared:
+            self._write(session)
+        self._evict()
+
+    def _delete(self, session_id: str) -> bool:
+        found = self._sessions.pop(session_id, None) is not None
+        if self._db is not None:
+            found = self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0 or found
+            self._db.commit()
+        return found
+
+    def _evict(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            session_id, session = self._sessions.popitem(last=False)
+            if self._is_expired(session.updated_at):
+                self.expired += 1
+                continue
+            self.evicted += 1
+            # A shared store already holds every saved turn
+            if self._db is not None and not self.shared:
+                self._write(session)
+        self._purge_expired()
+
+    def _purge_expired(self) -> None:
+        """Delete spilled rows past the TTL; runs at most once per purge_interval"""
+        if self._db is None or self.ttl <= 0 or time.monotonic() < self._next_purge_at:
+            return
+        self._next_purge_at = time.monotonic() + self.purge_interval
+        purged = self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,)).rowcount
+        self._db.commit()
+        if purged:
+            self.purged += purged
+            logger.info(f"Purged {purged} expired session(s) from the spill file")
+
+    def _write(self, session: ChatSession) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+            (session.session_id, session.to_json(), session.updated_at),
+        )
+        self._db.commit()
+
+    def _refresh(self, session_id: str, session: Optional[ChatSession]) -> Optional[ChatSession]:
+        """Bring an in-memory session up to date with the shared database"""
+        row = self._db.execute("SELECT data, updated_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            # Never saved yet, or deleted by another worker
+            if session is not None and session.messages:
+                del self._sessions[session_id]
+                return None
+            return session
+        if session is not None and session.updated_at >= row[1]:
+            return session
+        data = json.loads(row[0])
+        if self._is_expired(data["updated_at"]):
+            self.expired += 1
+            self._sessions.pop(session_id, None)
+            return None
+        self.restored += 1
+        if session is None:
+            session = self._sessions[session_id] = ChatSession(session_id)
+        # Keep the session object (and its lock) so turns already waiting on it see the new history
+        session.messages = data["messages"]
+        session.updated_at = data["updated_at"]
+        self._evict()
+        return session
+
+    def _restore(self, session_id: str) -> Optional[ChatSession]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self._db.commit()
+        data = json.loads(row[0])
+        if self._is_expired(data["updated_at"]):
+            self.expired += 1
+            return None
+        self.restored += 1
+        session = ChatSession(session_id, data["messages"], data["updated_at"])
+        self._sessions[session_id] = session
+        self._evict()
+        return session
+
+    def _stats(self) -> Dict[str, object]:
+        spilled = 0
+        if self._db is not None:
+            spilled = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "in_memory": len(self._sessions),
+            "spilled": spilled,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "token_budget": self.token_budget,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "restored": self.restored,
+            "purged": self.purged,
+        }
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# name -> (url, pool_size); pool_size None means the manager's default
+ServerEntries = Dict[str, Tuple[str, Optional[int]]]
+
+T = TypeVar("T")
+
+
+class DatabaseThread:
+    """Runs blocking database work off the event loop, on one thread and in submission order.
+
+    SQLite waits up to its busy timeout for another worker's lock, which must
+    not stall the event loop. One thread per connection keeps its transactions
+    (and any state the caller updates alongside them) from interleaving.
+    """
+
+    def __init__(self, name: str):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        """Finish the work already submitted, then stop the thread"""
+        self._executor.shutdown(wait=True)
+
+
+def open_shared_db(path: str) -> sqlite3.Connection:
+    """Open a SQLite database that several worker processes read and write concurrently"""
+    db = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+    # WAL lets readers proceed while another worker writes
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class ServerRegistry:
+    """The set of MCP servers every worker should be connected to, shared through SQLite.
+
+    Each change bumps a revision number, so workers can poll cheaply and only
+    reconcile their connections when something changed. The public methods are
+    coroutines; the queries run on the registry's database thread.
+    """
+
+    def __init__(self, path: str):
+        self._thread = DatabaseThread("server-registry")
+        self._db = open_shared_db(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS servers (name TEXT PRIMARY KEY, url TEXT NOT NULL, pool_size INTEGER, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS registry_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.execute("INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('revision', 0)")
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """Write transaction; IMMEDIATE takes the write lock up front so concurrent workers queue instead of failing"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _bump(self) -> None:
+        self._db.execute("UPDATE registry_meta SET value = value + 1 WHERE key = 'revision'")
+
+    async def seed(self, servers: Dict[str, str], pool_sizes: Optional[Dict[str, int]] = None) -> bool:
+        """Register the configured servers once; workers starting later keep what the registry says"""
+        return await self._thread.run(self._seed, servers, pool_sizes)
+
+    def _seed(self, servers: Dict[str, str], pool_sizes: Optional[Dict[str, int]]) -> bool:
+        pool_sizes = pool_sizes or {}
+        with self._write():
+            seeded = self._db.execute("SELECT 1 FROM registry_meta WHERE key = 'seeded'").fetchone()
+            if seeded is None:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO servers (name, url, pool_size, updated_at) VALUES (?, ?, ?, ?)",
+                    [(name, url, pool_sizes.get(name), now) for name, url in servers.items()],
+                )
+                self._db.execute("INSERT INTO registry_meta (key, value) VALUES ('seeded', 1)")
+                self._bump()
+        return seeded is None
+
+    async def put(self, name: str, url: str, pool_size: Optional[int] = None) -> None:
+        await self._thread.run(self._put, name, url, pool_size)
+
+    def _put(self, name: str, url: str, pool_size: Optional[int]) -> None:
+        with self._write():
+            self._db.execute(
+                "INSERT OR REPLACE INTO servers (name, url, pool_size, updated_at) VALUES (?, ?, ?, ?)",
+                (name, url, pool_size, time.time()),
+            )
+            self._bump()
+
+    async def remove(self, name: str) -> bool:
+        return await self._thread.run(self._remove, name)
+
+    def _remove(self, name: str) -> bool:
+        with self._write():
+            removed = self._db.execute("DELETE FROM servers WHERE name = ?", (name,)).rowcount > 0
+            if removed:
+                self._bump()
+        return removed
+
+    async def revision(self) -> int:
+        return await self._thread.run(self._revision)
+
+    def _revision(self) -> int:
+        return self._db.execute("SELECT value FROM registry_meta WHERE key = 'revision'").fetchone()[0]
+
+    async def servers(self) -> Tuple[int, ServerEntries]:
+        """The current revision and the registered servers, read consistently"""
+        return await self._thread.run(self._servers)
+
+    def _servers(self) -> Tuple[int, ServerEntries]:
+        self._db.execute("BEGIN")
+        try:
+            revision = self._revision()
+            rows = self._db.execute("SELECT name, url, pool_size FROM servers").fetchall()
+        finally:
+            self._db.execute("COMMIT")
+        return revision, {name: (url, pool_size) for name, url, pool_size in rows}
+
+    def close(self) -> None:
+        self._thread.close()
+        self._db.close()
+
+
+async def follow_registry(registry: ServerRegistry, manager: Any, interval: float = 1.0) -> None:
+    """Keep this worker's connections in line with the registry; changes land within about one interval"""
+    applied = None
+    while True:
+        try:
+            if await registry.revision() != applied:
+                revision, servers = await registry.servers()
+                await manager.sync_servers(servers)
+                applied = revision
+                logger.debug(f"Applied server registry revision {revision}")
+        except Exception as e:
+            logger.error(f"Server registry sync failed: {type(e).__name__} - {e}")
+        await asyncio.sleep(interval)
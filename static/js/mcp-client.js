@@ -1,3 +1,18 @@
+// Conversation id assigned by the server on the first turn
+let sessionId = null;
+
+// Aborting the running turn's fetch makes the server cancel its model call and tool calls
+let currentTurn = null;
+
+function stopTurn() {
+    if (currentTurn) {
+        currentTurn.abort();
+    }
+}
+
+// Leaving the page should not leave a turn running on the server
+window.addEventListener('pagehide', stopTurn);
+
 async function sendMessage() {
     const messageInput = document.getElementById('messageInput');
     const message = messageInput.value.trim();
@@ -7,24 +22,105 @@ async function sendMessage() {
     addMessageToChat('user', message);
     messageInput.value = '';
 
+    const controller = new AbortController();
+    currentTurn = controller;
+    const stopButton = document.getElementById('stopButton');
+    stopButton.disabled = false;
+
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ message }),
+            body: JSON.stringify({ message, session_id: sessionId }),
+            signal: controller.signal,
         });
 
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
-        addMessageToChat('assistant', data.response);
+        await readChatStream(response);
     } catch (error) {
-        console.error('Error:', error);
-        addMessageToChat('error', 'Error sending message: ' + error.message);
+        if (error.name === 'AbortError') {
+            addMessageToChat('system', 'Stopped.');
+        } else {
+            console.error('Error:', error);
+            addMessageToChat('error', 'Error sending message: ' + error.message);
+        }
+    } finally {
+        if (currentTurn === controller) {
+            currentTurn = null;
+            stopButton.disabled = true;
+        }
+    }
+}
+
+// Render Server-Sent Events from /api/chat/stream as they arrive
+async function readChatStream(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let assistantDiv = null;
+    const toolDivs = {};
+
+    const handleEvent = (event) => {
+        switch (event.type) {
+            case 'token':
+                if (!assistantDiv) {
+                    assistantDiv = addMessageToChat('assistant', '');
+                }
+                appendToMessage(assistantDiv, event.text);
+                break;
+            case 'tool_start':
+                addMessageToChat('system', `Calling tool ${event.tool}...`);
+                // Text from the next model step goes into a fresh bubble
+                assistantDiv = null;
+                break;
+            case 'tool_result':
+                // Tools of one step run in parallel, so keep one output bubble per tool
+                if (!toolDivs[event.tool]) {
+                    toolDivs[event.tool] = addMessageToChat('assistant', '');
+                }
+                appendToMessage(toolDivs[event.tool], event.chunk);
+                break;
+            case 'tool_end':
+                if (event.error) {
+                    addMessageToChat('error', `Tool ${event.tool} failed: ${event.error}`);
+                }
+                for (const attachment of event.attachments || []) {
+                    addAttachmentLink(event.tool, attachment);
+                }
+                delete toolDivs[event.tool];
+                break;
+            case 'done':
+                sessionId = event.session_id;
+                if (!assistantDiv && event.response) {
+                    addMessageToChat('assistant', event.response);
+                }
+                break;
+            case 'error':
+                addMessageToChat('error', 'Error: ' + event.detail);
+                break;
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const dataLine = frame.split('\n').find(line => line.startsWith('data: '));
+            if (dataLine) {
+                handleEvent(JSON.parse(dataLine.slice(6)));
+            }
+        }
     }
 }
 
@@ -146,6 +242,22 @@ function addMessageToChat(role, content) {
     messageDiv.textContent = content;
     chatMessages.appendChild(messageDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return messageDiv;
+}
+
+function appendToMessage(messageDiv, text) {
+    messageDiv.textContent += text;
+    const chatMessages = document.getElementById('chatMessages');
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
+function addAttachmentLink(tool, attachment) {
+    const messageDiv = addMessageToChat('system', `Tool ${tool} output (${attachment.mime_type}, ${attachment.size} bytes): `);
+    const link = document.createElement('a');
+    link.href = attachment.url;
+    link.target = '_blank';
+    link.textContent = 'download';
+    messageDiv.appendChild(link);
 }
 
 // Initialize on page load
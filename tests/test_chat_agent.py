@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+from chat_agent import ChatAgent
+
+
+def tool(name: str, description: str = "") -> SimpleNamespace:
+    return SimpleNamespace(name=name, description=description, inputSchema={"type": "object"}, annotations=None)
+
+
+class FakeManager:
+    def __init__(self, catalogs):
+        self.catalogs = catalogs
+        self.versions = {name: 1 for name in catalogs}
+
+    def connected_servers(self):
+        return list(self.catalogs)
+
+    def is_connected(self, server_name):
+        return server_name in self.catalogs
+
+    async def list_tools(self, server_name):
+        return self.catalogs[server_name]
+
+    def catalog_versions(self):
+        return dict(self.versions)
+
+
+def test_servers_swapping_suffixed_names_stay_indexed():
+    # "a.b" and "a_b" both sanitize to a_b__t; the suffix follows server order
+    manager = FakeManager({"a.b": [tool("t", "lookup weather")], "a_b": [tool("t", "lookup stock")]})
+    agent = ChatAgent(manager, anthropic=None, semaphore=asyncio.Semaphore(1), tool_top_k=1)
+
+    tools, routes = asyncio.run(agent.collect_tools())
+    assert routes == {"a_b__t": ("a.b", "t"), "a_b__t_2": ("a_b", "t")}
+
+    # "a.b" reconnects and moves to the end of connected_servers()
+    manager.catalogs = {"a_b": manager.catalogs["a_b"], "a.b": manager.catalogs["a.b"]}
+    manager.versions["a.b"] = 2
+    tools, routes = asyncio.run(agent.collect_tools())
+    assert routes == {"a_b__t": ("a_b", "t"), "a_b__t_2": ("a.b", "t")}
+
+    assert len(agent.tool_index) == 2
+    assert [tool["name"] for tool in agent.select_tools(tools, "stock")] == ["a_b__t"]
+    assert [tool["name"] for tool in agent.select_tools(tools, "weather")] == ["a_b__t_2"]
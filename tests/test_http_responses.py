@@ -0,0 +1,62 @@
+import asyncio
+import zlib
+
+from http_responses import CompressionMiddleware, negotiate_encoding
+
+
+def app_sending(chunks, content_type=b"application/json"):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+def request(app, accept_encoding: bytes = b"gzip"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    headers = dict(messages[0]["headers"])
+    return headers, [message["body"] for message in messages[1:]]
+
+
+def test_encoding_follows_q_values():
+    assert negotiate_encoding("gzip;q=0.5, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+    assert negotiate_encoding("") is None
+
+
+def test_complete_bodies_are_compressed_above_the_minimum_size():
+    body = b'{"data": "' + b"x" * 4000 + b'"}'
+    headers, bodies = request(app_sending([body]))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert int(headers[b"content-length"]) == len(bodies[0])
+    assert zlib.decompress(bodies[0], 31) == body
+
+    headers, bodies = request(app_sending([b"{}"]))
+    assert b"content-encoding" not in headers and bodies == [b"{}"]
+
+
+def test_streamed_chunks_are_decodable_as_they_arrive():
+    chunks = [b'{"n": %d}\n' % n for n in range(3)]
+    headers, bodies = request(app_sending(chunks, b"application/x-ndjson"))
+    assert headers[b"content-encoding"] == b"gzip"
+    decoder = zlib.decompressobj(31)
+    # Each chunk is flushed, so everything sent so far decodes without the rest of the stream
+    assert [decoder.decompress(body) for body in bodies] == chunks
+
+
+def test_excluded_types_pass_through():
+    body = b"data: " + b"x" * 4000 + b"\n\n"
+    headers, bodies = request(app_sending([body], b"text/event-stream"))
+    assert b"content-encoding" not in headers and bodies == [body]
+    headers, bodies = request(app_sending([body]), accept_encoding=b"identity")
+    assert b"content-encoding" not in headers and bodies == [body]
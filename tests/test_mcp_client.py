@@ -0,0 +1,144 @@
+import asyncio
+
+from fastmcp import Client, Context, FastMCP
+
+
+def request_id_server() -> FastMCP:
+    server = FastMCP("Request Id Test Server")
+
+    @server.tool()
+    async def request_id(ctx: Context) -> str:
+        await asyncio.sleep(0.01)
+        return ctx.request_id
+
+    return server
+
+
+def test_request_id_read_before_a_call_is_the_id_the_server_sees():
+    # MCPManager._send_tool_call reads the SDK's private ClientSession._request_id to cancel
+    # calls by id; requirements.txt bounds mcp and fastmcp to versions where this holds
+    async def call(client: Client):
+        expected = client.session._request_id
+        result = await client.call_tool_mcp("request_id", {})
+        return str(expected), result.content[0].text
+
+    async def run():
+        async with Client(request_id_server()) as client:
+            sequential = [await call(client) for _ in range(3)]
+            concurrent = await asyncio.gather(*(call(client) for _ in range(5)))
+            return sequential + list(concurrent)
+
+    for expected, seen in asyncio.run(run()):
+        assert expected == seen
+
+
+def test_disconnect_during_connect_leaves_no_connection():
+    from mcp_client import MCPManager
+
+    async def run():
+        manager = MCPManager(result_cache=None)
+        connecting = asyncio.create_task(manager.connect("local", "python:mcp_server"))
+        await asyncio.sleep(0)
+        await manager.disconnect("local")
+        connected = await connecting
+        return connected, manager.connected_servers(), manager.server_status()
+
+    assert asyncio.run(run()) == (False, [], {})
+
+
+async def hold(pool, entered: asyncio.Event, release: asyncio.Event, seen: list):
+    async with pool.acquire() as client:
+        seen.append(client)
+        entered.set()
+        await release.wait()
+
+
+def test_pool_queues_past_its_limit_then_rejects():
+    from mcp_client import ClientPool, ServerOverloadedError
+
+    async def run():
+        pool = ClientPool("files", ["a", "b"], max_in_flight=2, max_queue=1)
+        release = asyncio.Event()
+        seen = []
+        running = []
+        for _ in range(2):
+            entered = asyncio.Event()
+            running.append(asyncio.create_task(hold(pool, entered, release, seen)))
+            await entered.wait()
+        assert pool.in_flight == 2
+
+        queued_entered = asyncio.Event()
+        queued = asyncio.create_task(hold(pool, queued_entered, release, seen))
+        await asyncio.sleep(0)
+        assert pool.waiting == 1 and not queued_entered.is_set()
+
+        try:
+            async with pool.acquire():
+                raise AssertionError("admitted beyond max_in_flight + max_queue")
+        except ServerOverloadedError:
+            pass
+
+        release.set()
+        await asyncio.gather(*running, queued)
+        return pool, seen
+
+    pool, seen = asyncio.run(run())
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["calls"] == 3
+    assert stats["peak_in_flight"] == 2 and stats["peak_waiting"] == 1
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+    # The first two calls went to different sessions
+    assert sorted(seen[:2]) == ["a", "b"]
+
+
+def test_pool_lends_the_least_busy_session():
+    from mcp_client import ClientPool
+
+    async def run():
+        pool = ClientPool("files", ["a", "b", "c"], max_in_flight=3, max_queue=0)
+        release_first = asyncio.Event()
+        release_rest = asyncio.Event()
+        seen = []
+        entered = asyncio.Event()
+        first = asyncio.create_task(hold(pool, entered, release_first, seen))
+        await entered.wait()
+        entered = asyncio.Event()
+        second = asyncio.create_task(hold(pool, entered, release_rest, seen))
+        await entered.wait()
+        release_first.set()
+        await first
+        # "a" is free again and "c" never was busy; the lowest index of the idle sessions wins
+        async with pool.acquire() as client:
+            seen.append(client)
+        release_rest.set()
+        await second
+        return seen
+
+    assert asyncio.run(run()) == ["a", "b", "a"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    from mcp_client import ClientPool
+
+    async def run():
+        pool = ClientPool("files", ["a"], max_in_flight=1, max_queue=1)
+        release = asyncio.Event()
+        entered = asyncio.Event()
+        running = asyncio.create_task(hold(pool, entered, release, []))
+        await entered.wait()
+        waiter = asyncio.create_task(hold(pool, asyncio.Event(), release, []))
+        await asyncio.sleep(0)
+        assert pool.waiting == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert pool.waiting == 0
+        release.set()
+        await running
+        # The slot the cancelled waiter never got is still usable
+        async with pool.acquire() as client:
+            return client, pool.stats()
+
+    client, stats = asyncio.run(run())
+    assert client == "a"
+    assert stats["calls"] == 2 and stats["rejected"] == 0
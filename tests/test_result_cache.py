@@ -0,0 +1,218 @@
+import asyncio
+from types import SimpleNamespace
+
+from resource_cache import ResourceCache
+from result_cache import ToolResultCache
+from tool_results import BlobStore, ResultBuilder
+
+
+def test_results_whose_blobs_were_evicted_are_called_again():
+    blobs = BlobStore(max_bytes=10)
+    builder = ResultBuilder(blobs)
+    cache = ToolResultCache()
+    cache.usable = lambda result: all(blob_id in blobs for blob_id in result.blob_ids())
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return builder.build([SimpleNamespace(type="image", data="AAAAAAAA", mimeType="image/png")])
+
+    async def run():
+        first = await cache.get_or_call("files", "thumbnail", {}, 60, call)
+        assert await cache.get_or_call("files", "thumbnail", {}, 60, call) is first
+        blobs.put("BBBBBBBB", "image/png")  # pushes the first result's blob out
+        second = await cache.get_or_call("files", "thumbnail", {}, 60, call)
+        assert second is not first
+        assert all(blob_id in blobs for blob_id in second.blob_ids())
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+class Gate:
+    """A call that blocks until opened and counts how often it ran"""
+
+    def __init__(self, value="result"):
+        self.value = value
+        self.opened = asyncio.Event()
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.opened.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.value
+
+
+def test_concurrent_identical_calls_share_one_request():
+    cache = ToolResultCache()
+    gate = Gate()
+
+    async def run():
+        callers = [asyncio.create_task(cache.get_or_call("s", "t", {"a": 1, "b": 2}, 60, gate)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.opened.set()
+        results = await asyncio.gather(*callers)
+        # Argument order does not change the key
+        results.append(await cache.get_or_call("s", "t", {"b": 2, "a": 1}, 60, gate))
+        return results
+
+    assert asyncio.run(run()) == ["result"] * 4
+    assert gate.started == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 2, 1)
+    assert stats["in_flight"] == 0
+
+
+def test_shared_call_is_cancelled_only_with_its_last_waiter():
+    cache = ToolResultCache()
+    gate = Gate()
+
+    async def run():
+        first = asyncio.create_task(cache.get_or_call("s", "t", {}, 60, gate))
+        second = asyncio.create_task(cache.get_or_call("s", "t", {}, 60, gate))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert gate.cancelled == 0
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert gate.cancelled == 1
+        assert cache.stats()["in_flight"] == 0
+        # Nothing was cached; the next caller starts a fresh call
+        gate.opened.set()
+        return await cache.get_or_call("s", "t", {}, 60, gate)
+
+    assert asyncio.run(run()) == "result"
+    assert gate.started == 2
+
+
+def test_invalidated_call_in_flight_is_returned_but_not_cached():
+    cache = ToolResultCache()
+    old, new = Gate("old"), Gate("new")
+
+    async def run():
+        waiting = asyncio.create_task(cache.get_or_call("s", "t", {}, 60, old))
+        await asyncio.sleep(0)
+        cache.invalidate("s", "t")
+        # Arrives after the invalidation, so it does not join the old call
+        fresh = asyncio.create_task(cache.get_or_call("s", "t", {}, 60, new))
+        await asyncio.sleep(0)
+        old.opened.set()
+        new.opened.set()
+        return await waiting, await fresh, await cache.get_or_call("s", "t", {}, 60, old)
+
+    assert asyncio.run(run()) == ("old", "new", "new")
+    assert old.started == 1 and new.started == 1
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    cache = ToolResultCache(max_entries=2, max_bytes=10)
+
+    async def value(text):
+        return text
+
+    async def run():
+        for name in ("a", "b"):
+            await cache.get_or_call("s", name, {}, 60, lambda: value("1234"))
+        await cache.get_or_call("s", "a", {}, 60, lambda: value("unused"))  # a is now the most recent
+        await cache.get_or_call("s", "c", {}, 60, lambda: value("1234"))
+        assert set(key[1] for key in cache._entries) == {"a", "c"}
+        # 4 + 4 + 4 bytes is over max_bytes, so the least recent entry goes even below max_entries
+        cache.max_entries = 3
+        await cache.get_or_call("s", "d", {}, 60, lambda: value("1234"))
+        assert set(key[1] for key in cache._entries) == {"c", "d"}
+        # Larger than the whole cache: returned, never stored
+        assert await cache.get_or_call("s", "e", {}, 60, lambda: value("x" * 11)) == "x" * 11
+        assert ("s", "e", "{}") not in cache._entries
+
+    asyncio.run(run())
+    assert cache.stats()["evictions"] == 2
+    assert cache.bytes == 8
+
+
+def test_expired_entries_are_called_again():
+    cache = ToolResultCache()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        await cache.get_or_call("s", "t", {}, 0.0, call)
+        return await cache.get_or_call("s", "t", {}, 0.0, call)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_ttl_comes_from_overrides_or_annotations():
+    cache = ToolResultCache(default_ttl=30, tool_ttls={"files.ls": 5, "*.search": 10, "files.stat": 0})
+    read_only = SimpleNamespace(readOnlyHint=True, idempotentHint=True, openWorldHint=False)
+    open_world = SimpleNamespace(readOnlyHint=True, idempotentHint=True, openWorldHint=True)
+    assert cache.ttl_for("files", "ls") == 5
+    assert cache.ttl_for("web", "search") == 10
+    assert cache.ttl_for("files", "stat", read_only) is None
+    assert cache.ttl_for("files", "cat", read_only) == 30
+    assert cache.ttl_for("web", "fetch", open_world) is None
+    assert cache.ttl_for("files", "cat") is None
+    assert ToolResultCache(use_annotations=False).ttl_for("files", "cat", read_only) is None
+
+
+def text_contents(text):
+    return [SimpleNamespace(uri="file:///a", mimeType="text/plain", text=text)]
+
+
+def test_stale_resource_with_unchanged_contents_keeps_its_result():
+    cache = ResourceCache()
+    contents = text_contents("v1")
+    built = []
+
+    def build(contents):
+        built.append(contents)
+        return object()
+
+    async def read():
+        return contents
+
+    async def run():
+        first = await cache.get_or_read("s", "file:///a", read, build, subscribed=True)
+        assert await cache.get_or_read("s", "file:///a", read, build, subscribed=True) is first
+        assert cache.mark_stale("s", "file:///a") == 1
+        assert not cache.contains("s", "file:///a") and cache.holds("s", "file:///a")
+        assert await cache.get_or_read("s", "file:///a", read, build, subscribed=True) is first
+        cache.mark_stale("s", "file:///a")
+        contents[:] = text_contents("v2")
+        return first, await cache.get_or_read("s", "file:///a", read, build, subscribed=True)
+
+    first, changed = asyncio.run(run())
+    assert changed is not first
+    assert len(built) == 2
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_subscriptions_are_released_with_their_entries():
+    cache = ResourceCache(max_entries=1)
+    released = []
+    cache.on_release = lambda server_name, uri: released.append(uri)
+
+    async def read():
+        return text_contents("v1")
+
+    async def run():
+        await cache.get_or_read("s", "file:///a", read, lambda contents: "a", subscribed=True)
+        await cache.get_or_read("s", "file:///b", read, lambda contents: "b", subscribed=True)
+        assert released == ["file:///a"]  # evicted
+        await cache.get_or_read("s", "file:///c", read, lambda contents: "c", subscribed=False)
+        assert released == ["file:///a", "file:///b"]
+        cache.max_entries = 2
+        await cache.get_or_read("s", "file:///d", read, lambda contents: "d", subscribed=True)
+        assert cache.invalidate("s") == 2
+        assert released == ["file:///a", "file:///b", "file:///d"]
+
+    asyncio.run(run())
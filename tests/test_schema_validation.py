@@ -0,0 +1,55 @@
+import pytest
+
+from schema_validation import SchemaValidator
+
+
+def validate(schema, value, coerce=True):
+    return SchemaValidator(schema, coerce=coerce)(value)
+
+
+def test_any_of_keeps_a_value_that_matches_a_later_branch_exactly():
+    value, errors = validate({"anyOf": [{"type": "string"}, {"type": "integer"}]}, 5)
+    assert errors == []
+    assert value == 5
+
+
+def test_one_of_counts_only_exact_matches_when_there_are_any():
+    value, errors = validate({"oneOf": [{"type": "integer"}, {"type": "string"}]}, "10")
+    assert errors == []
+    assert value == "10"
+
+
+def test_branches_coerce_when_no_branch_matches_exactly():
+    schema = {"anyOf": [{"type": "integer"}, {"type": "null"}]}
+    assert validate(schema, "10") == (10, [])
+    assert validate(schema, "10", coerce=False)[1][0]["keyword"] == "anyOf"
+
+
+def test_nested_branches_are_strict_too():
+    schema = {"anyOf": [{"type": "object", "properties": {"n": {"type": "string"}}}, {"type": "integer"}]}
+    value, errors = validate({"type": "object", "properties": {"v": schema}}, {"v": {"n": 5}})
+    # Only the coercing pass matches, so the nested value is converted
+    assert errors == []
+    assert value == {"v": {"n": "5"}}
+
+
+def test_one_of_still_rejects_several_exact_matches():
+    _, errors = validate({"oneOf": [{"type": "integer"}, {"type": "number"}]}, 3)
+    assert [error["keyword"] for error in errors] == ["oneOf"]
+
+
+@pytest.mark.parametrize("value", [0.3, 0.7, 1.1, 3, 12.5, -0.2])
+def test_multiple_of_a_decimal_fraction(value):
+    step = 0.5 if value == 12.5 else 0.1
+    assert validate({"type": "number", "multipleOf": step}, value) == (value, [])
+
+
+@pytest.mark.parametrize("value, step", [(0.35, 0.1), (7, 2), (10**30 + 1, 2), (1.5, 1)])
+def test_multiple_of_rejects_non_multiples(value, step):
+    _, errors = validate({"type": "number", "multipleOf": step}, value)
+    assert [error["keyword"] for error in errors] == ["multipleOf"]
+
+
+def test_multiple_of_large_values():
+    assert validate({"multipleOf": 0.1}, 1e40)[1] == []
+    assert validate({"multipleOf": 3}, 3 * 10**40)[1] == []
@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+from chat_agent import text_tool_results
+from sessions import SessionStore, elide_tool_results, estimate_tokens, split_turns, trim_history
+
+
+def text_call_turn(question: str, result: str, answer: str) -> list:
+    call = SimpleNamespace(id="text_call_0", name="files__ls")
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": '{"tool": "files.ls", "parameters": {}}'},
+        {"role": "user", "content": text_tool_results([call], {"text_call_0": (result, None)})},
+        {"role": "assistant", "content": answer},
+    ]
+
+
+def test_text_tool_results_stay_in_their_turn():
+    messages = text_call_turn("q1", "listing", "a1") + [
+        {"role": "user", "content": "q2"},
+        {"role": "assistant", "content": "a2"},
+    ]
+    assert [len(turn) for turn in split_turns(messages)] == [4, 2]
+
+
+def test_trimming_drops_text_tool_results_with_their_question():
+    messages = text_call_turn("q1", "x" * 4000, "a1") + [
+        {"role": "user", "content": "q2"},
+        {"role": "assistant", "content": "a2"},
+    ]
+    # Room for everything but the question and the call, once the result is elided
+    budget = estimate_tokens(elide_tool_results(messages, 200)[2:])
+    assert trim_history(messages, budget) == messages[-2:]
+
+
+def test_text_tool_results_are_elided():
+    messages = text_call_turn("q1", "x" * 5000, "a1")
+    original = messages[2]["content"][0]["text"]
+    text = elide_tool_results(messages, keep_chars=100)[2]["content"][0]["text"]
+    assert text == f"{original[:100]}... [tool output elided: {len(original)} chars]"
+
+
+def native_call_turn(question: str, result: str, answer: str) -> list:
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": [{"type": "tool_use", "id": "t1", "name": "files__ls", "input": {}}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t1", "content": result}]},
+        {"role": "assistant", "content": answer},
+    ]
+
+
+def test_history_within_budget_is_untouched():
+    messages = native_call_turn("q1", "x" * 1000, "a1")
+    assert trim_history(messages, estimate_tokens(messages)) is messages
+
+
+def test_earlier_tool_results_are_elided_before_turns_are_dropped():
+    messages = native_call_turn("q1", "x" * 4000, "a1") + native_call_turn("q2", "y" * 4000, "a2")
+    trimmed = trim_history(messages, 1200, keep_chars=100)
+    assert len(trimmed) == 8
+    assert trimmed[2]["content"][0]["content"] == "x" * 100 + "... [tool output elided: 4000 chars]"
+    # The turn being answered keeps its full tool output
+    assert trimmed[6]["content"][0]["content"] == "y" * 4000
+
+
+def test_oldest_turns_are_dropped_but_the_last_is_kept():
+    messages = native_call_turn("q1", "x" * 400, "a1") + native_call_turn("q2", "y" * 4000, "a2")
+    assert trim_history(messages, 10) == messages[4:]
+
+
+def test_saved_sessions_are_trimmed_to_the_budget():
+    store = SessionStore(token_budget=800, max_tool_result_chars=2000)
+
+    async def run():
+        session = await store.get_or_create("s1")
+        session.messages = native_call_turn("q1", "x" * 4000, "a1") + native_call_turn("q2", "y" * 4000, "a2")
+        await store.save(session)
+        return (await store.get_or_create("s1")).messages
+
+    messages = asyncio.run(run())
+    # Every tool output is capped on save; earlier turns then go down to the elision head
+    assert messages[2]["content"][0]["content"].startswith("x" * 200 + "... [tool output elided")
+    assert messages[6]["content"][0]["content"] == "y" * 2000 + "... [tool output elided: 4000 chars]"
+
+
+def test_evicted_sessions_spill_to_disk_and_come_back(tmp_path):
+    store = SessionStore(max_sessions=1, spill_path=str(tmp_path / "sessions.db"))
+
+    async def run():
+        first = await store.get_or_create("s1")
+        first.messages = [{"role": "user", "content": "q1"}, {"role": "assistant", "content": "a1"}]
+        await store.save(first)
+        await store.get_or_create("s2")
+        assert store.in_memory == 1
+        assert (await store.stats())["spilled"] == 1
+        restored = await store.get_or_create("s1")
+        return restored, await store.stats()
+
+    try:
+        restored, stats = asyncio.run(run())
+    finally:
+        store.close()
+    assert restored.messages == [{"role": "user", "content": "q1"}, {"role": "assistant", "content": "a1"}]
+    # s1 came back and pushed s2 out to the spill file in its place
+    assert (stats["evicted"], stats["restored"], stats["spilled"]) == (2, 1, 1)
+
+
+def test_expired_sessions_are_not_restored(tmp_path):
+    store = SessionStore(max_sessions=1, ttl=60, spill_path=str(tmp_path / "sessions.db"))
+
+    async def run():
+        first = await store.get_or_create("s1")
+        first.messages = [{"role": "user", "content": "q1"}]
+        await store.save(first)
+        await store.get_or_create("s2")
+        # Age the spilled row past the TTL
+        store._db.execute("UPDATE sessions SET updated_at = 0, data = json_set(data, '$.updated_at', 0)")
+        store._db.commit()
+        return await store.get_or_create("s1"), await store.stats()
+
+    try:
+        session, stats = asyncio.run(run())
+    finally:
+        store.close()
+    assert session.messages == []
+    assert stats["expired"] == 1 and stats["restored"] == 0
@@ -0,0 +1,41 @@
+from tool_call_scanner import ToolCallExtractor
+
+
+def extract(chunks) -> list:
+    extractor = ToolCallExtractor()
+    calls = []
+    for chunk in chunks:
+        calls.extend(extractor.feed(chunk))
+    return calls + extractor.finish()
+
+
+CALL = '{"tool": "files.ls", "parameters": {"path": "/tmp {x}"}}'
+
+
+def test_calls_are_found_however_the_text_is_split():
+    text = f"Let me look. {CALL} Then {{\"tool\": \"web.fetch\", \"arguments\": {{\"url\": \"a\\\"b\"}}}}"
+    expected = [
+        {"tool": "files.ls", "parameters": {"path": "/tmp {x}"}},
+        {"tool": "web.fetch", "parameters": {"url": 'a"b'}},
+    ]
+    assert extract([text]) == expected
+    assert extract(list(text)) == expected
+    assert extract([text[:20], text[20:41], text[41:]]) == expected
+
+
+def test_calls_are_returned_as_soon_as_their_object_closes():
+    extractor = ToolCallExtractor()
+    assert extractor.feed(CALL[:-1]) == []
+    assert extractor.feed(CALL[-1:] + " and more") == [{"tool": "files.ls", "parameters": {"path": "/tmp {x}"}}]
+
+
+def test_calls_inside_prose_braces_are_found():
+    assert extract([f"Use a call {{like this: {CALL}}} to list."]) == [
+        {"tool": "files.ls", "parameters": {"path": "/tmp {x}"}}
+    ]
+    # An opening brace that is never closed is searched once the text is complete
+    assert extract([f"{{ unbalanced {CALL}"]) == [{"tool": "files.ls", "parameters": {"path": "/tmp {x}"}}]
+
+
+def test_objects_that_are_not_calls_are_ignored():
+    assert extract(['{"name": "x"} {"tool": 3} {"tool": "a.b", "parameters": []} {}']) == []
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from tool_index import ToolIndex, tokenize, tool_terms
+
+
+def tool(name: str, description: str = "", schema: dict = None) -> SimpleNamespace:
+    return SimpleNamespace(name=name, description=description, inputSchema=schema or {"type": "object"})
+
+
+def test_tokenize_splits_identifiers_and_folds_plurals():
+    assert tokenize("readFile list_directories") == ["read", "file", "list", "directorie"]
+    assert tokenize("What is the weather in London?") == ["weather", "london"]
+    assert tokenize("class glass") == ["class", "glass"]
+
+
+def test_tool_terms_weight_names_and_include_the_schema():
+    terms = tool_terms(tool("get_weather", "Current weather", {
+        "type": "object",
+        "properties": {"city": {"type": "string", "description": "City name"}, "unit": {"enum": ["metric"]}},
+    }))
+    assert terms["weather"] == 4  # three for the name, one for the description
+    assert terms["city"] == 2 and terms["metric"] == 1
+
+
+def test_search_ranks_matching_tools():
+    index = ToolIndex()
+    index.update_server("weather", {"weather__forecast": tool("forecast", "Weather forecast for a city")})
+    index.update_server("files", {
+        "files__read_file": tool("read_file", "Read a file from disk"),
+        "files__ls": tool("ls", "List the files in a directory"),
+    })
+    assert len(index) == 3
+    assert [key for key, _ in index.search("read the file", 3)][0] == "files__read_file"
+    assert [key for key, _ in index.search("forecast for Paris", 1)] == ["weather__forecast"]
+    assert index.search("unrelated", 3) == []
+
+
+def test_update_replaces_a_servers_documents():
+    index = ToolIndex()
+    index.update_server("files", {"files__ls": tool("ls", "List files")})
+    index.update_server("files", {"files__cat": tool("cat", "Print a file")})
+    assert len(index) == 1
+    assert [key for key, _ in index.search("list print", 5)] == ["files__cat"]
+    assert index._total_length == sum(index._lengths.values())
+
+
+def test_remove_server_drops_its_postings():
+    index = ToolIndex()
+    index.update_server("files", {"files__ls": tool("ls", "List files")})
+    index.update_server("web", {"web__fetch": tool("fetch", "Fetch a web page")})
+    index.remove_server("files")
+    index.remove_server("unknown")
+    assert len(index) == 1
+    assert index.search("list files", 5) == []
+    assert "file" not in index._postings
+    index.remove_server("web")
+    assert len(index) == 0 and index._postings == {} and index._total_length == 0
+    assert index.search("fetch", 5) == []
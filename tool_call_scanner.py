@@ -0,0 +1,242 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters that matter inside an object, and inside a string within one
+_STRUCTURAL = re.compile(r'[{}"]')
+_STRING_END = re.compile(r'["\\]')
+_OBJECT_START = re.compile(r'\{\s*["}]')
+_decoder = json.JSONDecoder()
+
+
+class JSONObjectScanner:
+    """Single-pass scanner for top-level JSON objects in text that arrives in chunks.
+
+    Only braces and string boundaries are tracked; every character is looked at
+    once, by the regex engine, however the text is split into chunks. Candidates
+    are returned as raw strings as soon as their closing brace arrives; deciding
+    whether one is valid JSON is left to the caller.
+    """
+
+    def __init__(self, max_object_chars: int = 1_000_000):
+        self.max_object_chars = max_object_chars
+        self._parts: List[str] = []
+        self._size = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Scan the next chunk; returns the objects completed by it, in order"""
+        objects = []
+        position = 0
+        start = 0 if self._depth else None
+        length = len(chunk)
+        while position < length:
+            if self._depth == 0:
+                position = chunk.find("{", position)
+                if position < 0:
+                    break
+                start = position
+                self._depth = 1
+                position += 1
+                continue
+
+            if self._escape:
+                # The escaped character was the first one of this chunk
+                self._escape = False
+                position += 1
+                continue
+            if self._in_string:
+                match = _STRING_END.search(chunk, position)
+                if match is None:
+                    position = length
+                    break
+                position = match.end()
+                if match.group() == "\\":
+                    if position < length:
+                        position += 1
+                    else:
+                        self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(chunk, position)
+            if match is None:
+                position = length
+                break
+            position = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:position])
+                    objects.append("".join(self._parts))
+                    self._parts = []
+                    self._size = 0
+                    start = None
+
+        if self._depth and start is not None:
+            self._parts.append(chunk[start:])
+            self._size += length - start
+            if self._size > self.max_object_chars:
+                logger.debug(f"Dropping an unterminated object of more than {self.max_object_chars} chars")
+                self.reset()
+        return objects
+
+    def pending(self) -> str:
+        """Text of the object still open at the end of the input, if any"""
+        return "".join(self._parts)
+
+    def reset(self) -> None:
+        self._parts = []
+        self._size = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+
+def balanced_spans(text: str, position: int = 0) -> List[Tuple[int, int]]:
+    """(start, end) of every brace-balanced span in text, in order of the opening brace.
+
+    One pass over the text: spans are nested or disjoint, braces inside JSON
+    strings are skipped, and a brace that is never closed yields no span of its
+    own while the spans inside it are still reported.
+    """
+    spans: List[List[int]] = []
+    open_spans: List[int] = []
+    length = len(text)
+    while position < length:
+        if not open_spans:
+            position = text.find("{", position)
+            if position < 0:
+                break
+            open_spans.append(len(spans))
+            spans.append([position, -1])
+            position += 1
+            continue
+
+        match = _STRUCTURAL.search(text, position)
+        if match is None:
+            break
+        position = match.end()
+        char = match.group()
+        if char == '"':
+            while True:
+                match = _STRING_END.search(text, position)
+                if match is None:
+                    position = length
+                    break
+                position = match.end()
+                if match.group() == '"':
+                    break
+                # Skip the escaped character
+                position += 1
+        elif char == "{":
+            open_spans.append(len(spans))
+            spans.append([position - 1, -1])
+        else:
+            spans[open_spans.pop()][1] = position
+    return [(start, end) for start, end in spans if end >= 0]
+
+
+class ToolCallExtractor:
+    """Finds {"tool": "server.tool", "parameters": {...}} calls in streamed model text.
+
+    Calls are returned as soon as their object is complete, so they can start
+    executing while the model is still writing. A brace-delimited span that is
+    not valid JSON (prose such as "{like this}") is searched for nested objects
+    in one more pass over its text, so those are still found.
+    """
+
+    def __init__(self, max_object_chars: int = 1_000_000):
+        self.max_object_chars = max_object_chars
+        self._scanner = JSONObjectScanner(max_object_chars)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        calls = []
+        for candidate in self._scanner.feed(chunk):
+            calls.extend(self._parse(candidate))
+        return calls
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Recover calls that follow an unbalanced opening brace once the text is complete"""
+        leftover = self._scanner.pending()
+        self._scanner.reset()
+        return _nested_calls(leftover) if leftover else []
+
+    def _parse(self, candidate: str) -> List[Dict[str, Any]]:
+        value = _decode(candidate, 0, len(candidate))
+        if value is None:
+            return _nested_calls(candidate)
+        call = as_tool_call(value)
+        return [call] if call is not None else []
+
+
+def _decode(text: str, start: int, end: int) -> Optional[Any]:
+    """The JSON object spanning text[start:end], or None if that span is not one"""
+    # A JSON object starts with {" or is empty; anything else is prose
+    if not _OBJECT_START.match(text, start):
+        return None
+    try:
+        value, stop = _decoder.raw_decode(text, start)
+    except (ValueError, RecursionError):
+        # Nesting deeper than the decoder's recursion limit is not a tool call either
+        return None
+    return value if stop == end else None
+
+
+def _nested_calls(text: str) -> List[Dict[str, Any]]:
+    """Calls inside text that starts with a brace which did not open one.
+
+    The outermost span that is valid JSON wins, as if the text were rescanned
+    after each brace that failed, but every character is scanned once. Spans
+    are decoded innermost first, and one that encloses a span which is not JSON
+    is skipped, since it cannot be JSON either.
+    """
+    spans = balanced_spans(text, 1)
+    parents = []
+    enclosing: List[int] = []
+    for start, _ in spans:
+        while enclosing and spans[enclosing[-1]][1] <= start:
+            enclosing.pop()
+        parents.append(enclosing[-1] if enclosing else -1)
+        enclosing.append(len(parents) - 1)
+
+    values: List[Optional[Any]] = [None] * len(spans)
+    invalid = [False] * len(spans)
+    for index in reversed(range(len(spans))):
+        if not invalid[index]:
+            values[index] = _decode(text, *spans[index])
+            invalid[index] = values[index] is None
+        if invalid[index] and parents[index] >= 0:
+            invalid[parents[index]] = True
+
+    calls = []
+    decoded_up_to = 0
+    for (start, end), value, skip in zip(spans, values, invalid):
+        if skip or start < decoded_up_to:
+            continue
+        decoded_up_to = end
+        call = as_tool_call(value)
+        if call is not None:
+            calls.append(call)
+    return calls
+
+
+def as_tool_call(value: Any) -> Optional[Dict[str, Any]]:
+    """Normalize a decoded object to {"tool": ..., "parameters": {...}}, or None if it is not a tool call"""
+    if not isinstance(value, dict) or not isinstance(value.get("tool"), str):
+        return None
+    parameters = value.get("parameters", value.get("arguments", {}))
+    if not isinstance(parameters, dict):
+        return None
+    return {"tool": value["tool"], "parameters": parameters}
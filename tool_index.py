@@ -0,0 +1,121 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or please "
+    "show tell that the this to what when where which with you your".split()
+)
+
+# Tool names say most about what a tool does, so their terms count more than description terms
+NAME_WEIGHT = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; snake_case and camelCase identifiers are split into their parts"""
+    tokens = []
+    for word in _WORD.findall(_CAMEL_BOUNDARY.sub(" ", text or "")):
+        word = word.lower()
+        if word in STOPWORDS:
+            continue
+        # Crude plural folding so "files" matches "file"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def schema_text(schema: Any) -> Iterable[str]:
+    """Property names, descriptions and enum values of a JSON Schema"""
+    if isinstance(schema, dict):
+        for name, subschema in (schema.get("properties") or {}).items():
+            yield name
+            yield from schema_text(subschema)
+        if isinstance(schema.get("description"), str):
+            yield schema["description"]
+        for value in schema.get("enum") or []:
+            if isinstance(value, str):
+                yield value
+        for key in ("items", "anyOf", "oneOf", "allOf"):
+            if key in schema:
+                yield from schema_text(schema[key])
+    elif isinstance(schema, list):
+        for item in schema:
+            yield from schema_text(item)
+
+
+def tool_terms(tool: Any) -> Counter:
+    """Term frequencies of one MCP tool's name, description and input schema"""
+    terms = Counter()
+    for token in tokenize(tool.name):
+        terms[token] += NAME_WEIGHT
+    terms.update(tokenize(tool.description or ""))
+    for text in schema_text(getattr(tool, "inputSchema", None)):
+        terms.update(tokenize(text))
+    return terms
+
+
+class ToolIndex:
+    """Incremental BM25 index over the tools of all connected servers.
+
+    Documents are added and removed per server, so connecting or disconnecting
+    one server only touches that server's postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._by_server: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def update_server(self, server_name: str, tools: Dict[str, Any]) -> None:
+        """Replace a server's documents; tools maps document key (API tool name) to MCP tool"""
+        self.remove_server(server_name)
+        keys = []
+        for key, tool in tools.items():
+            terms = tool_terms(tool)
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[key] = frequency
+            length = sum(terms.values())
+            self._doc_terms[key] = terms
+            self._lengths[key] = length
+            self._total_length += length
+            keys.append(key)
+        self._by_server[server_name] = keys
+
+    def remove_server(self, server_name: str) -> None:
+        for key in self._by_server.pop(server_name, []):
+            for term in self._doc_terms.pop(key):
+                postings = self._postings[term]
+                del postings[key]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(key)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """The k best matching document keys with their BM25 scores"""
+        if not self._lengths:
+            return []
+        documents = len(self._lengths)
+        average_length = self._total_length / documents
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
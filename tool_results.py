@@ -0,0 +1,211 @@
+import base64
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Base64 is decoded in slices that are a multiple of 4 characters, so every slice decodes on its own
+_DECODE_SLICE = 64 * 1024
+
+
+class Blob:
+    """Binary (or oversized text) tool output, kept as the server sent it until downloaded"""
+
+    def __init__(self, data: str, mime_type: str, base64_encoded: bool):
+        self.data = data
+        self.mime_type = mime_type
+        self.base64_encoded = base64_encoded
+        self.created_at = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        """Size in bytes of the decoded content (UTF-8 text is estimated at one byte per char)"""
+        if self.base64_encoded:
+            return len(self.data) * 3 // 4 - self.data[-2:].count("=")
+        return len(self.data)
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Decode the content slice by slice instead of materializing it in one piece"""
+        for offset in range(0, len(self.data), _DECODE_SLICE):
+            piece = self.data[offset:offset + _DECODE_SLICE]
+            yield base64.b64decode(piece) if self.base64_encoded else piece.encode("utf-8")
+
+
+class BlobStore:
+    """Bounded store that serves binary tool output by reference.
+
+    Blobs are dropped least-recently-used first once max_bytes is exceeded, and
+    after ttl seconds; a download of a dropped blob simply finds nothing.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 600.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._blobs: "OrderedDict[str, Blob]" = OrderedDict()
+        self.bytes = 0
+        self.stored = 0
+        self.evictions = 0
+
+    def put(self, data: str, mime_type: str, base64_encoded: bool = True) -> str:
+        blob = Blob(data, mime_type or "application/octet-stream", base64_encoded)
+        blob_id = uuid.uuid4().hex
+        self._blobs[blob_id] = blob
+        self.bytes += blob.size
+        self.stored += 1
+        self._evict()
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[Blob]:
+        blob = self._blobs.get(blob_id)
+        if blob is None:
+            return None
+        if self.ttl > 0 and time.monotonic() - blob.created_at > self.ttl:
+            self._drop(blob_id)
+            return None
+        self._blobs.move_to_end(blob_id)
+        return blob
+
+    def __contains__(self, blob_id: str) -> bool:
+        return self.get(blob_id) is not None
+
+    def _drop(self, blob_id: str) -> None:
+        blob = self._blobs.pop(blob_id, None)
+        if blob is not None:
+            self.bytes -= blob.size
+
+    def _evict(self) -> None:
+        # Keep the newest blob even if it alone exceeds the budget, so the current result stays downloadable
+        while len(self._blobs) > 1 and self.bytes > self.max_bytes:
+            blob_id = next(iter(self._blobs))
+            self._drop(blob_id)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "blobs": len(self._blobs),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "stored": self.stored,
+            "evictions": self.evictions,
+        }
+
+
+def blob_url(blob_id: str) -> str:
+    return f"/api/blobs/{blob_id}"
+
+
+class ToolResult:
+    """Typed outcome of a tool call or resource read.
+
+    parts keeps every content part in order: text parts inline (truncated to
+    the inline budget, with the full text kept as a blob), binary parts as
+    references into the BlobStore. structured is the tool's structured
+    content, passed through as the server sent it.
+    """
+
+    def __init__(self, parts: List[dict], structured: Optional[Dict[str, Any]] = None, is_error: bool = False):
+        self.parts = parts
+        self.structured = structured
+        self.is_error = is_error
+
+    @property
+    def size(self) -> int:
+        """Characters held inline; blobs are accounted for by the BlobStore"""
+        return sum(len(part["text"]) for part in self.parts if part["type"] == "text")
+
+    def text(self) -> str:
+        """Text rendering of the result for the model"""
+        rendered = []
+        for part in self.parts:
+            if part["type"] == "text":
+                rendered.append(part["text"])
+                if part.get("truncated"):
+                    rendered.append(
+                        f"... [truncated: {part['total_chars']} chars in total, full output at {part['url']}]"
+                    )
+            elif part["type"] == "blob":
+                rendered.append(f"[{part['mime_type']} attachment, {part['size']} bytes: {part['url']}]")
+            elif part["type"] == "link":
+                rendered.append(f"[resource: {part['uri']}]")
+        return "\n".join(rendered)
+
+    def attachments(self) -> List[dict]:
+        """Parts that can be downloaded: binary content and the full text of truncated parts"""
+        attachments = []
+        for part in self.parts:
+            if part["type"] == "blob":
+                attachments.append({"url": part["url"], "mime_type": part["mime_type"], "size": part["size"]})
+            elif part.get("truncated"):
+                attachments.append({"url": part["url"], "mime_type": "text/plain", "size": part["total_chars"]})
+        return attachments
+
+    def blob_ids(self) -> List[str]:
+        """Ids of the blobs this result links to"""
+        return [part["blob_id"] for part in self.parts if "blob_id" in part]
+
+    def to_dict(self) -> dict:
+        return {"content": self.parts, "structured": self.structured, "is_error": self.is_error}
+
+
+class ResultBuilder:
+    """Turns MCP content blocks into a ToolResult within an inline character budget"""
+
+    def __init__(self, blobs: BlobStore, max_inline_chars: int = 100_000):
+        self.blobs = blobs
+        self.max_inline_chars = max_inline_chars
+
+    def _blob_part(self, data: str, mime_type: str) -> dict:
+        blob_id = self.blobs.put(data, mime_type)
+        return {
+            "type": "blob",
+            "blob_id": blob_id,
+            "mime_type": mime_type,
+            "size": self.blobs.get(blob_id).size,
+            "url": blob_url(blob_id),
+        }
+
+    def _text_part(self, text: str, budget: int) -> dict:
+        if len(text) <= budget:
+            return {"type": "text", "text": text}
+        # Only the inline head is copied; the full string is stored as-is behind a download link
+        blob_id = self.blobs.put(text, "text/plain; charset=utf-8", base64_encoded=False)
+        return {
+            "type": "text",
+            "text": text[:budget],
+            "truncated": True,
+            "total_chars": len(text),
+            "blob_id": blob_id,
+            "url": blob_url(blob_id),
+        }
+
+    def build(self, content: List[Any], structured: Optional[Dict[str, Any]] = None, is_error: bool = False) -> ToolResult:
+        """Build a result from tool content blocks or resource contents"""
+        parts = []
+        budget = self.max_inline_chars
+        for block in content:
+            kind = getattr(block, "type", None)
+            resource = getattr(block, "resource", None)  # embedded resource
+            if resource is not None:
+                block = resource
+            if isinstance(getattr(block, "text", None), str):
+                part = self._text_part(block.text, budget)
+                budget = max(0, budget - len(part["text"]))
+                parts.append(part)
+            elif isinstance(getattr(block, "data", None), str):  # image and audio content
+                parts.append(self._blob_part(block.data, block.mimeType))
+            elif isinstance(getattr(block, "blob", None), str):  # binary resource contents
+                parts.append(self._blob_part(block.blob, block.mimeType or "application/octet-stream"))
+            elif kind == "resource_link":
+                parts.append({"type": "link", "uri": str(block.uri), "name": getattr(block, "name", None)})
+            else:
+                logger.debug(f"Skipping unsupported content block of type {kind!r}")
+
+        if structured is not None and not any(part["type"] == "text" for part in parts):
+            # Servers usually mirror structured content as text; serialize it only when they did not
+            part = self._text_part(json.dumps(structured, separators=(",", ":"), default=str), budget)
+            parts.append(part)
+        return ToolResult(parts, structured, is_error)